@@ -0,0 +1,125 @@
+"""
+Algod account state cache
+Caches account_info responses for about a round, the interval account state
+can change at, and coalesces concurrent lookups of the same address into one
+in-flight algod call
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from algosdk.v2client import algod
+
+from chain_context import ROUND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Rounds an account_info response is served for
+ACCOUNT_TTL_ROUNDS = 1
+
+
+class CachedAccount:
+    """An account_info response and when it goes stale"""
+
+    __slots__ = ('info', 'round', 'expires_at')
+
+    def __init__(self, info: Dict[str, Any], expires_at: float):
+        self.info = info
+        self.round = info.get('round') or 0
+        self.expires_at = expires_at
+
+
+class AccountCache:
+    """
+    In-process, TTL'd cache of algod account state
+
+    `client_factory` returns the current algod client, so the cache keeps
+    working after a forked worker re-creates it. Returned dicts are shared
+    between callers and must not be modified.
+    """
+
+    def __init__(self, client_factory: Callable[[], algod.AlgodClient], ttl_rounds: int = ACCOUNT_TTL_ROUNDS,
+                 max_entries: int = 4096):
+        self.client_factory = client_factory
+        self.ttl = ttl_rounds * ROUND_SECONDS
+        self.max_entries = max_entries
+        self._accounts: Dict[str, CachedAccount] = {}
+        self._in_flight: Dict[str, Future] = {}
+        # Round an in-flight lookup's result must reach to be cached, set by invalidate
+        self._required_round: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, address: str) -> Dict[str, Any]:
+        """
+        account_info for an address, from cache while it is fresh
+
+        Only one lookup per address goes to algod at a time; concurrent
+        callers wait for it and share its result or exception.
+        """
+        with self._lock:
+            cached = self._accounts.get(address)
+            if cached is not None and cached.expires_at > time.monotonic():
+                return cached.info
+            future = self._in_flight.get(address)
+            leader = future is None
+            if leader:
+                future = self._in_flight[address] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            info = self.client_factory().account_info(address)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(address, None)
+                self._required_round.pop(address, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._in_flight.pop(address, None)
+            cached = CachedAccount(info, time.monotonic() + self.ttl)
+            # Invalidated mid-lookup: algod may have answered from before the change
+            if cached.round >= self._required_round.pop(address, 0):
+                if len(self._accounts) >= self.max_entries:
+                    self._evict_expired()
+                self._accounts[address] = cached
+        future.set_result(info)
+        return info
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for address in [address for address, cached in self._accounts.items() if cached.expires_at <= now]:
+            del self._accounts[address]
+        if len(self._accounts) >= self.max_entries:
+            self._accounts.clear()
+
+    def invalidate(self, address: str, confirmed_round: Optional[int] = None):
+        """
+        Drop an address's cached state
+
+        With `confirmed_round`, state already read at or after that round is
+        kept, since it includes the change. A lookup already in flight is
+        only cached if its response is that recent.
+        """
+        required = float('inf') if confirmed_round is None else confirmed_round
+        with self._lock:
+            cached = self._accounts.get(address)
+            if cached is not None and cached.round < required:
+                del self._accounts[address]
+            if address in self._in_flight:
+                self._required_round[address] = max(self._required_round.get(address, 0), required)
+
+    def clear(self):
+        """Drop every cached account"""
+        with self._lock:
+            self._accounts.clear()
+
+    def after_fork(self):
+        """Drop state and the lock inherited from the parent process"""
+        self._lock = threading.Lock()
+        self._accounts = {}
+        self._in_flight = {}
+        self._required_round = {}
@@ -4,9 +4,10 @@ import json
 import os
 import sqlite3
 import hashlib
+import time
 from datetime import datetime
-from algosdk import account, mnemonic, transaction
-from algosdk.v2client import algod
+from algosdk import transaction
+from algosdk.v2client import algod, indexer
 import base64
 import traceback
 import secrets
@@ -22,11 +23,33 @@ from dotenv import load_dotenv
 
 # Import bonding curve classes
 try:
-    from bonding_curve import BondingCurve, BondingCurveState
+    from bonding_curve import BondingCurve, BondingCurveState, FixedPointBondingCurve
 except ImportError:
     logger.warning("BondingCurve module not found. Some features may not work.")
     BondingCurve = None
     BondingCurveState = None
+    FixedPointBondingCurve = None
+
+# Import pooled database connections
+from database import get_db, db_connection, audit_query_plans, select_models, pool, init_app as init_db_app
+from migrations import run_migrations, discover_migrations, get_schema_version
+from models import Trade, TraderTrade, TokenSummary
+from response_cache import cached_response, bumps_data_version, bump_on_trade, bump_data_version, response_cache
+from json_provider import init_app as init_json_app, stream_json_array
+from token_listing import list_tokens, listing_sql, parse_fields, DEFAULT_PAGE_SIZE
+from trader_analytics import compute_trader_analytics, TOKEN_ACTIVITY_SQL
+from account_cache import AccountCache
+from asset_metadata import AssetMetadata, asset_metadata_cache, DEFAULT_DECIMALS
+from curve_store import curve_cache, save_curve, CURVE_COLUMNS
+from trade_engine import execute_trade, record_trade, register_trade_hook, TokenNotFound, TradeConflict, CREATOR_FEE_RATE, PLATFORM_FEE_RATE
+from trader_stats import update_trader_stats, rebuild_trader_stats, leaderboard, daily_pnl, LEADERBOARD_SQL, TRADER_PNL_SQL
+from positions import update_position, rebuild_positions, PORTFOLIO_SQL, POSITION_DUST
+from creator_earnings import update_creator_earnings, creator_earnings, creator_totals, earnings_history, CREATOR_TOKENS_SQL
+from candles import update_candles, get_candles, CANDLE_RANGE_SQL
+from market_stats import update_market_stats, market_stats_maintainer
+from chain_context import ChainContext, unique_lease
+from transfer_batcher import TransferBatcher
+from chain_txns import TxnConfirmer, register_txn_handler, get_txn, PENDING_TXNS_SQL, TXN_CONFIRMED, TXN_FAILED, TXN_PENDING
 
 # Import web scraper
 try:
@@ -52,6 +75,12 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-in-production')
 
+# Return request-scoped database connections to the pool
+init_db_app(app)
+
+# Serialize responses with orjson when available
+init_json_app(app)
+
 # Error handling decorator
 def handle_errors(f):
     """Decorator to handle errors in route handlers"""
@@ -111,6 +140,7 @@ def add_security_headers(response):
 ALGOD_TOKEN = ""
 ALGOD_SERVER = "https://testnet-api.algonode.cloud"
 ALGOD_PORT = ""
+INDEXER_SERVER = "https://testnet-idx.algonode.cloud"
 
 # YouTube OAuth configuration
 YOUTUBE_CLIENT_ID = os.getenv('YOUTUBE_CLIENT_ID', 'your-youtube-client-id')
@@ -118,57 +148,42 @@ YOUTUBE_CLIENT_SECRET = os.getenv('YOUTUBE_CLIENT_SECRET', 'your-youtube-client-
 YOUTUBE_REDIRECT_URI = os.getenv('YOUTUBE_REDIRECT_URI', 'http://localhost:5175/auth/youtube/callback')
 YOUTUBE_SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
 
-# YouTube sessions - will be loaded from database
-youtube_sessions = {}
-
-def load_youtube_session():
-    """Load YouTube session from database"""
-    global youtube_sessions
+# YouTube sessions live in the database only, so every worker sees the same one
+def get_youtube_session():
+    """The connected YouTube session (credentials, channel_id, channel_title), or None"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT session_key, credentials, channel_id, channel_title, created_at FROM youtube_sessions ORDER BY created_at DESC LIMIT 1')
-        row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT credentials, channel_id, channel_title FROM youtube_sessions ORDER BY created_at DESC LIMIT 1')
+            row = cursor.fetchone()
         
         if row:
-            session_key, credentials_json, channel_id, channel_title, created_at = row
-            youtube_sessions[session_key] = {
+            credentials_json, channel_id, channel_title = row
+            return {
                 'credentials': json.loads(credentials_json),
                 'channel_id': channel_id,
                 'channel_title': channel_title
             }
-            logger.info(f"✅ YouTube session loaded from database for channel: {channel_title}")
-            return True
     except Exception as e:
         logger.error(f"Error loading YouTube session: {e}")
-    return False
+    return None
 
 def save_youtube_session(session_key, credentials_data, channel_id, channel_title):
     """Save YouTube session to database"""
-    global youtube_sessions
     try:
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        
-        # Clear old sessions
-        cursor.execute('DELETE FROM youtube_sessions')
-        
-        # Insert new session
-        cursor.execute('''
-            INSERT INTO youtube_sessions (session_key, credentials, channel_id, channel_title)
-            VALUES (?, ?, ?, ?)
-        ''', (session_key, json.dumps(credentials_data), channel_id, channel_title))
-        
-        conn.commit()
-        conn.close()
-        
-        # Update in-memory cache
-        youtube_sessions[session_key] = {
-            'credentials': credentials_data,
-            'channel_id': channel_id,
-            'channel_title': channel_title
-        }
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Clear old sessions
+            cursor.execute('DELETE FROM youtube_sessions')
+            
+            # Insert new session
+            cursor.execute('''
+                INSERT INTO youtube_sessions (session_key, credentials, channel_id, channel_title)
+                VALUES (?, ?, ?, ?)
+            ''', (session_key, json.dumps(credentials_data), channel_id, channel_title))
+            
+            conn.commit()
         
         logger.info(f"✅ YouTube session saved to database for channel: {channel_title}")
         return True
@@ -178,13 +193,15 @@ def save_youtube_session(session_key, credentials_data, channel_id, channel_titl
 
 def get_connected_channel_id():
     """Get the connected channel ID from session"""
-    if youtube_sessions:
-        session_key = list(youtube_sessions.keys())[0]
-        return youtube_sessions[session_key].get('channel_id')
+    session_data = get_youtube_session()
+    if session_data:
+        return session_data.get('channel_id')
     return None
 
 # Initialize Algorand client
 algod_client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_SERVER, ALGOD_PORT)
+# The indexer settles tracked transactions that have dropped out of algod's pending pool
+indexer_client = indexer.IndexerClient(ALGOD_TOKEN, INDEXER_SERVER)
 
 # Input validation helpers
 def validate_algorand_address(address: str) -> bool:
@@ -215,342 +232,146 @@ def sanitize_input(text: str, max_length: int = 256) -> str:
 # Creator account mnemonic (for demo purposes - in production, use proper key management)
 CREATOR_MNEMONIC = "alter green actual grab spoon okay faith repeat smile report easily retire plate enact vacuum spin bachelor rate where service settle nice north above soul"
 
+# Creator signing key (derived once) and cached suggested params for every algod transaction
+chain_context = ChainContext(lambda: algod_client, CREATOR_MNEMONIC)
+
+# Submitted transactions are tracked in chain_txns and confirmed in the background
+txn_confirmer = TxnConfirmer(lambda: algod_client, lambda: indexer_client)
+# Creator-to-buyer token transfers are submitted in atomic groups
+transfer_batcher = TransferBatcher(chain_context, txn_confirmer)
+# Seconds a buy waits for its transfer to be grouped and submitted
+TRANSFER_SUBMIT_TIMEOUT = 10
+# account_info for hot addresses (above all the creator wallet), shared for about a round
+account_cache = AccountCache(lambda: algod_client)
+
+def invalidate_settled_accounts(txn):
+    """Drop cached state for the accounts a confirmed transaction changed"""
+    if txn['status'] != TXN_CONFIRMED:
+        return
+    payload = txn['payload'] or {}
+    for address in {chain_context.address, payload.get('trader_address'), payload.get('receiver')} - {None}:
+        account_cache.invalidate(address, txn['confirmed_round'])
+
+# Runs in the worker holding the confirmer lease; other workers' entries age out within a round
+txn_confirmer.add_settle_listener(invalidate_settled_accounts)
+# /api/tx/<txid>/events streams close after TX_EVENTS_TIMEOUT seconds and
+# re-check the status at least every TX_EVENTS_INTERVAL seconds
+TX_EVENTS_TIMEOUT = 120
+TX_EVENTS_INTERVAL = 2
+
+# Hot read paths checked with EXPLAIN QUERY PLAN at startup
+HOT_QUERIES = {
+    'get_trades': '''
+        SELECT trade_type, amount, price, created_at, transaction_id, trader_address
+        FROM trades WHERE asa_id = ? AND created_at >= ? ORDER BY created_at DESC LIMIT ?
+    ''',
+    'get_candles': CANDLE_RANGE_SQL,
+    'get_tokens_page': listing_sql(TokenSummary.SELECT, after_cursor=True),
+    'get_tokens_by_market_cap': listing_sql('asa_id', sort='market_cap', after_cursor=True, min_market_cap=True),
+    'get_tokens_by_platform': listing_sql('asa_id', after_cursor=True, platform=True),
+    'copy_trading_leaderboard': LEADERBOARD_SQL,
+    'copy_trading_trader_pnl': TRADER_PNL_SQL,
+    'copy_trading_trader_analytics': TOKEN_ACTIVITY_SQL,
+    'get_portfolio': PORTFOLIO_SQL,
+    'get_user_tokens': 'SELECT * FROM tokens WHERE creator = ? ORDER BY created_at DESC',
+    'get_creator_earnings': CREATOR_TOKENS_SQL,
+    'get_youtube_videos': '''
+        SELECT content_id, content_url, asa_id FROM tokens
+        WHERE platform = ? AND (content_id IS NOT NULL OR content_url IS NOT NULL)
+    ''',
+    'get_predictions': 'SELECT prediction_id FROM predictions WHERE status = ? ORDER BY created_at DESC',
+    'auto_resolve_expired': "SELECT prediction_id FROM predictions WHERE status = 'active' AND end_time < ?",
+    'pending_chain_txns': PENDING_TXNS_SQL,
+}
+
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('creatorvault.db')
-    cursor = conn.cursor()
-    
-    # Create tokens table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asa_id INTEGER UNIQUE NOT NULL,
-            creator TEXT NOT NULL,
-            token_name TEXT NOT NULL,
-            token_symbol TEXT NOT NULL,
-            total_supply INTEGER NOT NULL,
-            current_price REAL NOT NULL,
-            market_cap REAL NOT NULL,
-            volume_24h REAL DEFAULT 0,
-            holders INTEGER DEFAULT 1,
-            price_change_24h REAL DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            youtube_channel_title TEXT,
-            youtube_subscribers INTEGER,
-            video_id TEXT,
-            video_title TEXT
-        )
-    ''')
-    
-    # Create trades table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asa_id INTEGER NOT NULL,
-            trader_address TEXT NOT NULL,
-            trade_type TEXT NOT NULL,
-            amount REAL NOT NULL,
-            price REAL NOT NULL,
-            transaction_id TEXT NOT NULL,
-            creator_fee REAL DEFAULT 0,
-            platform_fee REAL DEFAULT 0,
-            total_value REAL DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (asa_id) REFERENCES tokens (asa_id)
-        )
-    ''')
-    
-    # Add fee columns if they don't exist (for existing databases)
-    try:
-        cursor.execute('ALTER TABLE trades ADD COLUMN creator_fee REAL DEFAULT 0')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE trades ADD COLUMN platform_fee REAL DEFAULT 0')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE trades ADD COLUMN total_value REAL DEFAULT 0')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE trades ADD COLUMN referral_code TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE trades ADD COLUMN referral_earnings REAL DEFAULT 0')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
-    # Create referrals table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS referrals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            referrer_address TEXT NOT NULL,
-            referred_address TEXT NOT NULL UNIQUE,
-            referral_code TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            total_earnings REAL DEFAULT 0,
-            total_trades_count INTEGER DEFAULT 0,
-            total_volume REAL DEFAULT 0
-        )
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals (referrer_address)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referrals_referred ON referrals (referred_address)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referrals_code ON referrals (referral_code)')
-    
-    # Create referral_earnings table for detailed tracking
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS referral_earnings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            referrer_address TEXT NOT NULL,
-            referred_address TEXT NOT NULL,
-            trade_id INTEGER NOT NULL,
-            earnings REAL NOT NULL,
-            trade_value REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (trade_id) REFERENCES trades (id)
-        )
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referral_earnings_referrer ON referral_earnings (referrer_address)')
-    
-    # Add bonding curve columns if they don't exist
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN bonding_curve_config TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN bonding_curve_state TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN liquidity_pool_config TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN is_amm_migrated INTEGER DEFAULT 0')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN migration_threshold REAL DEFAULT 0')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN platform TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN content_url TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN content_id TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN content_description TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE tokens ADD COLUMN content_thumbnail TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
-    # Create holders table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS holders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asa_id INTEGER NOT NULL,
-            holder_address TEXT NOT NULL,
-            balance REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (asa_id) REFERENCES tokens (asa_id)
-        )
-    ''')
-    
-    # Create YouTube sessions table for persistent auth
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS youtube_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_key TEXT UNIQUE NOT NULL,
-            credentials TEXT NOT NULL,
-            channel_id TEXT NOT NULL,
-            channel_title TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create predictions table for prediction markets
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prediction_id TEXT UNIQUE NOT NULL,
-            creator_address TEXT NOT NULL,
-            content_url TEXT NOT NULL,
-            platform TEXT NOT NULL,
-            metric_type TEXT NOT NULL,
-            target_value REAL NOT NULL,
-            timeframe_hours INTEGER NOT NULL,
-            end_time TIMESTAMP NOT NULL,
-            yes_pool REAL DEFAULT 0,
-            no_pool REAL DEFAULT 0,
-            status TEXT DEFAULT 'active',
-            outcome TEXT,
-            initial_value REAL,
-            final_value REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create prediction_trades table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS prediction_trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prediction_id TEXT NOT NULL,
-            trader_address TEXT NOT NULL,
-            side TEXT NOT NULL,
-            amount REAL NOT NULL,
-            odds REAL NOT NULL,
-            potential_payout REAL NOT NULL,
-            transaction_id TEXT,
-            status TEXT DEFAULT 'pending',
-            payout_amount REAL DEFAULT 0,
-            claimed INTEGER DEFAULT 0,
-            claim_txid TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (prediction_id) REFERENCES predictions (prediction_id)
-        )
-    ''')
-    
-    # Migrate prediction_trades table - add claimed columns if they don't exist
-    try:
-        cursor.execute('PRAGMA table_info(prediction_trades)')
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        if 'claimed' not in columns:
-            cursor.execute('ALTER TABLE prediction_trades ADD COLUMN claimed INTEGER DEFAULT 0')
-        if 'claim_txid' not in columns:
-            cursor.execute('ALTER TABLE prediction_trades ADD COLUMN claim_txid TEXT')
-        
-        conn.commit()
-    except Exception as e:
-        logger.warning(f"Migration warning: {e}")
-
-    # Create copy trading profiles table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS copy_profiles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            leader_address TEXT NOT NULL,
-            follower_address TEXT NOT NULL,
-            allocation_percent REAL NOT NULL,
-            max_single_trade_algo REAL NOT NULL,
-            copy_type TEXT DEFAULT 'proportional',
-            risk_level TEXT DEFAULT 'balanced',
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_copy_profiles_leader ON copy_profiles (leader_address)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_copy_profiles_follower ON copy_profiles (follower_address)')
-    
-    # Migrate copy_profiles table - add risk_level column if it doesn't exist
-    try:
-        cursor.execute('PRAGMA table_info(copy_profiles)')
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'risk_level' not in columns:
-            cursor.execute('ALTER TABLE copy_profiles ADD COLUMN risk_level TEXT DEFAULT "balanced"')
-            conn.commit()
-    except Exception as e:
-        logger.warning(f"Migration warning for copy_profiles: {e}")
+    """Apply pending schema migrations and load persisted state"""
+    with db_connection() as conn:
+        version = run_migrations(conn)
+        logger.info(f"💾 Database schema at version {version}")
+
+        # Make sure hot queries stay indexed as the schema evolves
+        audit_query_plans(conn, HOT_QUERIES)
+    
+    session_data = get_youtube_session()
+    if session_data:
+        logger.info(f"✅ YouTube session found in database for channel: {session_data['channel_title']}")
+
+# Keep the position ledger and leaderboard rollup in step with every recorded trade.
+# Positions go first: they set the trade's realized P&L that trader_stats sums.
+register_trade_hook(update_position)
+register_trade_hook(update_trader_stats)
+register_trade_hook(update_candles)
+register_trade_hook(update_market_stats)
+register_trade_hook(update_creator_earnings)
+# Cached read responses are keyed on the data version; trades bump it in their own transaction
+register_trade_hook(bump_on_trade)
+
+def start_background_services():
+    """
+    Start the background workers in this process
 
-    # Create bot strategies table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bot_strategies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            owner_address TEXT NOT NULL,
-            label TEXT NOT NULL,
-            asa_id INTEGER,
-            token_symbol TEXT,
-            metric_type TEXT NOT NULL,
-            condition TEXT NOT NULL,
-            action TEXT NOT NULL,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bot_strategies_owner ON bot_strategies (owner_address)')
-    
-    # Strategy executions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS strategy_executions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            strategy_id INTEGER NOT NULL,
-            trader_address TEXT NOT NULL,
-            asa_id INTEGER NOT NULL,
-            trade_type TEXT NOT NULL,
-            amount REAL NOT NULL,
-            price REAL NOT NULL,
-            total_value REAL NOT NULL,
-            pnl REAL DEFAULT 0,
-            executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (strategy_id) REFERENCES bot_strategies(id)
-        )
-    ''')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_strategy_executions_strategy ON strategy_executions (strategy_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_strategy_executions_trader ON strategy_executions (trader_address)')
+    Every server worker runs all of them. The chain context refresher and the
+    transfer batcher serve this process's own requests; the market stats
+    maintainer and the txn confirmer are singletons, and only the worker
+    holding each one's lease in service_leases does its work.
+    """
+    market_stats_maintainer.start()
+    chain_context.start()
+    txn_confirmer.start()
+    transfer_batcher.start()
+
+def stop_background_services():
+    """Stop the background workers and free their leases for another worker to take"""
+    for service in (market_stats_maintainer, txn_confirmer, transfer_batcher, chain_context):
+        service.stop()
+    market_stats_maintainer.lease.release()
+    txn_confirmer.lease.release()
+
+def reset_after_fork():
+    """
+    Re-create per-process state in a freshly forked server worker
 
-    conn.close()
-    
-    # Load YouTube session from database if exists
-    load_youtube_session()
-    
-    # Initialize bonding curves for existing tokens that don't have them
-    try:
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT asa_id, total_supply, current_price 
-            FROM tokens 
-            WHERE bonding_curve_config IS NULL OR bonding_curve_config = ''
-        ''')
-        
-        tokens_to_update = cursor.fetchall()
-        
-        if tokens_to_update and BondingCurve is not None:
-            for asa_id, total_supply, current_price in tokens_to_update:
-                initial_price = current_price if current_price > 0 else 0.001
-                bonding_curve = BondingCurve(
-                    initial_price=initial_price,
-                    initial_supply=int(total_supply)
-                )
-                bonding_curve_state = BondingCurveState(
-                    token_supply=0,
-                    algo_reserve=0
-                )
-                bonding_curve_config_json = json.dumps(bonding_curve.to_dict())
-                bonding_curve_state_json = json.dumps(bonding_curve_state.to_dict())
-                
-                cursor.execute('''
-                    UPDATE tokens 
-                    SET bonding_curve_config = ?, bonding_curve_state = ?
-                    WHERE asa_id = ?
-                ''', (bonding_curve_config_json, bonding_curve_state_json, asa_id))
-            
-            conn.commit()
-            if tokens_to_update:
-                logger.info(f"✅ Initialized bonding curves for {len(tokens_to_update)} existing tokens")
-        
-        conn.close()
-    except Exception as e:
-        logger.warning(f"Could not initialize bonding curves for existing tokens: {e}")
+    Connections, clients and caches inherited from the parent (gunicorn's
+    preloading master) are dropped and rebuilt for this process.
+    """
+    global algod_client, indexer_client
+    pool.after_fork()
+    market_stats_maintainer.after_fork()
+    algod_client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_SERVER, ALGOD_PORT)
+    indexer_client = indexer.IndexerClient(ALGOD_TOKEN, INDEXER_SERVER)
+    chain_context.after_fork()
+    txn_confirmer.after_fork()
+    transfer_batcher.after_fork()
+    curve_cache.clear()
+    asset_metadata_cache.clear()
+    account_cache.after_fork()
+    response_cache.clear()
+
+@app.cli.command('rebuild-trader-stats')
+def rebuild_trader_stats_command():
+    """Recompute the trader_stats leaderboard rollup from the trades table"""
+    with db_connection() as conn:
+        run_migrations(conn)
+        rows = rebuild_trader_stats(conn)
+    print(f"📊 Rebuilt trader_stats: {rows} trader-day rows")
+
+@app.cli.command('rebuild-positions')
+def rebuild_positions_command():
+    """Replay the trades table into the position ledger, then refresh trader_stats"""
+    with db_connection() as conn:
+        run_migrations(conn)
+        positions = rebuild_positions(conn)
+        rows = rebuild_trader_stats(conn)
+    print(f"📒 Rebuilt {positions} positions and {rows} trader_stats rows")
 
 # Helper function to create ASA
 def create_asa(private_key, creator_address, asset_name, unit_name, total_supply, decimals=0, default_frozen=False, manager_address=None, reserve_address=None, freeze_address=None, clawback_address=None, url=None, metadata_hash=None):
     """Create an Algorand Standard Asset (ASA)"""
     try:
         # Get suggested parameters
-        sp = algod_client.suggested_params()
+        sp = chain_context.suggested_params()
         
         # Create asset creation transaction
         txn = transaction.AssetConfigTxn(
@@ -567,29 +388,31 @@ def create_asa(private_key, creator_address, asset_name, unit_name, total_supply
             metadata_hash=metadata_hash,
             total=total_supply,
             decimals=decimals,
+            lease=unique_lease(),
         )
         
         # Sign the transaction
         signed_txn = txn.sign(private_key)
         
         # Send the transaction
-        txid = algod_client.send_transaction(signed_txn)
-        print(f"📤 Transaction sent: {txid}")
+        txid = txn_confirmer.submit(get_db(), signed_txn, 'asset_create', {'asset_name': asset_name})
+        logger.info(f"📤 Transaction sent: {txid}")
         
-        # Wait for confirmation
-        print("⏳ Waiting for confirmation...")
-        results = transaction.wait_for_confirmation(algod_client, txid, 4)
-        print(f"✅ Result confirmed in round: {results['confirmed-round']}")
+        # The token row needs the asset ID, so wait for the confirmer to settle it
+        logger.info("⏳ Waiting for confirmation...")
+        results = txn_confirmer.wait_for(txid)
+        logger.info(f"✅ Result confirmed in round: {results['confirmed_round']}")
         
         # Get the asset ID
-        created_asset = results["asset-index"]
-        print(f"🎉 ASA Created! ID: {created_asset}")
+        created_asset = results["asset_id"]
+        logger.info(f"🎉 ASA Created! ID: {created_asset}")
+        asset_metadata_cache.store(get_db(), AssetMetadata(created_asset, asset_name, unit_name, decimals,
+                                                           total_supply, creator_address))
         
-        return created_asset, txid, results['confirmed-round']
+        return created_asset, txid, results['confirmed_round']
         
     except Exception as e:
-        print(f"❌ Error creating ASA: {e}")
-        traceback.print_exc()
+        logger.exception(f"❌ Error creating ASA: {e}")
         raise e
 
 @app.route('/health', methods=['GET'])
@@ -608,6 +431,26 @@ def health_check():
         ]
     })
 
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: the database answers and its schema is fully migrated"""
+    checks = {}
+    try:
+        with db_connection() as conn:
+            version = get_schema_version(conn)
+        latest = discover_migrations()[-1][0]
+        checks["database"] = True
+        checks["schema_current"] = version >= latest
+        checks["schema_version"] = version
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        checks["database"] = False
+        checks["schema_current"] = False
+    checks["market_stats"] = market_stats_maintainer.running
+
+    ready = checks["database"] and checks["schema_current"]
+    return jsonify({"status": "ready" if ready else "not_ready", "pid": os.getpid(), "checks": checks}), (200 if ready else 503)
+
 @app.route('/auth/youtube', methods=['GET'])
 def youtube_auth():
     """Initiate YouTube OAuth flow"""
@@ -713,7 +556,6 @@ def youtube_callback():
         
         print(f"✅ YouTube OAuth successful for channel: {channel_title} ({channel_id})")
         print(f"💾 Stored in database - Session ID: {session_id}")
-        print(f"📋 Total sessions: {len(youtube_sessions)}")
         
         return jsonify({
             "success": True,
@@ -735,9 +577,9 @@ def youtube_auth_status():
     """Check if user is authenticated with YouTube"""
     try:
         print(f"🔍 Checking YouTube auth status...")
-        print(f"📋 In-memory sessions: {list(youtube_sessions.keys())}")
         
-        if not youtube_sessions:
+        session_data = get_youtube_session()
+        if not session_data:
             print("❌ No YouTube sessions found")
             return jsonify({
                 "success": False,
@@ -745,8 +587,6 @@ def youtube_auth_status():
                 "error": "Not authenticated"
             })
         
-        session_key = list(youtube_sessions.keys())[0]
-        session_data = youtube_sessions[session_key]
         
         print("✅ YouTube session found")
         
@@ -825,15 +665,14 @@ def get_linkedin_profile():
 def get_youtube_channel():
     """Get full YouTube channel information"""
     try:
-        if not youtube_sessions:
+        session_data = get_youtube_session()
+        if not session_data:
             return jsonify({
                 "success": False,
                 "error": "Not authenticated",
                 "channel": None
             }), 200  # Return 200 with success: false so frontend can handle gracefully
         
-        session_key = list(youtube_sessions.keys())[0]
-        session_data = youtube_sessions[session_key]
         
         credentials_data = session_data['credentials']
         credentials = Credentials(
@@ -891,14 +730,15 @@ def get_youtube_channel():
         })
 
 @app.route('/test-create-token', methods=['POST'])
+@bumps_data_version
 def test_create_token():
     """Test endpoint to create a token without YouTube auth"""
     try:
         data = request.get_json()
         
         # Use the creator account directly
-        private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-        creator_address = account.address_from_private_key(private_key)
+        private_key = chain_context.private_key
+        creator_address = chain_context.address
         
         # Create ASA
         asset_id = create_asa(
@@ -921,7 +761,7 @@ def test_create_token():
         market_cap = float(data['total_supply']) * float(data['initial_price'])
         
         # Store in database
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO tokens (asa_id, creator, token_name, token_symbol, total_supply, 
@@ -939,7 +779,6 @@ def test_create_token():
             data.get('youtube_subscribers', 1000)
         ))
         conn.commit()
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -960,6 +799,7 @@ def test_create_token():
         }), 500
 
 @app.route('/create-creator-token', methods=['POST'])
+@bumps_data_version
 def create_creator_token():
     """Create a creator token (ASA) with bonding curve - token already created via Pera Wallet"""
     try:
@@ -985,10 +825,9 @@ def create_creator_token():
         channel_title = data.get('youtube_channel_title', 'Creator')
         subscribers = data.get('youtube_subscribers', 0)
         
-        if youtube_sessions:
+        session_data = get_youtube_session()
+        if session_data:
             try:
-                session_key = list(youtube_sessions.keys())[0]
-                session_data = youtube_sessions[session_key]
                 credentials_data = session_data['credentials']
                 credentials = Credentials(
                     token=credentials_data['token'],
@@ -1018,32 +857,35 @@ def create_creator_token():
         initial_price = float(data.get('initial_price', data.get('token_price', 0.001)))
         market_cap = float(data['total_supply']) * initial_price
         
-        # Initialize bonding curve
+        # Initialize bonding curve ('fixed' mode prices in integer microAlgos and base units)
         if BondingCurve is not None:
-            bonding_curve = BondingCurve(
-                initial_price=initial_price,
-                initial_supply=int(data['total_supply'])
-            )
+            if data.get('curve_mode', 'float') == 'fixed':
+                bonding_curve = FixedPointBondingCurve(
+                    initial_price=initial_price,
+                    initial_supply=int(data['total_supply']),
+                    decimals=int(data.get('decimals', 6))
+                )
+            else:
+                bonding_curve = BondingCurve(
+                    initial_price=initial_price,
+                    initial_supply=int(data['total_supply'])
+                )
             bonding_curve_state = BondingCurveState(
                 token_supply=0,  # Start with 0 tokens in circulation
                 algo_reserve=0   # Start with 0 ALGO in reserve
             )
-            bonding_curve_config_json = json.dumps(bonding_curve.to_dict())
-            bonding_curve_state_json = json.dumps(bonding_curve_state.to_dict())
         else:
-            bonding_curve_config_json = None
-            bonding_curve_state_json = None
+            bonding_curve = None
         
         # Store in database
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT INTO tokens (asa_id, creator, token_name, token_symbol, total_supply, 
                               current_price, market_cap, youtube_channel_title, youtube_subscribers,
-                              bonding_curve_config, bonding_curve_state, platform, content_url,
-                              content_id, content_description, content_thumbnail)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                              platform, content_url, content_id, content_description, content_thumbnail)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             asset_id, 
             data.get('creator_address', creator_address),
@@ -1054,17 +896,16 @@ def create_creator_token():
             market_cap,
             data.get('youtube_channel_title', channel_title),
             data.get('youtube_subscribers', subscribers),
-            bonding_curve_config_json,
-            bonding_curve_state_json,
             data.get('platform', 'youtube'),
             data.get('content_url', ''),
             data.get('content_id', ''),
             data.get('description', ''),
             data.get('content_thumbnail', '')
         ))
+        if bonding_curve is not None:
+            save_curve(conn, asset_id, bonding_curve, bonding_curve_state)
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -1081,7 +922,7 @@ def create_creator_token():
                     "title": channel_title,
                     "subscribers": subscribers
                 },
-                "bonding_curve_initialized": bonding_curve_config_json is not None
+                "bonding_curve_initialized": bonding_curve is not None
             }
         })
         
@@ -1094,20 +935,20 @@ def create_creator_token():
         }), 500
 
 @app.route('/create-video-token', methods=['POST'])
+@bumps_data_version
 def create_video_token():
     """Create a video token (ASA)"""
     try:
         data = request.get_json()
         
         # Check YouTube authentication
-        if not youtube_sessions:
+        session_data = get_youtube_session()
+        if not session_data:
             return jsonify({
                 "success": False,
                 "error": "YouTube authentication required. Please connect your YouTube channel first."
             }), 401
         
-        session_key = list(youtube_sessions.keys())[0]
-        session_data = youtube_sessions[session_key]
         
         credentials_data = session_data['credentials']
         credentials = Credentials(
@@ -1155,8 +996,8 @@ def create_video_token():
         dynamic_price = base_price + (engagement_score * 0.001)
         
         # Use the funded creator account
-        private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-        creator_address = account.address_from_private_key(private_key)
+        private_key = chain_context.private_key
+        creator_address = chain_context.address
         
         # Truncate asset name to fit Algorand's 32-character limit
         asset_name = data['token_name'][:32] if len(data['token_name']) > 32 else data['token_name']
@@ -1185,7 +1026,7 @@ def create_video_token():
         market_cap = float(data['total_supply']) * dynamic_price
         
         # Store in database
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1198,7 +1039,6 @@ def create_video_token():
               channel_title, subscribers, data['video_id'], video_title))
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -1243,8 +1083,8 @@ def trade_token():
             }), 400
         
         # Get creator account for token management
-        creator_private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-        creator_address = account.address_from_private_key(creator_private_key)
+        creator_private_key = chain_context.private_key
+        creator_address = chain_context.address
         
         # Convert amount to token units (assuming 6 decimals for the asset)
         requested_amount = float(data['amount'])
@@ -1253,7 +1093,7 @@ def trade_token():
         
         # Check if creator has enough tokens for the trade
         try:
-            account_info = algod_client.account_info(creator_address)
+            account_info = account_cache.get(creator_address)
             assets = account_info.get('assets', [])
             creator_token_balance = 0
             
@@ -1272,7 +1112,7 @@ def trade_token():
             print(f"Warning: Could not check creator balance: {e}")
         
         # Get suggested parameters
-        sp = algod_client.suggested_params()
+        sp = chain_context.suggested_params()
         
         if data['trade_type'] == 'buy':
             # For buying: Creator sends tokens to user (simplified demo)
@@ -1282,17 +1122,12 @@ def trade_token():
                 sp=sp,
                 receiver=trader_address,
                 amt=token_amount,
-                index=int(data['asa_id'])
+                index=int(data['asa_id']),
+                lease=unique_lease()
             )
             
             # Sign and send transaction
             signed_asset = asset_txn.sign(creator_private_key)
-            asset_txid = algod_client.send_transaction(signed_asset)
-            print(f"📤 Asset transfer sent: {asset_txid}")
-            
-            # Wait for confirmation
-            asset_results = transaction.wait_for_confirmation(algod_client, asset_txid, 4)
-            txid = asset_txid
             
         else:
             # For selling: Creator receives tokens from user (simplified demo)
@@ -1302,46 +1137,33 @@ def trade_token():
                 sp=sp,
                 receiver=creator_address,
                 amt=token_amount,
-                index=int(data['asa_id'])
+                index=int(data['asa_id']),
+                lease=unique_lease()
             )
             
             # Sign and send transaction
             signed_asset = asset_txn.sign(creator_private_key)  # Simplified: creator signs for user
-            asset_txid = algod_client.send_transaction(signed_asset)
-            print(f"📤 Asset transfer sent: {asset_txid}")
-            
-            # Wait for confirmation
-            asset_results = transaction.wait_for_confirmation(algod_client, asset_txid, 4)
-            txid = asset_txid
-        
-        # Store trade in database
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO trades (asa_id, trader_address, trade_type, amount, price, transaction_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (int(data['asa_id']), trader_address, data['trade_type'], 
-              float(data['amount']), float(data['price']), txid))
-        
-        conn.commit()
-        conn.close()
-        
-        # Get confirmation round from the asset transaction
-        if data['trade_type'] == 'buy':
-            confirmed_round = asset_results['confirmed-round']
-        else:
-            confirmed_round = asset_results['confirmed-round']
+        # Submit without waiting; the trade is stored once the transfer confirms
+        txid = txn_confirmer.submit(get_db(), signed_asset, 'trade', {
+            'asa_id': int(data['asa_id']),
+            'trader_address': trader_address,
+            'trade_type': data['trade_type'],
+            'amount': float(data['amount']),
+            'price': float(data['price'])
+        })
+        print(f"📤 Asset transfer sent: {txid}")
         
         return jsonify({
             "success": True,
             "data": {
                 "transaction_id": txid,
+                "status": TXN_PENDING,
                 "trade_type": data['trade_type'],
                 "amount": float(data['amount']),
                 "price": float(data['price']),
                 "asa_id": int(data['asa_id']),
-                "confirmed_round": confirmed_round,
+                "confirmed_round": None,
                 "algo_amount": algo_amount / 1000000,  # Convert back to ALGO
                 "token_amount": token_amount / 1000000  # Convert back to tokens
             }
@@ -1355,12 +1177,62 @@ def trade_token():
             "error": str(e)
         }), 500
 
+def record_confirmed_trade(conn, txn):
+    """Store a /trade-token trade once its asset transfer confirms"""
+    if txn['status'] == TXN_CONFIRMED:
+        trade = {**txn['payload'], 'transaction_id': txn['txid']}
+        # The rollups need the trade's ALGO value and fees, which the payload doesn't carry
+        trade['total_value'] = trade['amount'] * trade['price']
+        trade['creator_fee'] = trade['total_value'] * CREATOR_FEE_RATE
+        trade['platform_fee'] = trade['total_value'] * PLATFORM_FEE_RATE
+        record_trade(conn, trade)
+
+register_txn_handler('trade', record_confirmed_trade)
+
+@app.route('/api/tx/<txid>', methods=['GET'])
+def get_transaction_status(txid):
+    """Status of a transaction submitted by the backend"""
+    try:
+        txn = get_txn(get_db(), txid)
+        if txn is None:
+            return jsonify({"success": False, "error": "Transaction not found"}), 404
+        return jsonify({"success": True, "transaction": txn})
+    except Exception as e:
+        logger.error(f"Error fetching transaction status: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/tx/<txid>/events', methods=['GET'])
+def stream_transaction_status(txid):
+    """Server-sent events reporting a transaction's status until it settles"""
+    with db_connection() as conn:
+        if get_txn(conn, txid) is None:
+            return jsonify({"success": False, "error": "Transaction not found"}), 404
+
+    def generate():
+        status = None
+        deadline = time.monotonic() + TX_EVENTS_TIMEOUT
+        while time.monotonic() < deadline:
+            with db_connection() as conn:
+                txn = get_txn(conn, txid)
+            if txn['status'] != status:
+                status = txn['status']
+                yield f"event: status\ndata: {app.json.dumps(txn)}\n\n"
+                if status in (TXN_CONFIRMED, TXN_FAILED):
+                    return
+            else:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": waiting\n\n"
+            txn_confirmer.wait_for_settled(TX_EVENTS_INTERVAL)
+
+    return app.response_class(generate(), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/user-balance/<address>', methods=['GET'])
 def get_user_balance(address):
     """Get user's ALGO and token balances"""
     try:
         # Get account info
-        account_info = algod_client.account_info(address)
+        account_info = account_cache.get(address)
         algo_balance = account_info.get('amount', 0) / 1000000  # Convert to ALGO
         
         # Get token balances
@@ -1393,11 +1265,10 @@ def get_token_info(asa_id):
     """Get comprehensive token information including max tradeable amount"""
     try:
         # Get creator account
-        private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-        creator_address = account.address_from_private_key(private_key)
+        creator_address = chain_context.address
         
         # Get account info
-        account_info = algod_client.account_info(creator_address)
+        account_info = account_cache.get(creator_address)
         assets = account_info.get('assets', [])
         
         # Find the specific asset
@@ -1407,20 +1278,20 @@ def get_token_info(asa_id):
                 token_balance = asset['amount']
                 break
         
-        # Get asset info for total supply
-        try:
-            asset_info = algod_client.asset_info(asa_id)
-            total_supply = asset_info['params']['total']
-            decimals = asset_info['params']['decimals']
-            unit_name = asset_info['params']['unit-name']
-            asset_name = asset_info['params']['name']
-        except:
+        # Total supply and decimals from the asset metadata cache
+        metadata = asset_metadata_cache.get(get_db(), asa_id, algod_client.asset_info)
+        if metadata:
+            total_supply = metadata.total
+            decimals = metadata.decimals
+            unit_name = metadata.unit_name
+            asset_name = metadata.asset_name
+        else:
             total_supply = 0
-            decimals = 6
+            decimals = DEFAULT_DECIMALS
             unit_name = "UNKNOWN"
             asset_name = "Unknown Token"
         
-            return jsonify({
+        return jsonify({
             "success": True,
             "asa_id": asa_id,
             "asset_name": asset_name,
@@ -1435,8 +1306,8 @@ def get_token_info(asa_id):
         })
         
     except Exception as e:
-                return jsonify({
-                    "success": False,
+        return jsonify({
+            "success": False,
             "error": str(e)
         }), 500
 
@@ -1445,11 +1316,10 @@ def get_token_balance(asa_id):
     """Get real-time token balance for a specific ASA"""
     try:
         # Get creator account
-        private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-        creator_address = account.address_from_private_key(private_key)
+        creator_address = chain_context.address
         
         # Get account info
-        account_info = algod_client.account_info(creator_address)
+        account_info = account_cache.get(creator_address)
         assets = account_info.get('assets', [])
         
         # Find the specific asset
@@ -1474,58 +1344,40 @@ def get_token_balance(asa_id):
         }), 500
 
 @app.route('/tokens', methods=['GET'])
+@cached_response()
 def get_tokens():
-    """Get all created tokens"""
+    """
+    List created tokens
+    Query params: limit and cursor (keyset pagination; without either, every
+    token is returned), sort (created_at, market_cap, volume_24h,
+    price_change_24h), order (asc, desc), fields (comma-separated projection),
+    platform, creator, min_market_cap
+    """
     try:
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM tokens ORDER BY created_at DESC
-        ''')
-        
-        # Get column names
-        columns = [description[0] for description in cursor.description]
-        
-        tokens = []
-        for row in cursor.fetchall():
-            token_dict = dict(zip(columns, row))
-            current_price = float(token_dict.get('current_price', 0) or 0)
-            total_supply = float(token_dict.get('total_supply', 0) or 0)
-            # Always calculate real market cap: current_price * total_supply (real-time, not stored value)
-            real_market_cap = current_price * total_supply
-            
-            tokens.append({
-                "asa_id": token_dict.get('asa_id', 0),
-                "creator": token_dict.get('creator', ''),
-                "creator_address": token_dict.get('creator', ''),
-                "token_name": token_dict.get('token_name', ''),
-                "token_symbol": token_dict.get('token_symbol', ''),
-                "total_supply": total_supply,
-                "current_price": current_price,
-                "market_cap": real_market_cap,  # Real market cap
-                "volume_24h": token_dict.get('volume_24h', 0),
-                "holders": token_dict.get('holders', 0),
-                "price_change_24h": token_dict.get('price_change_24h', 0),
-                "created_at": token_dict.get('created_at', ''),
-                "youtube_channel_title": token_dict.get('youtube_channel_title', ''),
-                "youtube_subscribers": token_dict.get('youtube_subscribers', 0),
-                "video_id": token_dict.get('video_id', ''),
-                "video_title": token_dict.get('video_title', ''),
-                "platform": token_dict.get('platform', ''),
-                "content_url": token_dict.get('content_url', ''),
-                "content_id": token_dict.get('content_id', ''),
-                "content_description": token_dict.get('content_description', ''),
-                "content_thumbnail": token_dict.get('content_thumbnail', '')
-            })
-        
-        conn.close()
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        tokens, next_cursor = list_tokens(
+            get_db(),
+            sort=request.args.get('sort', 'created_at'),
+            order=request.args.get('order', 'desc'),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int) if paginated else None,
+            cursor=request.args.get('cursor'),
+            fields=parse_fields(request.args.get('fields')),
+            platform=request.args.get('platform'),
+            creator=request.args.get('creator'),
+            min_market_cap=request.args.get('min_market_cap', type=float)
+        )
         
-        return jsonify({
+        response = {
             "success": True,
             "tokens": tokens
-        })
+        }
+        if paginated:
+            response["next_cursor"] = next_cursor
+            response["count"] = len(tokens)
+        return jsonify(response)
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"❌ Error fetching tokens: {e}")
         traceback.print_exc()
@@ -1542,8 +1394,7 @@ def get_trades(asa_id):
         timeframe = request.args.get('timeframe', '24h')
         limit = int(request.args.get('limit', 100))
         
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
+        conn = get_db()
         
         # Calculate time filter
         if timeframe == '1h':
@@ -1557,98 +1408,62 @@ def get_trades(asa_id):
         else:
             time_filter = "datetime('now', '-1 year')"
         
-        cursor.execute(f'''
-            SELECT trade_type, amount, price, created_at, transaction_id, trader_address
+        trades = select_models(conn, Trade, f'''
+            SELECT {Trade.SELECT}
             FROM trades
             WHERE asa_id = ? AND created_at >= {time_filter}
             ORDER BY created_at DESC
             LIMIT ?
         ''', (asa_id, limit))
         
-        trades = []
-        for row in cursor.fetchall():
-            trades.append({
-                'type': row[0],
-                'amount': row[1],
-                'price': row[2],
-                'timestamp': row[3],
-                'transaction_id': row[4],
-                'trader_address': row[5]
-            })
-        
-        conn.close()
-        
+        # Stream rows straight off the cursor
+        return stream_json_array("trades", (trade.to_dict() for trade in trades), {"success": True})
+    except Exception as e:
+        logger.error(f"Error fetching trades: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/candles/<int:asa_id>', methods=['GET'])
+@handle_errors
+def get_token_candles(asa_id):
+    """
+    OHLCV candles for a token
+    Query params: interval (1m, 5m, 1h, 1d), optional start/end unix seconds and limit
+    """
+    try:
+        interval = request.args.get('interval', '5m')
+        start = request.args.get('start', type=int)
+        end = request.args.get('end', type=int)
+        limit = request.args.get('limit', 500, type=int)
+
+        candles = get_candles(get_db(), asa_id, interval, start, end, limit)
+
         return jsonify({
             "success": True,
-            "trades": trades,
-            "count": len(trades)
+            "asa_id": asa_id,
+            "interval": interval,
+            "candles": candles,
+            "count": len(candles)
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error fetching trades: {e}")
+        logger.error(f"Error fetching candles: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/copy-trading/leaderboard', methods=['GET'])
 @handle_errors
+@cached_response()
 def copy_trading_leaderboard():
     """
-    Aggregate real trading stats per trader_address from trades table.
+    Aggregate real trading stats per trader_address from the trader_stats rollup.
     Returns top traders by realized volume with basic performance metrics.
+    Timeframes cover whole UTC days.
     """
-    conn = sqlite3.connect('creatorvault.db')
-    cursor = conn.cursor()
-
     timeframe = request.args.get('timeframe', '30d')
     limit = int(request.args.get('limit', 20))
 
-    # Time filter
-    if timeframe == '7d':
-        time_filter = "datetime('now', '-7 days')"
-    elif timeframe == '90d':
-        time_filter = "datetime('now', '-90 days')"
-    elif timeframe == 'all':
-        time_filter = "datetime('1970-01-01')"
-    else:
-        time_filter = "datetime('now', '-30 days')"
-
-    cursor.execute(f'''
-        SELECT 
-            trader_address,
-            COUNT(*) as trade_count,
-            SUM(CASE WHEN trade_type = 'buy' THEN total_value ELSE 0 END) as buy_volume,
-            SUM(CASE WHEN trade_type = 'sell' THEN total_value ELSE 0 END) as sell_volume,
-            COUNT(DISTINCT asa_id) as distinct_tokens,
-            MIN(created_at) as first_trade_at,
-            MAX(created_at) as last_trade_at
-        FROM trades
-        WHERE created_at >= {time_filter}
-        GROUP BY trader_address
-        HAVING trade_count > 0
-        ORDER BY sell_volume DESC
-        LIMIT ?
-    ''', (limit,))
-
-    rows = cursor.fetchall()
-    conn.close()
-
-    traders = []
-    for row in rows:
-        trader_address, trade_count, buy_volume, sell_volume, distinct_tokens, first_trade_at, last_trade_at = row
-        buy_volume = buy_volume or 0
-        sell_volume = sell_volume or 0
-        net_pnl = sell_volume - buy_volume
-        roi_pct = (net_pnl / buy_volume * 100) if buy_volume > 0 else 0
-
-        traders.append({
-            "trader_address": trader_address,
-            "trade_count": trade_count,
-            "buy_volume": buy_volume,
-            "sell_volume": sell_volume,
-            "net_pnl": net_pnl,
-            "roi_pct": roi_pct,
-            "distinct_tokens": distinct_tokens,
-            "first_trade_at": first_trade_at,
-            "last_trade_at": last_trade_at
-        })
+    # Reads the per-day trader_stats rollup kept current by the trade hook
+    traders = leaderboard(get_db(), timeframe, limit)
 
     return jsonify({
         "success": True,
@@ -1660,38 +1475,14 @@ def copy_trading_leaderboard():
 @handle_errors
 def copy_trading_trader_pnl(address):
     """
-    Real P&L over time for a trader based on trades table.
-    P&L per day = sells_value - buys_value for that day.
+    Real P&L over time for a trader based on the trader_stats rollup.
+    pnl per day = sells_value - buys_value for that day; realized_pnl is FIFO
+    cost-basis P&L on that day's sells.
     """
     timeframe = request.args.get('timeframe', '30d')
 
-    if timeframe == '7d':
-        time_filter = "datetime('now', '-7 days')"
-    elif timeframe == '90d':
-        time_filter = "datetime('now', '-90 days')"
-    elif timeframe == 'all':
-        time_filter = "datetime('1970-01-01')"
-    else:
-        time_filter = "datetime('now', '-30 days')"
-
-    conn = sqlite3.connect('creatorvault.db')
-    cursor = conn.cursor()
-
-    cursor.execute(f'''
-        SELECT 
-            DATE(created_at) as day,
-            SUM(CASE WHEN trade_type = 'sell' THEN total_value ELSE 0 END) -
-            SUM(CASE WHEN trade_type = 'buy' THEN total_value ELSE 0 END) as pnl
-        FROM trades
-        WHERE trader_address = ? AND created_at >= {time_filter}
-        GROUP BY DATE(created_at)
-        ORDER BY DATE(created_at)
-    ''', (address,))
-
-    rows = cursor.fetchall()
-    conn.close()
-
-    points = [{"day": day, "pnl": pnl or 0} for (day, pnl) in rows]
+    # Read from the per-day trader_stats rollup
+    points = daily_pnl(get_db(), address, timeframe)
 
     return jsonify({
         "success": True,
@@ -1705,159 +1496,36 @@ def copy_trading_trader_analytics(address):
     Comprehensive trader analytics similar to GMGN.AI
     Calculates win rate, P&L distribution, token distribution, etc.
     """
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
 
-    # Get all trades for this trader
-    cursor.execute('''
-        SELECT 
-            t.trade_type,
-            t.amount,
-            t.price,
-            t.total_value,
-            t.created_at,
-            t.transaction_id,
-            t.asa_id,
-            tk.token_name,
-            tk.token_symbol,
-            tk.current_price,
-            tk.market_cap
-        FROM trades t
-        LEFT JOIN tokens tk ON t.asa_id = tk.asa_id
-        WHERE t.trader_address = ?
-        ORDER BY t.created_at DESC
-    ''', (address,))
-
-    all_trades = cursor.fetchall()
-    
-    # Calculate 7D metrics
-    from datetime import datetime, timedelta
-    seven_days_ago = datetime.now() - timedelta(days=7)
-    
-    trades_7d = []
-    for t in all_trades:
-        try:
-            # Handle different datetime formats
-            trade_time_str = t[4]
-            if 'T' in trade_time_str:
-                # ISO format: 2025-11-27T14:08:30 or 2025-11-27T14:08:30.123456
-                trade_time_str = trade_time_str.split('.')[0]  # Remove microseconds
-                if '+' not in trade_time_str and 'Z' not in trade_time_str:
-                    trade_time_str += '+00:00'
-                elif 'Z' in trade_time_str:
-                    trade_time_str = trade_time_str.replace('Z', '+00:00')
-                trade_time = datetime.fromisoformat(trade_time_str)
-            else:
-                # SQLite format: 2025-11-27 14:08:30
-                trade_time = datetime.strptime(trade_time_str, '%Y-%m-%d %H:%M:%S')
-            
-            if trade_time >= seven_days_ago:
-                trades_7d.append(t)
-        except Exception as e:
-            logger.warning(f"Could not parse trade time {t[4]}: {e}")
-            # Include it anyway if we can't parse
-            trades_7d.append(t)
-    
-    # Calculate realized P&L per token
-    token_pnl = {}
-    token_buys = {}
-    token_sells = {}
-    
-    for trade in all_trades:
-        asa_id = trade[6]
-        trade_type = trade[0]
-        total_value = trade[3] or 0
-        
-        if asa_id not in token_pnl:
-            token_pnl[asa_id] = 0
-            token_buys[asa_id] = 0
-            token_sells[asa_id] = 0
-        
-        if trade_type == 'buy':
-            token_buys[asa_id] += total_value
-            token_pnl[asa_id] -= total_value
-        else:  # sell
-            token_sells[asa_id] += total_value
-            token_pnl[asa_id] += total_value
-    
-    # Calculate win rate (tokens with positive P&L)
-    winning_tokens = sum(1 for pnl in token_pnl.values() if pnl > 0)
-    total_tokens_traded = len(token_pnl)
-    win_rate = (winning_tokens / total_tokens_traded * 100) if total_tokens_traded > 0 else 0
-    
-    # 7D metrics
-    buys_7d = sum(t[3] or 0 for t in trades_7d if t[0] == 'buy')
-    sells_7d = sum(t[3] or 0 for t in trades_7d if t[0] == 'sell')
-    sell_count_7d = len([t for t in trades_7d if t[0] == 'sell'])
-    realized_pnl_7d = sells_7d - buys_7d
-    pnl_pct_7d = (realized_pnl_7d / buys_7d * 100) if buys_7d > 0 else 0
-    
-    # Total P&L
-    total_buys = sum(token_buys.values())
-    total_sells = sum(token_sells.values())
-    total_pnl = total_sells - total_buys
-    total_pnl_pct = (total_pnl / total_buys * 100) if total_buys > 0 else 0
-    
-    # Calculate average duration (simplified - time between first buy and last sell per token)
-    token_durations = []
-    for asa_id in token_pnl.keys():
-        token_trades = [t for t in all_trades if t[6] == asa_id]
-        if len(token_trades) >= 2:
-            first_trade = min(token_trades, key=lambda x: x[4])
-            last_trade = max(token_trades, key=lambda x: x[4])
-            try:
-                first_time = datetime.fromisoformat(first_trade[4].replace('Z', '+00:00').split('.')[0])
-                last_time = datetime.fromisoformat(last_trade[4].replace('Z', '+00:00').split('.')[0])
-                duration = (last_time - first_time).total_seconds() / 60  # minutes
-                token_durations.append(duration)
-            except:
-                pass
-    
-    avg_duration_min = sum(token_durations) / len(token_durations) if token_durations else 0
-    
-    # P&L distribution (calculate ROI per token)
-    pnl_distribution = {
-        'gt_500': 0,
-        '200_500': 0,
-        '0_200': 0,
-        'neg_50_0': 0,
-        'lt_neg_50': 0
-    }
-    
-    for asa_id, pnl in token_pnl.items():
-        buy_amount = token_buys.get(asa_id, 0)
-        if buy_amount > 0:
-            roi_pct = (pnl / buy_amount) * 100
-            if roi_pct > 500:
-                pnl_distribution['gt_500'] += 1
-            elif roi_pct >= 200:
-                pnl_distribution['200_500'] += 1
-            elif roi_pct > 0:
-                pnl_distribution['0_200'] += 1
-            elif roi_pct >= -50:
-                pnl_distribution['neg_50_0'] += 1
-            else:
-                pnl_distribution['lt_neg_50'] += 1
+    # Positions and daily rollups, no pass over the trader's trades
+    analytics, token_activity = compute_trader_analytics(conn, address)
     
     # Get actual holdings from Algorand blockchain
     holdings = []
     unrealized_total = 0
     try:
-        account_info = algod_client.account_info(address)
-        assets = account_info.get('assets', [])
-        
-        # Get token info from database
-        cursor.execute('SELECT asa_id, token_name, token_symbol, current_price, market_cap FROM tokens')
-        token_info_map = {row[0]: row for row in cursor.fetchall()}
+        account_info = account_cache.get(address)
+        assets = [asset for asset in account_info.get('assets', []) if asset['amount'] > 0]
+        
+        # Get token info from database for the held assets only
+        token_info_map = {}
+        if assets:
+            placeholders = ','.join('?' * len(assets))
+            cursor.execute(f'''
+                SELECT asa_id, token_name, token_symbol, current_price, market_cap
+                FROM tokens WHERE asa_id IN ({placeholders})
+            ''', [asset['asset-id'] for asset in assets])
+            token_info_map = {row[0]: row for row in cursor.fetchall()}
+        
+        # Decimals from the asset metadata cache; only never-seen assets go to algod
+        metadata = asset_metadata_cache.get_many(conn, [asset['asset-id'] for asset in assets],
+                                                 algod_client.asset_info)
         
         for asset in assets:
             asa_id = asset['asset-id']
-            # Get decimals from asset info or default to 6
-            try:
-                asset_info = algod_client.asset_info(asa_id)
-                decimals = asset_info['params'].get('decimals', 6)
-            except:
-                decimals = 6
+            decimals = metadata[asa_id].decimals if asa_id in metadata else DEFAULT_DECIMALS
             balance = asset['amount'] / (10 ** decimals)  # Convert to token units
             
             if balance > 0:
@@ -1877,23 +1545,12 @@ def copy_trading_trader_analytics(address):
                 
                 total_value = balance * current_price
                 
-                # Calculate average buy price for this token
-                token_buy_trades = [t for t in all_trades if t[6] == asa_id and t[0] == 'buy']
-                if token_buy_trades and len(token_buy_trades) > 0:
-                    total_buy_value = sum(t[3] or 0 for t in token_buy_trades)
-                    total_buy_amount = sum(t[1] for t in token_buy_trades)
-                    if total_buy_amount > 0 and current_price > 0:
-                        avg_buy_price = total_buy_value / total_buy_amount
-                        # Only calculate if we have valid prices
-                        if avg_buy_price > 0 and current_price > 0:
-                            unrealized_pnl = (current_price - avg_buy_price) * balance
-                            unrealized_total += unrealized_pnl
-                        else:
-                            unrealized_pnl = 0
-                    else:
-                        unrealized_pnl = 0
-                else:
-                    unrealized_pnl = 0
+                # Unrealized P&L against the FIFO cost of the tokens still held
+                unrealized_pnl = 0
+                activity = token_activity.get(asa_id)
+                if activity and activity.unit_cost > 0 and current_price > 0:
+                    unrealized_pnl = (current_price - activity.unit_cost) * balance
+                    unrealized_total += unrealized_pnl
                 
                 holdings.append({
                     "asa_id": asa_id,
@@ -1907,46 +1564,27 @@ def copy_trading_trader_analytics(address):
                 })
     except Exception as e:
         logger.warning(f"Could not fetch on-chain holdings for {address}: {e}")
-        # Fallback to trade-based calculation
-        for asa_id, pnl in token_pnl.items():
-            if token_buys.get(asa_id, 0) > token_sells.get(asa_id, 0):
-                token_info = next((t for t in all_trades if t[6] == asa_id), None)
-                if token_info:
-                    holdings.append({
-                        "asa_id": asa_id,
-                        "token_name": token_info[7] or f"Token {asa_id}",
-                        "token_symbol": token_info[8] or f"ASA{asa_id}",
-                        "current_price": token_info[9] or 0,
-                        "market_cap": token_info[10] or 0,
-                        "amount": (token_buys.get(asa_id, 0) - token_sells.get(asa_id, 0)) / (token_info[9] or 1),
-                        "total_value": token_buys.get(asa_id, 0) - token_sells.get(asa_id, 0),
-                        "unrealized_pnl": 0
-                    })
+        # Fallback to the position ledger
+        for asa_id, activity in token_activity.items():
+            if activity.quantity > POSITION_DUST:
+                unrealized_total += activity.unrealized_pnl
+                holdings.append({
+                    "asa_id": asa_id,
+                    "token_name": activity.token_name or f"Token {asa_id}",
+                    "token_symbol": activity.token_symbol or f"ASA{asa_id}",
+                    "current_price": activity.current_price or 0,
+                    "market_cap": activity.market_cap or 0,
+                    "amount": activity.quantity,
+                    "total_value": activity.quantity * (activity.current_price or 0),
+                    "unrealized_pnl": activity.unrealized_pnl
+                })
     
-    conn.close()
+    analytics["unrealized_profits"] = unrealized_total
+    analytics["holdings"] = holdings[:20]  # Top 20 holdings
     
     return jsonify({
         "success": True,
-        "analytics": {
-            "realized_pnl_7d": realized_pnl_7d,
-            "realized_pnl_7d_pct": pnl_pct_7d,
-            "win_rate": win_rate,
-            "total_pnl": total_pnl,
-            "total_pnl_pct": total_pnl_pct,
-            "unrealized_profits": unrealized_total,
-            "trades_7d": len(trades_7d),
-            "tokens_traded_7d": len(set(t[6] for t in trades_7d)),
-            "avg_duration_min": avg_duration_min,
-            "total_cost_7d": buys_7d,
-            "avg_cost": buys_7d / len(trades_7d) if trades_7d and len(trades_7d) > 0 else 0,
-            "avg_sold": sells_7d / sell_count_7d if sell_count_7d > 0 else 0,
-            "avg_realized_profits": realized_pnl_7d / sell_count_7d if sell_count_7d > 0 else 0,
-            "fees_7d": sum(t[3] or 0 for t in trades_7d) * 0.02,  # 2% platform fee estimate
-            "volume_7d": buys_7d + sells_7d,
-            "total_tokens_traded": total_tokens_traded,
-            "pnl_distribution": pnl_distribution,
-            "holdings": holdings[:20]  # Top 20 holdings
-        }
+        "analytics": analytics
     })
 
 @app.route('/api/copy-trading/trader/<address>/trades', methods=['GET'])
@@ -1958,20 +1596,9 @@ def copy_trading_trader_trades(address):
     """
     limit = int(request.args.get('limit', 100))
 
-    conn = sqlite3.connect('creatorvault.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT 
-            t.trade_type,
-            t.amount,
-            t.price,
-            t.total_value,
-            t.created_at,
-            t.transaction_id,
-            t.asa_id,
-            tk.token_name,
-            tk.token_symbol
+    conn = get_db()
+    trades = select_models(conn, TraderTrade, f'''
+        SELECT {TraderTrade.SELECT}
         FROM trades t
         LEFT JOIN tokens tk ON t.asa_id = tk.asa_id
         WHERE t.trader_address = ?
@@ -1979,71 +1606,40 @@ def copy_trading_trader_trades(address):
         LIMIT ?
     ''', (address, limit))
 
-    rows = cursor.fetchall()
-    conn.close()
-
-    trades = []
-    for row in rows:
-        trades.append({
-            "trade_type": row[0],
-            "amount": row[1],
-            "price": row[2],
-            "total_value": row[3],
-            "created_at": row[4],
-            "transaction_id": row[5],
-            "asa_id": row[6],
-            "token_name": row[7],
-            "token_symbol": row[8],
-        })
-
-    return jsonify({
-        "success": True,
-        "trades": trades,
-        "count": len(trades)
-    })
+    # Stream rows straight off the cursor
+    return stream_json_array("trades", (trade.to_dict() for trade in trades), {"success": True})
 
 @app.route('/api/portfolio/<address>', methods=['GET'])
 @handle_errors
 def get_portfolio(address):
     """
-    Aggregate real holdings per token for a wallet based on trades.
-    This is a simple on-chain-like portfolio view using our trades ledger.
+    Real holdings per token for a wallet from the position ledger.
+    This is a simple on-chain-like portfolio view with FIFO and average cost basis.
     """
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
 
-    # Sum net token amounts per ASA (buys - sells)
-    cursor.execute('''
-        SELECT 
-            t.asa_id,
-            tk.token_name,
-            tk.token_symbol,
-            tk.current_price,
-            SUM(CASE WHEN t.trade_type = 'buy' THEN t.amount ELSE -t.amount END) as net_amount
-        FROM trades t
-        LEFT JOIN tokens tk ON t.asa_id = tk.asa_id
-        WHERE t.trader_address = ?
-        GROUP BY t.asa_id
-        HAVING net_amount > 0
-    ''', (address,))
-
-    rows = cursor.fetchall()
-    conn.close()
+    # Open positions from the cost-basis ledger
+    cursor.execute(PORTFOLIO_SQL, (address, POSITION_DUST))
 
     holdings = []
     total_value = 0
-    for row in rows:
-        asa_id, token_name, token_symbol, current_price, net_amount = row
+    for row in cursor.fetchall():
+        asa_id, token_name, token_symbol, current_price, quantity, cost_basis, avg_cost_basis, realized_pnl = row
         current_price = current_price or 0
-        value = (net_amount or 0) * current_price
+        value = quantity * current_price
         total_value += value
         holdings.append({
             "asa_id": asa_id,
             "token_name": token_name,
             "token_symbol": token_symbol,
             "current_price": current_price,
-            "balance": net_amount or 0,
-            "value": value
+            "balance": quantity,
+            "value": value,
+            "cost_basis": cost_basis,
+            "avg_cost_basis": avg_cost_basis,
+            "unrealized_pnl": value - cost_basis if current_price > 0 else 0,
+            "realized_pnl": realized_pnl
         })
 
     return jsonify({
@@ -2060,7 +1656,7 @@ def copy_trading_profiles():
     POST: create/update profile
     GET: list profiles for follower or leader
     """
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     if request.method == 'POST':
@@ -2082,7 +1678,6 @@ def copy_trading_profiles():
         ''', (leader, follower, allocation, max_single_trade_algo, copy_type, risk_level))
 
         conn.commit()
-        conn.close()
 
         return jsonify({"success": True})
 
@@ -2101,7 +1696,6 @@ def copy_trading_profiles():
 
     cursor.execute(query, tuple(params))
     rows = cursor.fetchall()
-    conn.close()
 
     profiles = []
     for row in rows:
@@ -2128,7 +1722,7 @@ def bot_strategies():
     Store and list engagement-based bot strategies.
     Execution is not automatic; these are configs only.
     """
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
 
     if request.method == 'POST':
@@ -2150,7 +1744,6 @@ def bot_strategies():
         ''', (owner_address, label, token_symbol, metric_type, condition, action))
 
         conn.commit()
-        conn.close()
 
         return jsonify({"success": True})
 
@@ -2164,7 +1757,6 @@ def bot_strategies():
     ''', (owner_address, owner_address))
 
     rows = cursor.fetchall()
-    conn.close()
 
     strategies = []
     for row in rows:
@@ -2190,7 +1782,7 @@ def bot_strategies():
 @handle_errors
 def get_strategy_executions(strategy_id):
     """Get all trades executed by a strategy"""
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -2214,7 +1806,6 @@ def get_strategy_executions(strategy_id):
     ''', (strategy_id,))
     
     rows = cursor.fetchall()
-    conn.close()
     
     executions = []
     total_pnl = 0
@@ -2257,7 +1848,7 @@ def execute_strategy(strategy_id):
     if not all([trader_address, asa_id, trade_type, amount, price, total_value]):
         return jsonify({"success": False, "error": "Missing required fields"}), 400
     
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     # Record the execution
@@ -2268,7 +1859,6 @@ def execute_strategy(strategy_id):
     ''', (strategy_id, trader_address, asa_id, trade_type, amount, price, total_value))
     
     conn.commit()
-    conn.close()
     
     return jsonify({
         "success": True,
@@ -2288,14 +1878,13 @@ def generate_referral_code():
     import secrets
     import string
     
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     # Check if user already has a code
     cursor.execute('SELECT referral_code FROM referrals WHERE referrer_address = ? AND referrer_address = referred_address LIMIT 1', (referrer_address,))
     existing = cursor.fetchone()
     if existing:
-        conn.close()
         return jsonify({
             "success": True,
             "referral_code": existing[0]
@@ -2317,7 +1906,6 @@ def generate_referral_code():
     ''', (referrer_address, referrer_address, code))
     
     conn.commit()
-    conn.close()
     
     return jsonify({
         "success": True,
@@ -2335,13 +1923,12 @@ def register_referral():
     if not referral_code or not referred_address:
         return jsonify({"success": False, "error": "referral_code and referred_address are required"}), 400
     
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     # Check if already referred
     cursor.execute('SELECT id FROM referrals WHERE referred_address = ?', (referred_address,))
     if cursor.fetchone():
-        conn.close()
         return jsonify({"success": False, "error": "Address already has a referrer"}), 400
     
     # Find referrer by code (look for someone who has this code as their own)
@@ -2349,14 +1936,12 @@ def register_referral():
     referrer_row = cursor.fetchone()
     
     if not referrer_row:
-        conn.close()
         return jsonify({"success": False, "error": "Invalid referral code"}), 400
     
     referrer_address = referrer_row[0]
     
     # Don't allow self-referral
     if referrer_address == referred_address:
-        conn.close()
         return jsonify({"success": False, "error": "Cannot refer yourself"}), 400
     
     # Register the referral
@@ -2366,7 +1951,6 @@ def register_referral():
     ''', (referrer_address, referred_address, referral_code))
     
     conn.commit()
-    conn.close()
     
     return jsonify({
         "success": True,
@@ -2378,7 +1962,7 @@ def register_referral():
 @handle_errors
 def get_referral_earnings(address):
     """Get referral earnings for a referrer"""
-    conn = sqlite3.connect('creatorvault.db')
+    conn = get_db()
     cursor = conn.cursor()
     
     # Get total earnings from referral_earnings table (more accurate)
@@ -2478,7 +2062,6 @@ def get_referral_earnings(address):
                 "joined_at": row[4]
             })
     
-    conn.close()
     
     return jsonify({
         "success": True,
@@ -2493,10 +2076,11 @@ def get_referral_earnings(address):
 
 @app.route('/api/token/<int:asa_id>', methods=['GET'])
 @handle_errors
+@cached_response()
 def get_token_details(asa_id):
     """Get detailed token information including bonding curve state"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM tokens WHERE asa_id = ?', (asa_id,))
@@ -2509,25 +2093,18 @@ def get_token_details(asa_id):
         columns = [description[0] for description in cursor.description]
         token_dict = dict(zip(columns, row))
         
-        # Parse bonding curve if available
+        # Rebuild bonding curve from the typed columns if available
         bonding_curve_config = None
         bonding_curve_state = None
-        if token_dict.get('bonding_curve_config'):
-            try:
-                bonding_curve_config = json.loads(token_dict['bonding_curve_config'])
-            except:
-                pass
-        if token_dict.get('bonding_curve_state'):
-            try:
-                bonding_curve_state = json.loads(token_dict['bonding_curve_state'])
-            except:
-                pass
+        curve_values = tuple(token_dict.pop(column) for column in CURVE_COLUMNS)
+        if BondingCurve is not None and curve_values[0] is not None:
+            bonding_curve_config = BondingCurve.from_row(curve_values[:len(BondingCurve.COLUMNS)]).to_dict()
+            bonding_curve_state = BondingCurveState.from_row(curve_values[len(BondingCurve.COLUMNS):]).to_dict()
         
         # Get recent trades count
         cursor.execute('SELECT COUNT(*) FROM trades WHERE asa_id = ?', (asa_id,))
         trade_count = cursor.fetchone()[0]
         
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -2547,7 +2124,7 @@ def get_token_details(asa_id):
 def get_user_tokens(address):
     """Get all tokens created by a specific wallet address"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2577,7 +2154,6 @@ def get_user_tokens(address):
                 "youtube_channel_title": token_dict.get('youtube_channel_title', '')
             })
         
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -2592,34 +2168,13 @@ def get_user_tokens(address):
 def get_creator_earnings(address):
     """Get total earnings for a creator from trading fees"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-
-        # Get all tokens created by this address
-        cursor.execute('SELECT asa_id, token_name, token_symbol FROM tokens WHERE creator = ?', (address,))
-        creator_tokens = cursor.fetchall()
-        
-        total_earnings = 0
-        earnings_by_token = []
-
-        for asa_id, token_name, token_symbol in creator_tokens:
-            # Sum creator fees for this token
-            cursor.execute('SELECT SUM(creator_fee) FROM trades WHERE asa_id = ?', (asa_id,))
-            token_fee_sum = cursor.fetchone()[0] or 0
-            total_earnings += token_fee_sum
-            earnings_by_token.append({
-                "asa_id": asa_id,
-                "token_name": token_name,
-                "token_symbol": token_symbol,
-                "earned_algo": token_fee_sum
-            })
-        
-        conn.close()
+        # Running per-token fee totals, one indexed query
+        earnings = creator_earnings(get_db(), address)
 
         return jsonify({
             "success": True,
-            "total_earnings": total_earnings,
-            "earnings_by_token": earnings_by_token,
+            "total_earnings": earnings["total_earnings"],
+            "earnings_by_token": earnings["earnings_by_token"],
             "creator_fee_rate": 0.05,  # 5%
             "platform_fee_rate": 0.02  # 2%
         })
@@ -2627,6 +2182,98 @@ def get_creator_earnings(address):
         logger.error(f"Error fetching creator earnings: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/creator-earnings/<address>/history', methods=['GET'])
+@handle_errors
+def get_creator_earnings_history(address):
+    """
+    Creator fee earnings over time for dashboards
+    Query params: bucket (day, week, month), timeframe (7d, 30d, 90d, all), optional asa_id
+    """
+    try:
+        bucket = request.args.get('bucket', 'day')
+        timeframe = request.args.get('timeframe', '30d')
+        asa_id = request.args.get('asa_id', type=int)
+
+        conn = get_db()
+        history = earnings_history(conn, address, bucket, timeframe, asa_id)
+
+        return jsonify({
+            "success": True,
+            "bucket": bucket,
+            "history": history,
+            **creator_totals(conn, address)
+        })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error fetching creator earnings history: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def transfer_purchased_tokens(creator_address, trader_address, asa_id, token_amount):
+    """
+    Send bought tokens from the creator wallet to the buyer
+    
+    Only works if the token creator is the backend wallet. For user-created
+    tokens, the creator needs to manually transfer or use a smart contract.
+    Returns the transfer txid, or None if nothing was sent.
+    """
+    if not creator_address:
+        return None
+    try:
+        creator_wallet_address = chain_context.address
+        
+        # Only transfer if creator wallet matches token creator
+        if creator_wallet_address != creator_address:
+            logger.warning(f"⚠️ Token creator ({creator_address}) doesn't match backend wallet ({creator_wallet_address}). Creator must manually transfer tokens or use smart contract.")
+            return None
+        
+        # Asset transfers are in base units
+        metadata = asset_metadata_cache.get(get_db(), asa_id, algod_client.asset_info)
+        decimals = metadata.decimals if metadata else DEFAULT_DECIMALS
+        base_units = round(token_amount * 10 ** decimals)
+
+        # Grouped with other buys' transfers arriving in the same short window
+        txid = transfer_batcher.enqueue(asa_id, trader_address, base_units).result(TRANSFER_SUBMIT_TIMEOUT)
+        logger.info(f"✅ Token transfer sent: {txid} (ASA {asa_id}, {token_amount} tokens to {trader_address})")
+        return txid
+    except Exception as e:
+        logger.error(f"Error transferring tokens: {e}")
+        # Continue even if transfer fails - user already paid ALGO
+        return None
+
+def parse_max_slippage(data):
+    """Read the optional max_slippage_percent field as a fraction"""
+    max_slippage = data.get('max_slippage_percent')
+    return float(max_slippage) / 100 if max_slippage is not None else None
+
+def run_bonding_curve_trade(trade_type):
+    """Validate a buy/sell request and execute it on the bonding curve"""
+    data = request.get_json()
+    asa_id = data.get('asa_id')
+    token_amount = float(data.get('token_amount', 0))
+    trader_address = data.get('trader_address')
+    
+    # Buys can name the ALGO to spend instead of the token amount
+    algo_amount = None
+    if trade_type == 'buy' and data.get('input_mode', 'tokens') == 'algo':
+        algo_amount = float(data.get('algo_amount', 0))
+        token_amount = None
+    
+    if not asa_id or not (token_amount or algo_amount) or not trader_address:
+        return None, (jsonify({"success": False, "error": "Missing required fields"}), 400)
+    
+    try:
+        trade = execute_trade(get_db(), asa_id, trade_type, trader_address, token_amount,
+                              data.get('transaction_id', ''), algo_amount=algo_amount,
+                              max_slippage=parse_max_slippage(data))
+    except TokenNotFound as e:
+        return None, (jsonify({"success": False, "error": str(e)}), 404)
+    except TradeConflict as e:
+        return None, (jsonify({"success": False, "error": str(e)}), 409)
+    except ValueError as e:
+        return None, (jsonify({"success": False, "error": str(e)}), 400)
+    return trade, None
+
 @app.route('/api/bonding-curve/buy', methods=['POST'])
 @handle_errors
 def bonding_curve_buy():
@@ -2635,119 +2282,20 @@ def bonding_curve_buy():
         return jsonify({"success": False, "error": "Bonding curve not available"}), 500
     
     try:
-        data = request.get_json()
-        asa_id = data.get('asa_id')
-        token_amount = float(data.get('token_amount', 0))
-        trader_address = data.get('trader_address')
-        
-        if not asa_id or not token_amount or not trader_address:
-            return jsonify({"success": False, "error": "Missing required fields"}), 400
-        
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT bonding_curve_config, bonding_curve_state, current_price FROM tokens WHERE asa_id = ?', (asa_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            return jsonify({"success": False, "error": "Token not found"}), 404
-        
-        bonding_curve_config_json, bonding_curve_state_json, current_price = row
-        
-        if not bonding_curve_config_json or not bonding_curve_state_json:
-            return jsonify({"success": False, "error": "Bonding curve not initialized"}), 400
-        
-        curve = BondingCurve.from_dict(json.loads(bonding_curve_config_json))
-        state = BondingCurveState.from_dict(json.loads(bonding_curve_state_json))
-        
-        result = curve.calculate_buy_price(state.token_supply, state.algo_reserve, token_amount)
-        new_state = BondingCurveState(token_supply=result['new_supply'], algo_reserve=result['new_algo_reserve'])
-        
-        # Calculate trading fees (5% creator fee, 2% platform fee)
-        CREATOR_FEE_RATE = 0.05  # 5%
-        PLATFORM_FEE_RATE = 0.02  # 2%
-        REFERRAL_FEE_RATE = 0.0001  # 0.01%
-        total_value = result['algo_cost']
-        creator_fee = total_value * CREATOR_FEE_RATE
-        platform_fee = total_value * PLATFORM_FEE_RATE
-        
-        # Check for referral and calculate referral earnings
-        referral_earnings = 0
-        referral_code = None
-        cursor.execute('SELECT referrer_address, referral_code FROM referrals WHERE referred_address = ?', (trader_address,))
-        referral_row = cursor.fetchone()
-        if referral_row:
-            referrer_address, referral_code = referral_row
-            referral_earnings = total_value * REFERRAL_FEE_RATE
-            # Update referral stats
-            cursor.execute('''
-                UPDATE referrals 
-                SET total_earnings = total_earnings + ?,
-                    total_trades_count = total_trades_count + 1,
-                    total_volume = total_volume + ?
-                WHERE referred_address = ?
-            ''', (referral_earnings, total_value, trader_address))
-        
-        # Get creator address from token
-        cursor.execute('SELECT creator FROM tokens WHERE asa_id = ?', (asa_id,))
-        creator_row = cursor.fetchone()
-        creator_address = creator_row[0] if creator_row else None
-        
-        # Transfer tokens from creator to buyer
-        # NOTE: This only works if the token creator is the backend wallet
-        # For user-created tokens, the creator needs to manually transfer or use a smart contract
-        token_transfer_txid = None
-        if creator_address:
-            try:
-                # Use creator's private key to transfer tokens
-                creator_private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-                creator_wallet_address = account.address_from_private_key(creator_private_key)
-                
-                # Only transfer if creator wallet matches token creator
-                if creator_wallet_address == creator_address:
-                    sp = algod_client.suggested_params()
-                    # Convert token amount to integer (no decimals)
-                    token_amount_int = int(token_amount)
-                    
-                    # Create asset transfer transaction
-                    asset_txn = transaction.AssetTransferTxn(
-                        sender=creator_address,
-                        sp=sp,
-                        receiver=trader_address,
-                        amt=token_amount_int,
-                        index=int(asa_id)
-                    )
-                    
-                    # Sign and send
-                    signed_asset = asset_txn.sign(creator_private_key)
-                    token_transfer_txid = algod_client.send_transaction(signed_asset)
-                    logger.info(f"✅ Token transfer sent: {token_transfer_txid} (ASA {asa_id}, {token_amount_int} tokens to {trader_address})")
-                else:
-                    logger.warning(f"⚠️ Token creator ({creator_address}) doesn't match backend wallet ({creator_wallet_address}). Creator must manually transfer tokens or use smart contract.")
-            except Exception as e:
-                logger.error(f"Error transferring tokens: {e}")
-                # Continue even if transfer fails - user already paid ALGO
-        
-        cursor.execute('UPDATE tokens SET bonding_curve_state = ?, current_price = ?, market_cap = ? WHERE asa_id = ?',
-                      (json.dumps(new_state.to_dict()), result['new_price'], result['new_supply'] * result['new_price'], asa_id))
-        cursor.execute('INSERT INTO trades (asa_id, trader_address, trade_type, amount, price, transaction_id, creator_fee, platform_fee, total_value, referral_code, referral_earnings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                      (asa_id, trader_address, 'buy', token_amount, result['new_price'], data.get('transaction_id', ''), creator_fee, platform_fee, total_value, referral_code, referral_earnings))
-        
-        # Record referral earnings if applicable
-        if referral_row and referral_earnings > 0:
-            trade_id = cursor.lastrowid
-            cursor.execute('''
-                INSERT INTO referral_earnings (referrer_address, referred_address, trade_id, earnings, trade_value)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (referrer_address, trader_address, trade_id, referral_earnings, total_value))
+        trade, error = run_bonding_curve_trade('buy')
+        if error:
+            return error
         
-        conn.commit()
-        conn.close()
+        # The trade is committed; the on-chain transfer runs outside the database transaction
+        token_transfer_txid = transfer_purchased_tokens(trade['creator'], trade['trader_address'],
+                                                        trade['asa_id'], trade['amount'])
         
+        result = trade['result']
+        current_price = trade['previous_price']
         return jsonify({
             "success": True,
             "algo_cost": result['algo_cost'],
-            "token_amount": token_amount,
+            "token_amount": trade['amount'],
             "new_price": result['new_price'],
             "price_impact": ((result['new_price'] - current_price) / current_price) * 100 if current_price > 0 else 0,
             "token_transfer_txid": token_transfer_txid
@@ -2764,78 +2312,16 @@ def bonding_curve_sell():
         return jsonify({"success": False, "error": "Bonding curve not available"}), 500
     
     try:
-        data = request.get_json()
-        asa_id = data.get('asa_id')
-        token_amount = float(data.get('token_amount', 0))
-        trader_address = data.get('trader_address')
-        
-        if not asa_id or not token_amount or not trader_address:
-            return jsonify({"success": False, "error": "Missing required fields"}), 400
-        
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT bonding_curve_config, bonding_curve_state, current_price FROM tokens WHERE asa_id = ?', (asa_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            return jsonify({"success": False, "error": "Token not found"}), 404
-        
-        bonding_curve_config_json, bonding_curve_state_json, current_price = row
-        
-        if not bonding_curve_config_json or not bonding_curve_state_json:
-            return jsonify({"success": False, "error": "Bonding curve not initialized"}), 400
-        
-        curve = BondingCurve.from_dict(json.loads(bonding_curve_config_json))
-        state = BondingCurveState.from_dict(json.loads(bonding_curve_state_json))
-        
-        result = curve.calculate_sell_price(state.token_supply, state.algo_reserve, token_amount)
-        new_state = BondingCurveState(token_supply=result['new_supply'], algo_reserve=result['new_algo_reserve'])
-        
-        # Calculate trading fees (5% creator fee, 2% platform fee)
-        CREATOR_FEE_RATE = 0.05  # 5%
-        PLATFORM_FEE_RATE = 0.02  # 2%
-        total_value = result['algo_received']
-        creator_fee = total_value * CREATOR_FEE_RATE
-        platform_fee = total_value * PLATFORM_FEE_RATE
-        
-        # Check for referral and calculate referral earnings
-        referral_earnings = 0
-        referral_code = None
-        cursor.execute('SELECT referrer_address, referral_code FROM referrals WHERE referred_address = ?', (trader_address,))
-        referral_row = cursor.fetchone()
-        if referral_row:
-            referrer_address, referral_code = referral_row
-            REFERRAL_FEE_RATE = 0.0001  # 0.01%
-            referral_earnings = total_value * REFERRAL_FEE_RATE
-            cursor.execute('''
-                UPDATE referrals 
-                SET total_earnings = total_earnings + ?,
-                    total_trades_count = total_trades_count + 1,
-                    total_volume = total_volume + ?
-                WHERE referred_address = ?
-            ''', (referral_earnings, total_value, trader_address))
-        
-        cursor.execute('UPDATE tokens SET bonding_curve_state = ?, current_price = ?, market_cap = ? WHERE asa_id = ?',
-                      (json.dumps(new_state.to_dict()), result['new_price'], result['new_supply'] * result['new_price'], asa_id))
-        cursor.execute('INSERT INTO trades (asa_id, trader_address, trade_type, amount, price, transaction_id, creator_fee, platform_fee, total_value, referral_code, referral_earnings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                      (asa_id, trader_address, 'sell', token_amount, result['new_price'], data.get('transaction_id', ''), creator_fee, platform_fee, total_value, referral_code, referral_earnings))
-        
-        # Record referral earnings if applicable
-        if referral_row and referral_earnings > 0:
-            trade_id = cursor.lastrowid
-            cursor.execute('''
-                INSERT INTO referral_earnings (referrer_address, referred_address, trade_id, earnings, trade_value)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (referrer_address, trader_address, trade_id, referral_earnings, total_value))
-        
-        conn.commit()
-        conn.close()
+        trade, error = run_bonding_curve_trade('sell')
+        if error:
+            return error
         
+        result = trade['result']
+        current_price = trade['previous_price']
         return jsonify({
             "success": True,
             "algo_received": result['algo_received'],
-            "token_amount": token_amount,
+            "token_amount": trade['amount'],
             "new_price": result['new_price'],
             "price_impact": ((current_price - result['new_price']) / current_price) * 100 if current_price > 0 else 0
         })
@@ -2855,79 +2341,141 @@ def bonding_curve_estimate():
         asa_id = data.get('asa_id')
         token_amount = float(data.get('token_amount', 0))
         trade_type = data.get('trade_type', 'buy')
+        input_mode = data.get('input_mode', 'tokens')
         
         if not asa_id:
             return jsonify({"success": False, "error": "Missing asa_id"}), 400
+        if input_mode not in ('tokens', 'algo'):
+            return jsonify({"success": False, "error": "input_mode must be 'tokens' or 'algo'"}), 400
         
-        conn = sqlite3.connect('creatorvault.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT bonding_curve_config, bonding_curve_state, current_price, total_supply FROM tokens WHERE asa_id = ?', (asa_id,))
-        row = cursor.fetchone()
+        record = curve_cache.get(asa_id, get_db)
         
-        if not row:
-            conn.close()
+        if record is None:
             return jsonify({"success": False, "error": "Token not found"}), 404
         
-        bonding_curve_config_json, bonding_curve_state_json, current_price, total_supply = row
+        current_price = record.current_price
+        curve, state = record.curve, record.state
         
-        # Initialize bonding curve if missing or empty
-        if (not bonding_curve_config_json or not bonding_curve_state_json or 
-            (isinstance(bonding_curve_config_json, str) and bonding_curve_config_json.strip() == '') or
-            (isinstance(bonding_curve_state_json, str) and bonding_curve_state_json.strip() == '')):
+        # Initialize bonding curve if missing
+        if curve is None:
             logger.warning(f"Bonding curve not initialized for token {asa_id}, initializing now...")
-            initial_price = current_price if current_price and current_price > 0 else 0.001
-            bonding_curve = BondingCurve(
+            initial_price = current_price if current_price > 0 else 0.001
+            curve = BondingCurve(
                 initial_price=initial_price,
-                initial_supply=int(total_supply) if total_supply else 1000000
+                initial_supply=int(record.total_supply) if record.total_supply else 1000000
             )
-            bonding_curve_state = BondingCurveState(
+            state = BondingCurveState(
                 token_supply=0,
                 algo_reserve=0
             )
-            bonding_curve_config_json = json.dumps(bonding_curve.to_dict())
-            bonding_curve_state_json = json.dumps(bonding_curve_state.to_dict())
-            
-            # Update database
-            cursor.execute('''
-                UPDATE tokens 
-                SET bonding_curve_config = ?, bonding_curve_state = ?
-                WHERE asa_id = ?
-            ''', (bonding_curve_config_json, bonding_curve_state_json, asa_id))
+            conn = get_db()
+            save_curve(conn, asa_id, curve, state)
+            bump_data_version(conn)
             conn.commit()
+            curve_cache.store_curve(asa_id, curve, state)
             logger.info(f"✅ Initialized bonding curve for token {asa_id}")
         
-        curve = BondingCurve.from_dict(json.loads(bonding_curve_config_json))
-        state = BondingCurveState.from_dict(json.loads(bonding_curve_state_json))
+        # In 'algo' mode the client names the ALGO amount and gets the token amount back
+        if input_mode == 'algo':
+            algo_amount = float(data.get('algo_amount', 0))
+            if trade_type == 'buy':
+                result = curve.max_tokens_for_budget(state.token_supply, state.algo_reserve, algo_amount,
+                                                     parse_max_slippage(data))
+            else:
+                result = curve.calculate_tokens_to_sell_for_algo(state.token_supply, state.algo_reserve, algo_amount)
+        elif trade_type == 'buy':
+            result = curve.calculate_buy_price(state.token_supply, state.algo_reserve, token_amount)
+        else:
+            result = curve.calculate_sell_price(state.token_supply, state.algo_reserve, token_amount)
         
         if trade_type == 'buy':
-            result = curve.calculate_buy_price(state.token_supply, state.algo_reserve, token_amount)
-            return jsonify({
+            response = {
                 "success": True,
                 "algo_cost": result['algo_cost'],
                 "new_price": result['new_price'],
                 "price_impact": ((result['new_price'] - current_price) / current_price) * 100 if current_price > 0 else 0
-            })
+            }
         else:
-            result = curve.calculate_sell_price(state.token_supply, state.algo_reserve, token_amount)
-            return jsonify({
+            response = {
                 "success": True,
                 "algo_received": result['algo_received'],
                 "new_price": result['new_price'],
                 "price_impact": ((current_price - result['new_price']) / current_price) * 100 if current_price > 0 else 0
-            })
+            }
+        if input_mode == 'algo':
+            response["token_amount"] = result['token_amount']
+            if 'limited_by' in result:
+                response["limited_by"] = result['limited_by']
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error in bonding curve estimate: {e}")
-        try:
-            conn.close()
-        except:
-            pass
         return jsonify({"success": False, "error": str(e)}), 500
-    finally:
-        try:
-            conn.close()
-        except:
-            pass
+
+# Upper bound on points per batch quote request
+MAX_QUOTE_POINTS = 1000
+
+@app.route('/api/bonding-curve/quote-batch', methods=['POST'])
+@handle_errors
+def bonding_curve_quote_batch():
+    """Quote many trade sizes, and optionally the price curve, in one request"""
+    if BondingCurve is None:
+        return jsonify({"success": False, "error": "Bonding curve not available"}), 500
+    
+    try:
+        data = request.get_json()
+        asa_id = data.get('asa_id')
+        side = data.get('side', 'buy')
+        amounts = data.get('amounts')
+        curve_points = int(data.get('curve_points', 0))
+        
+        if not asa_id:
+            return jsonify({"success": False, "error": "Missing asa_id"}), 400
+        if side not in ('buy', 'sell'):
+            return jsonify({"success": False, "error": "side must be 'buy' or 'sell'"}), 400
+        
+        # Either explicit amounts or an evenly spaced grid up to max_amount
+        if amounts is None:
+            points = int(data.get('points', 50))
+            max_amount = float(data.get('max_amount', 0))
+            if points < 1 or max_amount <= 0:
+                return jsonify({"success": False, "error": "Provide amounts, or points and max_amount"}), 400
+            amounts = [max_amount * (i + 1) / points for i in range(min(points, MAX_QUOTE_POINTS))]
+        if len(amounts) > MAX_QUOTE_POINTS or curve_points > MAX_QUOTE_POINTS:
+            return jsonify({"success": False, "error": f"At most {MAX_QUOTE_POINTS} points per request"}), 400
+        
+        record = curve_cache.get(asa_id, get_db)
+        if record is None:
+            return jsonify({"success": False, "error": "Token not found"}), 404
+        if record.curve is None:
+            return jsonify({"success": False, "error": "Bonding curve not initialized"}), 400
+        
+        curve, state = record.curve, record.state
+        response = {
+            "success": True,
+            "side": side,
+            "current_price": curve.get_current_price(state.token_supply, state.algo_reserve),
+            "token_supply": state.token_supply,
+            "amounts": [float(a) for a in amounts],
+            "quotes": curve.quote_many(state.token_supply, state.algo_reserve, amounts, side)
+        }
+        
+        if curve_points > 1:
+            # Spot price across the tradable supply for charting
+            max_supply = curve.virtual_token_reserve * 0.99
+            supply_grid = [max_supply * i / (curve_points - 1) for i in range(curve_points)]
+            response["price_curve"] = {
+                "supply": supply_grid,
+                "price": curve.price_curve(supply_grid)
+            }
+        
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in bonding curve batch quote: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/scrape-content', methods=['POST', 'OPTIONS'])
 @cross_origin(supports_credentials=True)
@@ -3067,14 +2615,13 @@ def verify_ownership():
 def get_youtube_videos():
     """Get all YouTube videos with tokenization status"""
     try:
-        if not youtube_sessions:
+        session_data = get_youtube_session()
+        if not session_data:
             return jsonify({
                 "success": False,
                 "error": "YouTube authentication required"
             }), 401
         
-        session_key = list(youtube_sessions.keys())[0]
-        session_data = youtube_sessions[session_key]
         
         credentials_data = session_data['credentials']
         credentials = Credentials(
@@ -3111,7 +2658,7 @@ def get_youtube_videos():
         ).execute()
         
         # Get tokenized videos from database
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         # Check both content_id and content_url for YouTube videos
         cursor.execute('''
@@ -3140,7 +2687,6 @@ def get_youtube_videos():
                     'token_name': token_name,
                     'token_symbol': token_symbol
                 }
-        conn.close()
         
         # Format videos with tokenization status
         videos = []
@@ -3186,7 +2732,8 @@ def get_youtube_video_info():
     
     # Use handle_errors only for POST requests
     try:
-        if not youtube_sessions:
+        session_data = get_youtube_session()
+        if not session_data:
             return jsonify({
                 "success": False,
                 "error": "YouTube authentication required"
@@ -3206,8 +2753,6 @@ def get_youtube_video_info():
         
         video_id = video_id_match.group(1)
         
-        session_key = list(youtube_sessions.keys())[0]
-        session_data = youtube_sessions[session_key]
         
         # Get connected channel ID for ownership verification
         connected_channel_id = session_data.get('channel_id')
@@ -3242,12 +2787,11 @@ def get_youtube_video_info():
             logger.warning(f"⚠️ User tried to tokenize video from another channel. Video channel: {video_channel_id}, Connected channel: {connected_channel_id}")
         
         # Check if already tokenized
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT asa_id, token_name, token_symbol FROM tokens WHERE content_id = ? OR content_url LIKE ?', 
                       (video_id, f'%{video_id}%'))
         existing_token = cursor.fetchone()
-        conn.close()
         
         video_data = {
             'id': video_id,
@@ -3288,6 +2832,7 @@ def get_youtube_video_info():
 
 @app.route('/api/predictions/create', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@bumps_data_version
 def create_prediction():
     """Create a new prediction market"""
     try:
@@ -3320,9 +2865,8 @@ def create_prediction():
             if platform == 'youtube':
                 # Use YouTube API
                 video_id = content_url.split('v=')[-1].split('&')[0]
-                if youtube_sessions:
-                    session_key = list(youtube_sessions.keys())[0]
-                    session_data = youtube_sessions[session_key]
+                session_data = get_youtube_session()
+                if session_data:
                     credentials_data = session_data['credentials']
                     credentials = Credentials(
                         token=credentials_data['token'],
@@ -3369,7 +2913,7 @@ def create_prediction():
             logger.warning(f"Could not fetch initial value: {e}")
         
         # Save to database
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO predictions 
@@ -3379,7 +2923,6 @@ def create_prediction():
         ''', (prediction_id, creator_address, content_url, platform, metric_type,
               target_value, timeframe_hours, end_time.isoformat(), initial_value))
         conn.commit()
-        conn.close()
         
         logger.info(f"✅ Prediction created: {prediction_id} by {creator_address}")
         
@@ -3407,12 +2950,13 @@ def create_prediction():
 
 @app.route('/api/predictions', methods=['GET'])
 @cross_origin(supports_credentials=True)
+@cached_response()
 def get_predictions():
     """Get all predictions"""
     try:
         status_filter = request.args.get('status', 'active')  # active, resolved, all
         
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         if status_filter == 'all':
@@ -3434,7 +2978,6 @@ def get_predictions():
             ''', (status_filter,))
         
         rows = cursor.fetchall()
-        conn.close()
         
         predictions = []
         for row in rows:
@@ -3470,7 +3013,7 @@ def get_predictions():
 def get_prediction(prediction_id):
     """Get prediction details with real-time odds"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT prediction_id, creator_address, content_url, platform, metric_type,
@@ -3490,9 +3033,8 @@ def get_prediction(prediction_id):
             scraper = WebScraper()
             if row[3] == 'youtube':  # platform
                 video_id = row[2].split('v=')[-1].split('&')[0]  # content_url
-                if youtube_sessions:
-                    session_key = list(youtube_sessions.keys())[0]
-                    session_data = youtube_sessions[session_key]
+                session_data = get_youtube_session()
+                if session_data:
                     credentials_data = session_data['credentials']
                     credentials = Credentials(
                         token=credentials_data['token'],
@@ -3570,7 +3112,6 @@ def get_prediction(prediction_id):
         end_time = datetime.fromisoformat(row[7])
         time_remaining = (end_time - datetime.now()).total_seconds() / 3600  # hours
         
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -3603,6 +3144,7 @@ def get_prediction(prediction_id):
 
 @app.route('/api/predictions/<prediction_id>/trade', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@bumps_data_version
 def trade_prediction(prediction_id):
     """Trade on a prediction (YES or NO)"""
     try:
@@ -3618,7 +3160,7 @@ def trade_prediction(prediction_id):
             return jsonify({"success": False, "error": "Amount must be greater than 0"}), 400
         
         # Get prediction
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT yes_pool, no_pool, status, end_time
@@ -3672,7 +3214,6 @@ def trade_prediction(prediction_id):
         ''', (prediction_id, trader_address, side, amount, odds, potential_payout))
         
         conn.commit()
-        conn.close()
         
         logger.info(f"✅ Prediction trade: {side} {amount} ALGO on {prediction_id} by {trader_address}")
         
@@ -3694,10 +3235,11 @@ def trade_prediction(prediction_id):
 
 @app.route('/api/predictions/<prediction_id>/resolve', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@bumps_data_version
 def resolve_prediction(prediction_id):
     """Resolve a prediction and payout winners"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT content_url, platform, metric_type, target_value, yes_pool, no_pool, status
@@ -3720,9 +3262,8 @@ def resolve_prediction(prediction_id):
             scraper = WebScraper()
             if platform == 'youtube':
                 video_id = content_url.split('v=')[-1].split('&')[0]
-                if youtube_sessions:
-                    session_key = list(youtube_sessions.keys())[0]
-                    session_data = youtube_sessions[session_key]
+                session_data = get_youtube_session()
+                if session_data:
                     credentials_data = session_data['credentials']
                     credentials = Credentials(
                         token=credentials_data['token'],
@@ -3810,7 +3351,6 @@ def resolve_prediction(prediction_id):
         ''', (prediction_id, outcome))
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -3829,10 +3369,11 @@ def resolve_prediction(prediction_id):
 
 @app.route('/api/predictions/auto-resolve', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@bumps_data_version
 def auto_resolve_expired():
     """Auto-resolve all expired predictions"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Find expired active predictions
@@ -3864,9 +3405,8 @@ def auto_resolve_expired():
                         scraper = WebScraper()
                         if platform == 'youtube':
                             video_id = content_url.split('v=')[-1].split('&')[0]
-                            if youtube_sessions:
-                                session_key = list(youtube_sessions.keys())[0]
-                                session_data = youtube_sessions[session_key]
+                            session_data = get_youtube_session()
+                            if session_data:
                                 credentials_data = session_data['credentials']
                                 credentials = Credentials(
                                     token=credentials_data['token'],
@@ -3943,7 +3483,6 @@ def auto_resolve_expired():
                 logger.error(f"Error auto-resolving {prediction_id}: {e}")
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -3959,7 +3498,7 @@ def auto_resolve_expired():
 def get_user_winnings(address):
     """Get user's pending winnings from predictions"""
     try:
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get all won trades with pending payouts (not yet claimed)
@@ -3989,7 +3528,6 @@ def get_user_winnings(address):
                 'outcome': outcome
             })
         
-        conn.close()
         
         return jsonify({
             "success": True,
@@ -4001,6 +3539,14 @@ def get_user_winnings(address):
         logger.error(f"Error fetching winnings: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+def settle_prediction_payout(conn, txn):
+    """Release a claim whose payout transaction failed so it can be retried"""
+    if txn['status'] == TXN_FAILED:
+        conn.execute('UPDATE prediction_trades SET claimed = 0, claim_txid = NULL WHERE id = ? AND claim_txid = ?',
+                     (txn['payload']['trade_id'], txn['txid']))
+
+register_txn_handler('prediction_payout', settle_prediction_payout)
+
 @app.route('/api/predictions/claim/<trade_id>', methods=['POST'])
 @cross_origin(supports_credentials=True)
 def claim_winnings(trade_id):
@@ -4012,7 +3558,7 @@ def claim_winnings(trade_id):
         if not winner_address:
             return jsonify({"success": False, "error": "Winner address required"}), 400
         
-        conn = sqlite3.connect('creatorvault.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get trade details
@@ -4036,11 +3582,11 @@ def claim_winnings(trade_id):
         
         # Send payment from creator wallet to winner
         try:
-            creator_private_key = mnemonic.to_private_key(CREATOR_MNEMONIC)
-            creator_address = account.address_from_private_key(creator_private_key)
+            creator_private_key = chain_context.private_key
+            creator_address = chain_context.address
             
             # Get transaction params
-            params = algod_client.get_transaction_params()
+            params = chain_context.suggested_params()
             
             # Convert ALGO to microAlgos
             microalgos = int(payout_amount * 1_000_000)
@@ -4054,34 +3600,37 @@ def claim_winnings(trade_id):
                 note=f"Prediction winnings payout - Trade {trade_id}".encode()
             )
             
-            # Sign and send
+            # Sign, then mark as claimed before submitting so the payout can't be sent twice;
+            # the claim is released again if the payment fails on chain
             signed_txn = txn.sign(creator_private_key)
-            txid = algod_client.send_transaction(signed_txn)
-            
-            # Wait for confirmation
-            wait_for_confirmation(algod_client, txid, 4)
-            
-            # Mark as claimed
             cursor.execute('''
                 UPDATE prediction_trades
                 SET claimed = 1, claim_txid = ?
-                WHERE id = ?
-            ''', (txid, trade_id))
+                WHERE id = ? AND (claimed IS NULL OR claimed = 0)
+            ''', (signed_txn.get_txid(), trade_id))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return jsonify({"success": False, "error": "Already claimed"}), 400
             
-            conn.commit()
-            conn.close()
+            try:
+                txid = txn_confirmer.submit(conn, signed_txn, 'prediction_payout',
+                                           {'trade_id': trade_id, 'receiver': winner_address})
+            except Exception:
+                cursor.execute('UPDATE prediction_trades SET claimed = 0, claim_txid = NULL WHERE id = ?', (trade_id,))
+                conn.commit()
+                raise
             
-            logger.info(f"✅ Paid {payout_amount} ALGO to {winner_address} for trade {trade_id}")
+            logger.info(f"📤 Paying {payout_amount} ALGO to {winner_address} for trade {trade_id}")
             
             return jsonify({
                 "success": True,
                 "txid": txid,
+                "status": TXN_PENDING,
                 "payout_amount": payout_amount
             })
             
         except Exception as e:
             logger.error(f"Error sending payment: {e}")
-            conn.close()
             return jsonify({"success": False, "error": f"Payment failed: {str(e)}"}), 500
         
     except Exception as e:
@@ -4098,5 +3647,9 @@ if __name__ == '__main__':
     init_db()
     print("💾 SQLite database initialized")
     
+    # The debug reloader runs this twice; only its serving child process runs workers
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    
     print("🌐 Server running on http://localhost:5001")
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+ASA metadata cache
+Keeps the immutable params of assets (name, unit name, decimals, total) in
+the asset_metadata table and an in-process LRU, so reading a holding's
+decimals doesn't cost an algod asset_info call per asset
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Decimals assumed for an asset whose metadata can't be fetched
+DEFAULT_DECIMALS = 6
+
+
+class AssetMetadata:
+    """The params of an ASA that can't change after creation"""
+
+    __slots__ = ('asa_id', 'asset_name', 'unit_name', 'decimals', 'total', 'creator')
+
+    COLUMNS = __slots__
+
+    def __init__(self, asa_id: int, asset_name: Optional[str], unit_name: Optional[str], decimals: int,
+                 total: int, creator: Optional[str]):
+        self.asa_id = asa_id
+        self.asset_name = asset_name
+        self.unit_name = unit_name
+        self.decimals = decimals or 0
+        self.total = total or 0
+        self.creator = creator
+
+    @classmethod
+    def from_asset_info(cls, asset_info: Dict[str, Any]) -> 'AssetMetadata':
+        """Build from an algod asset_info response"""
+        params = asset_info['params']
+        return cls(asset_info['index'], params.get('name'), params.get('unit-name'), params.get('decimals', 0),
+                   params.get('total', 0), params.get('creator'))
+
+    def to_row(self) -> tuple:
+        return tuple(getattr(self, column) for column in self.COLUMNS)
+
+
+def save_metadata(conn: sqlite3.Connection, metadata: AssetMetadata):
+    """Store an asset's metadata; runs in the caller's transaction"""
+    conn.execute(f'''
+        INSERT OR REPLACE INTO asset_metadata ({', '.join(AssetMetadata.COLUMNS)}, fetched_at)
+        VALUES ({', '.join('?' * len(AssetMetadata.COLUMNS))}, ?)
+    ''', metadata.to_row() + (datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),))
+
+
+def load_metadata(conn: sqlite3.Connection, asa_ids: Iterable[int]) -> Dict[int, AssetMetadata]:
+    """Stored metadata for whichever of `asa_ids` have it"""
+    asa_ids = list(asa_ids)
+    if not asa_ids:
+        return {}
+    rows = conn.execute(f'''
+        SELECT {', '.join(AssetMetadata.COLUMNS)} FROM asset_metadata
+        WHERE asa_id IN ({', '.join('?' * len(asa_ids))})
+    ''', asa_ids).fetchall()
+    return {row[0]: AssetMetadata(*row) for row in rows}
+
+
+class AssetMetadataCache:
+    """
+    In-process LRU over the asset_metadata table
+
+    Lookups are served from memory, then the table, and only assets seen for
+    the first time are fetched from algod and written back (lazy backfill).
+    ASA params are immutable, so entries never need invalidating.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._records: 'OrderedDict[int, AssetMetadata]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, conn: sqlite3.Connection, asa_ids: Iterable[int],
+                 fetch: Callable[[int], Dict[str, Any]]) -> Dict[int, AssetMetadata]:
+        """
+        Metadata for each of `asa_ids` that exists
+
+        `fetch` (algod's asset_info) is only called for assets in neither the
+        cache nor the table; what it returns is stored and committed. Assets
+        algod can't return are left out rather than cached.
+        """
+        found: Dict[int, AssetMetadata] = {}
+        missing = []
+        with self._lock:
+            for asa_id in dict.fromkeys(int(asa_id) for asa_id in asa_ids):
+                metadata = self._records.get(asa_id)
+                if metadata is None:
+                    missing.append(asa_id)
+                else:
+                    self._records.move_to_end(asa_id)
+                    found[asa_id] = metadata
+        if not missing:
+            return found
+
+        stored = load_metadata(conn, missing)
+        fetched = []
+        for asa_id in missing:
+            metadata = stored.get(asa_id)
+            if metadata is None:
+                try:
+                    metadata = AssetMetadata.from_asset_info(fetch(asa_id))
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not fetch metadata for ASA {asa_id}: {e}")
+                    continue
+                fetched.append(metadata)
+            found[asa_id] = metadata
+            self._put(metadata)
+
+        if fetched:
+            for metadata in fetched:
+                save_metadata(conn, metadata)
+            conn.commit()
+        return found
+
+    def get(self, conn: sqlite3.Connection, asa_id: int,
+            fetch: Callable[[int], Dict[str, Any]]) -> Optional[AssetMetadata]:
+        """Metadata for one asset, or None if it can't be found"""
+        return self.get_many(conn, [asa_id], fetch).get(int(asa_id))
+
+    def store(self, conn: sqlite3.Connection, metadata: AssetMetadata):
+        """Save a newly created asset's metadata and commit"""
+        save_metadata(conn, metadata)
+        conn.commit()
+        self._put(metadata)
+
+    def _put(self, metadata: AssetMetadata):
+        with self._lock:
+            self._records[metadata.asa_id] = metadata
+            self._records.move_to_end(metadata.asa_id)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached record"""
+        with self._lock:
+            self._records.clear()
+
+
+asset_metadata_cache = AssetMetadataCache()
@@ -0,0 +1,90 @@
+"""
+Float vs fixed-point bonding curve benchmark
+Replays the same random buy/sell sequence through BondingCurve and
+FixedPointBondingCurve and reports throughput and reserve drift
+
+Drift is measured two ways:
+- ledger gap: tracked ALGO reserve minus the sum of the integer microAlgo
+  amounts that would actually move on chain for each trade
+- curve gap: tracked ALGO reserve minus the reserve the constant product
+  formula implies for the final supply
+
+Usage: python benchmarks/bench_fixed_point.py [--trades 1000000] [--seed 7]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bonding_curve import BondingCurve, FixedPointBondingCurve, BondingCurveState  # noqa: E402
+
+MICROALGOS_PER_ALGO = 1000000
+
+
+def make_trades(count: int, seed: int, decimals: int):
+    """Random (is_buy, token_amount) pairs in whole base units, half buys and half sells"""
+    rng = random.Random(seed)
+    unit = 10 ** decimals
+    return [(rng.random() < 0.5, rng.randint(1, 1000 * unit) / unit) for _ in range(count)]
+
+
+def run(curve: BondingCurve, trades):
+    """Replay trades, skipping any the curve cannot fill"""
+    state = BondingCurveState()
+    ledger_micro = 0
+    executed = 0
+    start = time.perf_counter()
+    for is_buy, amount in trades:
+        if is_buy:
+            if amount >= curve.virtual_token_reserve - state.token_supply:
+                continue
+            result = curve.calculate_buy_price(state.token_supply, state.algo_reserve, amount)
+            ledger_micro += round(result['algo_cost'] * MICROALGOS_PER_ALGO)
+        else:
+            if amount > state.token_supply:
+                continue
+            result = curve.calculate_sell_price(state.token_supply, state.algo_reserve, amount)
+            ledger_micro -= round(result['algo_received'] * MICROALGOS_PER_ALGO)
+        state = BondingCurveState(result['new_supply'], result['new_algo_reserve'])
+        executed += 1
+    elapsed = time.perf_counter() - start
+
+    implied = curve.k / (curve.virtual_token_reserve - state.token_supply) - curve.virtual_algo_reserve
+    return {
+        'executed': executed,
+        'seconds': elapsed,
+        'trades_per_sec': executed / elapsed,
+        'ledger_gap_micro': state.algo_reserve * MICROALGOS_PER_ALGO - ledger_micro,
+        'curve_gap_micro': (state.algo_reserve - implied) * MICROALGOS_PER_ALGO,
+        'supply': state.token_supply,
+        'reserve': state.algo_reserve,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trades', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--decimals', type=int, default=6)
+    args = parser.parse_args()
+
+    trades = make_trades(args.trades, args.seed, args.decimals)
+    curves = {
+        'float': BondingCurve(initial_price=0.001, initial_supply=10000000),
+        'fixed': FixedPointBondingCurve(initial_price=0.001, initial_supply=10000000, decimals=args.decimals),
+    }
+
+    print(f"{args.trades:,} simulated trades (seed {args.seed})")
+    print(f"{'mode':<6} {'executed':>10} {'seconds':>9} {'trades/s':>11} {'ledger gap µA':>15} {'curve gap µA':>14}")
+    for name, curve in curves.items():
+        stats = run(curve, trades)
+        print(f"{name:<6} {stats['executed']:>10,} {stats['seconds']:>9.2f} {stats['trades_per_sec']:>11,.0f} "
+              f"{stats['ledger_gap_micro']:>15.3f} {stats['curve_gap_micro']:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+JSON serialization benchmark
+Requests the large list endpoints against a fixture database with Flask's
+stdlib JSON provider and with the orjson provider, and reports the median
+full request time and the time spent serializing each endpoint's payload
+
+The response cache is cleared before every request so each one is rebuilt.
+
+Usage: python benchmarks/bench_json.py [--trades 50000] [--tokens 10000] [--runs 15]
+"""
+
+import os
+import sys
+import time
+import argparse
+import sqlite3
+import statistics
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_row_memory import build_fixture, TRADER
+
+
+def add_tokens(path: str, tokens: int):
+    """Pad the catalogue with `tokens` extra tokens and rebuild the trade rollups"""
+    from positions import rebuild_positions
+    from trader_stats import rebuild_trader_stats
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('BEGIN')
+    conn.executemany('''
+        INSERT INTO tokens (asa_id, creator, token_name, token_symbol, total_supply, current_price, market_cap,
+                            platform, content_url, content_description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 'youtube', ?, ?)
+    ''', [(asa_id, 'D' * 58, f'Token {asa_id}', f'T{asa_id}', 1000000, 0.001, 1000,
+           f'https://www.youtube.com/watch?v={asa_id:011d}', 'A creator token ' * 4)
+          for asa_id in range(1000, 1000 + tokens)])
+    conn.execute('COMMIT')
+    rebuild_positions(conn)
+    rebuild_trader_stats(conn)
+    conn.close()
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trades', type=int, default=50000)
+    parser.add_argument('--tokens', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fixture.db')
+        build_fixture(path, args.trades)
+        add_tokens(path, args.tokens)
+
+        os.environ['DATABASE_PATH'] = path
+        from flask.json.provider import DefaultJSONProvider
+        import app as backend
+        from json_provider import OrjsonProvider, orjson
+        from response_cache import response_cache
+
+        endpoints = [
+            '/tokens',
+            '/api/trades/1?timeframe=1y&limit=5000',
+            f'/api/copy-trading/trader/{TRADER}/trades?limit={args.trades}',
+            f'/api/portfolio/{TRADER}',
+            '/api/copy-trading/leaderboard?timeframe=all',
+        ]
+        providers = [('stdlib', DefaultJSONProvider(backend.app))]
+        if orjson is not None:
+            providers.append(('orjson', OrjsonProvider(backend.app)))
+        else:
+            print("orjson is not installed; only the stdlib provider is measured")
+
+        client = backend.app.test_client()
+        print(f"{args.tokens:,} extra tokens, {args.trades:,} trades, median of {args.runs} runs")
+        print(f"{'endpoint':<48} {'provider':<8} {'KB':>8} {'request ms':>11} {'serialize ms':>13}")
+        for url in endpoints:
+            for name, provider in providers:
+                backend.app.json = provider
+
+                def request():
+                    response_cache.clear()
+                    return client.get(url).get_data()
+
+                body = request()
+                payload = provider.loads(body)
+                request_ms = median_ms(request, args.runs)
+                serialize_ms = median_ms(lambda: provider.dumps(payload), args.runs)
+                label = url if len(url) <= 48 else url[:45] + '...'
+                print(f"{label:<48} {name:<8} {len(body) / 1024:>8.0f} {request_ms:>11.2f} {serialize_ms:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
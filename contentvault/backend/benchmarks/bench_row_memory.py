@@ -0,0 +1,103 @@
+"""
+Row representation memory benchmark
+Loads one trader's full history from a 100k-trade fixture the way the
+analytics endpoints do, once as tuples converted to per-row dicts (the old
+handlers) and once as slotted TraderTrade models, and reports peak RSS
+
+Each variant runs in its own subprocess since peak RSS never goes down.
+
+Usage: python benchmarks/bench_row_memory.py [--trades 100000]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import resource
+import subprocess
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TRADER = 'B' * 58
+QUERY_COLUMNS = '''t.trade_type, t.amount, t.price, t.total_value, t.created_at, t.transaction_id, t.asa_id,
+                   tk.token_name, tk.token_symbol, tk.current_price, tk.market_cap'''
+
+
+def build_fixture(path: str, trades: int):
+    """Create a migrated database with `trades` trades by one trader over 200 tokens"""
+    from migrations import run_migrations
+
+    conn = sqlite3.connect(path)
+    run_migrations(conn)
+    conn.executemany('''
+        INSERT INTO tokens (asa_id, creator, token_name, token_symbol, total_supply, current_price, market_cap)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(asa_id, 'C' * 58, f'Token {asa_id}', f'T{asa_id}', 1000000, 0.001, 1000) for asa_id in range(1, 201)])
+
+    rng = random.Random(1)
+    conn.executemany('''
+        INSERT INTO trades (asa_id, trader_address, trade_type, amount, price, transaction_id, total_value, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+    ''', ((rng.randint(1, 200), TRADER, rng.choice(('buy', 'sell')), rng.uniform(1, 1000), rng.uniform(0.001, 0.002),
+           f'TX{i:052d}', rng.uniform(0.001, 2), f'-{rng.randint(0, 60 * 24 * 90)} minutes') for i in range(trades)))
+    conn.commit()
+    conn.close()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def measure(path: str, variant: str):
+    """Load the trader's history with one representation and print peak RSS"""
+    from database import select_models
+    from models import TraderTrade
+
+    conn = sqlite3.connect(path)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    sql = f'''
+        SELECT {QUERY_COLUMNS}
+        FROM trades t
+        LEFT JOIN tokens tk ON t.asa_id = tk.asa_id
+        WHERE t.trader_address = ?
+        ORDER BY t.created_at DESC
+    '''
+    if variant == 'dicts':
+        cursor = conn.execute(sql, (TRADER,))
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    else:
+        rows = select_models(conn, TraderTrade, sql, (TRADER,)).fetchall()
+    elapsed = time.perf_counter() - start
+    print(f"{variant:<7} {len(rows):>9,} {peak_rss_mb() - baseline:>12.1f} {peak_rss_mb():>12.1f} {elapsed:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trades', type=int, default=100000)
+    parser.add_argument('--measure', choices=('dicts', 'models'))
+    parser.add_argument('--db')
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.db, args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fixture.db')
+        build_fixture(path, args.trades)
+        print(f"{args.trades:,} trades for one trader")
+        print(f"{'rows':<7} {'loaded':>9} {'peak +MB':>12} {'peak RSS MB':>12} {'seconds':>9}")
+        for variant in ('dicts', 'models'):
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', variant, '--db', path], check=True)
+
+
+if __name__ == '__main__':
+    main()
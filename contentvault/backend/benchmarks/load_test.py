@@ -0,0 +1,147 @@
+"""
+Server load test
+Starts the backend on a fixture database under the dev server (app.run with
+debug on, as app.py does) and under gunicorn, then hammers a few read
+endpoints from several client processes over keep-alive connections and
+reports requests/sec for each
+
+Usage: python benchmarks/load_test.py [--seconds 10] [--clients 32] [--workers 4]
+       python benchmarks/load_test.py --url http://host:5001/tokens   (load an already running server)
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+import http.client
+import multiprocessing
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ['/health', '/tokens?limit=50', '/api/trades/1?timeframe=1y&limit=100', '/api/copy-trading/leaderboard']
+
+DEV_SERVER = '''
+import app
+app.init_db()
+app.app.run(host="127.0.0.1", port={port}, debug=True, use_reloader=False)
+'''
+
+
+def client_loop(url: str, seconds: float, threads: int, results):
+    """One client process: `threads` keep-alive connections requesting `url` until time is up"""
+    import threading
+
+    parts = urlsplit(url)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    deadline = time.monotonic() + seconds
+    counts = []
+
+    def run():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        done = errors = 0
+        while time.monotonic() < deadline:
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    done += 1
+                else:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        counts.append((done, errors))
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((sum(done for done, _ in counts), sum(errors for _, errors in counts)))
+
+
+def load(url: str, seconds: float, clients: int):
+    """Requests/sec and error count for `clients` concurrent connections"""
+    processes = max(1, min(clients, multiprocessing.cpu_count()))
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client_loop,
+                                     args=(url, seconds, clients // processes + (i < clients % processes), results))
+             for i in range(processes)]
+    for proc in procs:
+        proc.start()
+    totals = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return sum(done for done, _ in totals) / seconds, sum(errors for _, errors in totals)
+
+
+def wait_ready(base: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(base + '/health/ready', timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"Server at {base} never became ready")
+
+
+def run_server(name: str, command, env, port: int, seconds: float, clients: int):
+    proc = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        wait_ready(base)
+        for path in PATHS:
+            load(base + path, 1, clients)  # warm up
+            rps, errors = load(base + path, seconds, clients)
+            print(f"{name:<22} {path:<42} {rps:>10.0f} {errors:>8}")
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--url', help='load this URL on a running server instead')
+    args = parser.parse_args()
+
+    if args.url:
+        rps, errors = load(args.url, args.seconds, args.clients)
+        print(f"{args.url}: {rps:.0f} req/s, {errors} errors")
+        return
+
+    from bench_row_memory import build_fixture
+    from bench_json import add_tokens
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fixture.db')
+        build_fixture(path, 20000)
+        add_tokens(path, 2000)
+        env = dict(os.environ, DATABASE_PATH=path, WEB_CONCURRENCY=str(args.workers),
+                   GUNICORN_ACCESS_LOG='/dev/null')
+
+        print(f"{args.clients} concurrent keep-alive clients, {args.seconds:.0f}s per endpoint")
+        print(f"{'server':<22} {'endpoint':<42} {'req/s':>10} {'errors':>8}")
+        run_server('dev server', [sys.executable, '-c', DEV_SERVER.format(port=5101)], env, 5101,
+                   args.seconds, args.clients)
+        run_server(f'gunicorn x{args.workers}', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                                 '-b', '127.0.0.1:5102', 'wsgi:app'],
+                   env, 5102, args.seconds, args.clients)
+
+
+if __name__ == '__main__':
+    main()
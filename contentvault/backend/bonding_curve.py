@@ -3,8 +3,14 @@ Bonding Curve Implementation for Backend
 Similar to pump.fun mechanism - realistic pricing for creator tokens
 """
 
-import json
-from typing import Dict, Any
+import math
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+# NumPy is optional: batch quotes fall back to plain Python without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class BondingCurve:
     """
@@ -19,6 +25,16 @@ class BondingCurve:
     - Price impact: Larger trades have more impact on price
     """
     
+    # Typed columns in the tokens table holding the curve parameters
+    COLUMNS = ('curve_initial_price', 'curve_initial_supply', 'curve_virtual_token_reserve',
+               'curve_virtual_algo_reserve', 'curve_k', 'curve_steepness', 'curve_mode', 'curve_decimals')
+    
+    # Arithmetic mode stored in curve_mode
+    MODE = 'float'
+    
+    __slots__ = ('initial_price', 'initial_supply', 'curve_steepness', 'virtual_token_reserve',
+                 'virtual_algo_reserve', 'k')
+    
     def __init__(self, initial_price: float = 0.00001, initial_supply: int = 1000000, 
                  virtual_algo: float = None, curve_steepness: float = 0.5):
         """
@@ -84,6 +100,29 @@ class BondingCurve:
         curve.curve_steepness = data.get('curve_steepness', 1.0)
         return curve
     
+    def to_row(self) -> Tuple[float, ...]:
+        """Convert to values for the typed tokens columns, in COLUMNS order"""
+        return (
+            self.initial_price,
+            self.initial_supply,
+            self.virtual_token_reserve,
+            self.virtual_algo_reserve,
+            self.k,
+            self.curve_steepness,
+            self.MODE,
+            None
+        )
+    
+    @classmethod
+    def from_row(cls, row: Sequence[float]) -> 'BondingCurve':
+        """Create from typed tokens column values, in COLUMNS order"""
+        if row[6] == FixedPointBondingCurve.MODE:
+            return FixedPointBondingCurve.from_row(row)
+        curve = BondingCurve.__new__(BondingCurve)
+        (curve.initial_price, curve.initial_supply, curve.virtual_token_reserve,
+         curve.virtual_algo_reserve, curve.k, curve.curve_steepness) = row[:6]
+        return curve
+    
     def calculate_buy_price(self, current_supply: float, current_algo_reserve: float, token_amount: float) -> Dict[str, float]:
         """
         Calculate price for buying tokens
@@ -165,6 +204,203 @@ class BondingCurve:
             'new_algo_reserve': current_algo_reserve - algo_received
         }
     
+    def calculate_tokens_for_algo(self, current_supply: float, current_algo_reserve: float, algo_amount: float) -> Dict[str, float]:
+        """
+        Calculate how many tokens a given ALGO spend buys
+        
+        Closed-form inverse of calculate_buy_price: paying x ALGO moves the
+        ALGO reserve to A + x, so the token reserve becomes k / (A + x) and the
+        buyer receives T - k / (A + x) tokens.
+        
+        Returns:
+            dict with 'token_amount', 'algo_cost', 'new_price', 'new_supply', 'new_algo_reserve'
+        """
+        current_token_reserve = self.virtual_token_reserve - current_supply
+        current_algo_reserve_total = self.virtual_algo_reserve + current_algo_reserve
+        
+        if current_token_reserve <= 0:
+            raise ValueError("No tokens available in bonding curve")
+        if algo_amount <= 0:
+            raise ValueError("ALGO amount must be positive")
+        
+        new_algo_reserve_total = current_algo_reserve_total + algo_amount
+        new_token_reserve = self.k / new_algo_reserve_total
+        token_amount = current_token_reserve - new_token_reserve
+        
+        return {
+            'token_amount': token_amount,
+            'algo_cost': algo_amount,
+            'new_price': new_algo_reserve_total / new_token_reserve,
+            'new_supply': current_supply + token_amount,
+            'new_algo_reserve': current_algo_reserve + algo_amount
+        }
+    
+    def calculate_tokens_to_sell_for_algo(self, current_supply: float, current_algo_reserve: float, algo_amount: float) -> Dict[str, float]:
+        """
+        Calculate how many tokens must be sold to receive a target ALGO amount
+        
+        Closed-form inverse of calculate_sell_price: taking y ALGO out leaves
+        A - y in the reserve, so the token reserve must grow to k / (A - y),
+        i.e. the seller gives up k / (A - y) - T tokens.
+        
+        Returns:
+            dict with 'token_amount', 'algo_received', 'new_price', 'new_supply', 'new_algo_reserve'
+        """
+        current_token_reserve = self.virtual_token_reserve - current_supply
+        current_algo_reserve_total = self.virtual_algo_reserve + current_algo_reserve
+        
+        if algo_amount <= 0:
+            raise ValueError("ALGO amount must be positive")
+        if algo_amount >= current_algo_reserve_total:
+            raise ValueError(f"Cannot receive {algo_amount} ALGO. Reserve holds {current_algo_reserve_total}.")
+        
+        new_algo_reserve_total = current_algo_reserve_total - algo_amount
+        new_token_reserve = self.k / new_algo_reserve_total
+        token_amount = new_token_reserve - current_token_reserve
+        
+        if token_amount > current_supply:
+            raise ValueError(f"Receiving {algo_amount} ALGO needs {token_amount} tokens. Only {current_supply} in circulation.")
+        
+        return {
+            'token_amount': token_amount,
+            'algo_received': algo_amount,
+            'new_price': new_algo_reserve_total / new_token_reserve,
+            'new_supply': current_supply - token_amount,
+            'new_algo_reserve': current_algo_reserve - algo_amount
+        }
+    
+    def max_tokens_for_budget(self, current_supply: float, current_algo_reserve: float, budget: float,
+                              max_slippage: float = None) -> Dict[str, Any]:
+        """
+        Largest buy that fits an ALGO budget and an optional slippage bound
+        
+        Args:
+            current_supply: Tokens currently in circulation
+            current_algo_reserve: ALGO currently in the reserve
+            budget: Most ALGO to spend
+            max_slippage: Largest allowed price move as a fraction (0.05 = 5%)
+        
+        The price after buying x tokens is k / (T - x)^2, so staying within
+        p0 * (1 + s) caps the buy at x <= T - sqrt(k / (p0 * (1 + s))).
+        
+        Returns:
+            calculate_buy_price result plus 'token_amount' and 'limited_by'
+            ('budget' or 'slippage')
+        """
+        quote = self.calculate_tokens_for_algo(current_supply, current_algo_reserve, budget)
+        if max_slippage is None:
+            quote['limited_by'] = 'budget'
+            return quote
+        
+        current_token_reserve = self.virtual_token_reserve - current_supply
+        price = self.get_current_price(current_supply, current_algo_reserve)
+        slippage_cap = current_token_reserve - (self.k / (price * (1 + max_slippage))) ** 0.5
+        if slippage_cap <= 0:
+            raise ValueError(f"Slippage limit of {max_slippage * 100}% allows no tokens at the current price")
+        if quote['token_amount'] <= slippage_cap:
+            quote['limited_by'] = 'budget'
+            return quote
+        
+        capped = self.calculate_buy_price(current_supply, current_algo_reserve, slippage_cap)
+        capped['token_amount'] = slippage_cap
+        capped['limited_by'] = 'slippage'
+        return capped
+    
+    def quote_many(self, current_supply: float, current_algo_reserve: float, amounts: Sequence[float],
+                   side: str = 'buy') -> Dict[str, List[Optional[float]]]:
+        """
+        Price many trade sizes against the same state in one call
+        
+        Args:
+            current_supply: Tokens currently in circulation
+            current_algo_reserve: ALGO currently in the reserve
+            amounts: Token amounts to quote
+            side: 'buy' or 'sell'
+        
+        Returns:
+            dict of lists aligned with `amounts`: 'algo' (cost for buys, proceeds
+            for sells), 'avg_price', 'new_price' and 'price_impact' (percent).
+            Amounts the curve cannot fill are None in every list.
+        """
+        if side not in ('buy', 'sell'):
+            raise ValueError(f"Unknown side '{side}'")
+        token_reserve = self.virtual_token_reserve - current_supply
+        algo_reserve = self.virtual_algo_reserve + current_algo_reserve
+        if token_reserve <= 0:
+            raise ValueError("No tokens available in bonding curve")
+        price = algo_reserve / token_reserve
+        
+        if np is None:
+            return self._quote_many_python(current_supply, token_reserve, algo_reserve, price, amounts, side)
+        
+        x = np.asarray(amounts, dtype=float)
+        if side == 'buy':
+            new_token_reserve = token_reserve - x
+            valid = (x > 0) & (new_token_reserve > 0)
+        else:
+            new_token_reserve = token_reserve + x
+            valid = (x > 0) & (x <= current_supply)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_algo_reserve = self.k / new_token_reserve
+            algo = new_algo_reserve - algo_reserve if side == 'buy' else algo_reserve - new_algo_reserve
+            new_price = new_algo_reserve / new_token_reserve
+            impact = (new_price - price) / price * 100
+            if side == 'sell':
+                impact = -impact
+            avg_price = algo / x
+        
+        def column(values):
+            return [v if ok else None for v, ok in zip(values.tolist(), valid.tolist())]
+        
+        return {
+            'algo': column(algo),
+            'avg_price': column(avg_price),
+            'new_price': column(new_price),
+            'price_impact': column(impact)
+        }
+    
+    def _quote_many_python(self, current_supply: float, token_reserve: float, algo_reserve: float,
+                           price: float, amounts: Sequence[float], side: str) -> Dict[str, List[Optional[float]]]:
+        """quote_many without NumPy"""
+        quotes = {'algo': [], 'avg_price': [], 'new_price': [], 'price_impact': []}
+        for x in amounts:
+            x = float(x)
+            new_token_reserve = token_reserve - x if side == 'buy' else token_reserve + x
+            if x <= 0 or new_token_reserve <= 0 or (side == 'sell' and x > current_supply):
+                for values in quotes.values():
+                    values.append(None)
+                continue
+            new_algo_reserve = self.k / new_token_reserve
+            algo = new_algo_reserve - algo_reserve if side == 'buy' else algo_reserve - new_algo_reserve
+            new_price = new_algo_reserve / new_token_reserve
+            impact = (new_price - price) / price * 100
+            quotes['algo'].append(algo)
+            quotes['avg_price'].append(algo / x)
+            quotes['new_price'].append(new_price)
+            quotes['price_impact'].append(impact if side == 'buy' else -impact)
+        return quotes
+    
+    def price_curve(self, supply_grid: Sequence[float]) -> List[Optional[float]]:
+        """
+        Spot price at each circulating supply in `supply_grid`
+        
+        On the curve the ALGO reserve is always k / token_reserve, so the price
+        depends on supply alone: k / token_reserve^2. Supplies at or beyond the
+        virtual token reserve have no price and come back as None.
+        """
+        if np is None:
+            prices = []
+            for supply in supply_grid:
+                token_reserve = self.virtual_token_reserve - float(supply)
+                prices.append(self.k / token_reserve ** 2 if token_reserve > 0 else None)
+            return prices
+        
+        token_reserve = self.virtual_token_reserve - np.asarray(supply_grid, dtype=float)
+        valid = token_reserve > 0
+        with np.errstate(divide='ignore'):
+            prices = self.k / token_reserve ** 2
+        return [p if ok else None for p, ok in zip(prices.tolist(), valid.tolist())]
+    
     def get_current_price(self, current_supply: float, current_algo_reserve: float) -> float:
         """Get current price from state"""
         current_token_reserve = self.virtual_token_reserve - current_supply
@@ -172,9 +408,205 @@ class BondingCurve:
         return current_algo_reserve_total / current_token_reserve if current_token_reserve > 0 else self.initial_price
 
 
+class FixedPointBondingCurve(BondingCurve):
+    """
+    Bonding curve priced in integers
+    
+    Same constant product curve as BondingCurve, but reserves are held in
+    microAlgos and token base units (10^decimals per token), and every
+    division rounds in the pool's favour: buyers pay the ceiling, sellers
+    receive the floor. Results match on-chain integer amounts exactly, so
+    repeated trades never drift. The public methods still take and return
+    ALGO and whole tokens, and add integer 'microalgos' and 'token_units'.
+    """
+    
+    MODE = 'fixed'
+    MICROALGOS_PER_ALGO = 1000000
+    # Slippage bounds are applied as a ratio of integers at this resolution
+    SLIPPAGE_SCALE = 1000000
+    
+    __slots__ = ('decimals', 'unit', 'virtual_token_units', 'virtual_microalgos', 'k_units')
+    
+    def __init__(self, initial_price: float = 0.00001, initial_supply: int = 1000000,
+                 virtual_algo: float = None, curve_steepness: float = 0.5, decimals: int = 6):
+        super().__init__(initial_price, initial_supply, virtual_algo, curve_steepness)
+        self._set_reserves(round(self.virtual_token_reserve * 10 ** decimals),
+                           round(self.virtual_algo_reserve * self.MICROALGOS_PER_ALGO), decimals)
+    
+    def _set_reserves(self, token_units: int, microalgos: int, decimals: int):
+        """Set the integer virtual reserves and the float views derived from them"""
+        self.decimals = decimals
+        self.unit = 10 ** decimals
+        self.virtual_token_units = token_units
+        self.virtual_microalgos = microalgos
+        self.k_units = token_units * microalgos
+        self.virtual_token_reserve = token_units / self.unit
+        self.virtual_algo_reserve = microalgos / self.MICROALGOS_PER_ALGO
+        self.k = self.virtual_token_reserve * self.virtual_algo_reserve
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage"""
+        data = super().to_dict()
+        data['mode'] = self.MODE
+        data['decimals'] = self.decimals
+        return data
+    
+    def to_row(self) -> Tuple[float, ...]:
+        """Convert to values for the typed tokens columns, in COLUMNS order"""
+        return super().to_row()[:7] + (self.decimals,)
+    
+    @classmethod
+    def from_row(cls, row: Sequence[float]) -> 'FixedPointBondingCurve':
+        """Create from typed tokens column values, quantizing the reserves"""
+        curve = cls.__new__(cls)
+        curve.initial_price, curve.initial_supply = row[0], row[1]
+        curve.curve_steepness = row[5]
+        decimals = int(row[7]) if row[7] is not None else 6
+        curve._set_reserves(round(row[2] * 10 ** decimals), round(row[3] * cls.MICROALGOS_PER_ALGO), decimals)
+        return curve
+    
+    def _reserves(self, current_supply: float, current_algo_reserve: float) -> Tuple[int, int]:
+        """Current (token units, microAlgos) reserves for a state"""
+        return (self.virtual_token_units - round(current_supply * self.unit),
+                self.virtual_microalgos + round(current_algo_reserve * self.MICROALGOS_PER_ALGO))
+    
+    def _result(self, token_units: int, microalgos: int, new_token_units: int, new_microalgos: int,
+                buy: bool) -> Dict[str, Any]:
+        """Build a trade result from integer amounts, converted back to ALGO and tokens"""
+        return {
+            'algo_cost' if buy else 'algo_received': microalgos / self.MICROALGOS_PER_ALGO,
+            'token_amount': token_units / self.unit,
+            'new_price': (new_microalgos * self.unit) / (new_token_units * self.MICROALGOS_PER_ALGO),
+            'new_supply': (self.virtual_token_units - new_token_units) / self.unit,
+            'new_algo_reserve': (new_microalgos - self.virtual_microalgos) / self.MICROALGOS_PER_ALGO,
+            'microalgos': microalgos,
+            'token_units': token_units
+        }
+    
+    def calculate_buy_price(self, current_supply: float, current_algo_reserve: float, token_amount: float) -> Dict[str, Any]:
+        """Calculate price for buying tokens, rounding the cost up"""
+        token_reserve, algo_reserve = self._reserves(current_supply, current_algo_reserve)
+        if token_reserve <= 0:
+            raise ValueError("No tokens available in bonding curve")
+        
+        token_units = round(token_amount * self.unit)
+        new_token_reserve = token_reserve - token_units
+        if new_token_reserve <= 0:
+            raise ValueError(f"Cannot buy {token_amount} tokens. Only {token_reserve / self.unit} available.")
+        
+        new_algo_reserve = -(-self.k_units // new_token_reserve)  # ceil
+        return self._result(token_units, new_algo_reserve - algo_reserve,
+                            new_token_reserve, new_algo_reserve, True)
+    
+    def calculate_sell_price(self, current_supply: float, current_algo_reserve: float, token_amount: float) -> Dict[str, Any]:
+        """Calculate price for selling tokens, rounding the proceeds down"""
+        token_reserve, algo_reserve = self._reserves(current_supply, current_algo_reserve)
+        token_units = round(token_amount * self.unit)
+        if token_units > self.virtual_token_units - token_reserve:
+            raise ValueError(f"Cannot sell {token_amount} tokens. Only {current_supply} in circulation.")
+        
+        new_token_reserve = token_reserve + token_units
+        new_algo_reserve = -(-self.k_units // new_token_reserve)  # ceil keeps the remainder in the pool
+        return self._result(token_units, algo_reserve - new_algo_reserve,
+                            new_token_reserve, new_algo_reserve, False)
+    
+    def calculate_tokens_for_algo(self, current_supply: float, current_algo_reserve: float, algo_amount: float) -> Dict[str, Any]:
+        """Calculate how many tokens a given ALGO spend buys, rounding the tokens down"""
+        token_reserve, algo_reserve = self._reserves(current_supply, current_algo_reserve)
+        if token_reserve <= 0:
+            raise ValueError("No tokens available in bonding curve")
+        microalgos = round(algo_amount * self.MICROALGOS_PER_ALGO)
+        if microalgos <= 0:
+            raise ValueError("ALGO amount must be positive")
+        
+        new_algo_reserve = algo_reserve + microalgos
+        new_token_reserve = -(-self.k_units // new_algo_reserve)
+        return self._result(token_reserve - new_token_reserve, microalgos,
+                            new_token_reserve, new_algo_reserve, True)
+    
+    def calculate_tokens_to_sell_for_algo(self, current_supply: float, current_algo_reserve: float, algo_amount: float) -> Dict[str, Any]:
+        """Calculate how many tokens must be sold to receive a target ALGO amount, rounding the tokens up"""
+        token_reserve, algo_reserve = self._reserves(current_supply, current_algo_reserve)
+        microalgos = round(algo_amount * self.MICROALGOS_PER_ALGO)
+        if microalgos <= 0:
+            raise ValueError("ALGO amount must be positive")
+        if microalgos >= algo_reserve:
+            raise ValueError(f"Cannot receive {algo_amount} ALGO. Reserve holds {algo_reserve / self.MICROALGOS_PER_ALGO}.")
+        
+        new_algo_reserve = algo_reserve - microalgos
+        new_token_reserve = -(-self.k_units // new_algo_reserve)
+        token_units = new_token_reserve - token_reserve
+        if token_units > self.virtual_token_units - token_reserve:
+            raise ValueError(f"Receiving {algo_amount} ALGO needs {token_units / self.unit} tokens. Only {current_supply} in circulation.")
+        return self._result(token_units, microalgos,
+                            new_token_reserve, new_algo_reserve, False)
+    
+    def max_tokens_for_budget(self, current_supply: float, current_algo_reserve: float, budget: float,
+                              max_slippage: float = None) -> Dict[str, Any]:
+        """Largest buy that fits an ALGO budget and an optional slippage bound"""
+        quote = self.calculate_tokens_for_algo(current_supply, current_algo_reserve, budget)
+        if max_slippage is None:
+            quote['limited_by'] = 'budget'
+            return quote
+        
+        # x <= T - sqrt(k / (p0 * (1 + s))) with p0 = A / T, in base units
+        token_reserve, algo_reserve = self._reserves(current_supply, current_algo_reserve)
+        slippage_ratio = round((1 + max_slippage) * self.SLIPPAGE_SCALE)
+        floor_reserve = math.isqrt(self.k_units * token_reserve * self.SLIPPAGE_SCALE
+                                   // (algo_reserve * slippage_ratio)) + 1
+        slippage_cap = token_reserve - floor_reserve
+        if slippage_cap <= 0:
+            raise ValueError(f"Slippage limit of {max_slippage * 100}% allows no tokens at the current price")
+        if quote['token_units'] <= slippage_cap:
+            quote['limited_by'] = 'budget'
+            return quote
+        
+        capped = self.calculate_buy_price(current_supply, current_algo_reserve, slippage_cap / self.unit)
+        capped['limited_by'] = 'slippage'
+        return capped
+    
+    def quote_many(self, current_supply: float, current_algo_reserve: float, amounts: Sequence[float],
+                   side: str = 'buy') -> Dict[str, List[Optional[float]]]:
+        """Price many trade sizes with the same integer rounding as real trades"""
+        if side not in ('buy', 'sell'):
+            raise ValueError(f"Unknown side '{side}'")
+        price = self.get_current_price(current_supply, current_algo_reserve)
+        calculate = self.calculate_buy_price if side == 'buy' else self.calculate_sell_price
+        quotes = {'algo': [], 'avg_price': [], 'new_price': [], 'price_impact': []}
+        for x in amounts:
+            x = float(x)
+            try:
+                result = calculate(current_supply, current_algo_reserve, x) if x > 0 else None
+            except ValueError:
+                result = None
+            if result is None or result['token_units'] == 0:
+                for values in quotes.values():
+                    values.append(None)
+                continue
+            algo = result['microalgos'] / self.MICROALGOS_PER_ALGO
+            impact = (result['new_price'] - price) / price * 100
+            quotes['algo'].append(algo)
+            quotes['avg_price'].append(algo / x)
+            quotes['new_price'].append(result['new_price'])
+            quotes['price_impact'].append(impact if side == 'buy' else -impact)
+        return quotes
+    
+    def get_current_price(self, current_supply: float, current_algo_reserve: float) -> float:
+        """Get current price from state"""
+        token_reserve, algo_reserve = self._reserves(current_supply, current_algo_reserve)
+        if token_reserve <= 0:
+            return self.initial_price
+        return (algo_reserve * self.unit) / (token_reserve * self.MICROALGOS_PER_ALGO)
+
+
 class BondingCurveState:
     """Current state of bonding curve"""
     
+    # Typed columns in the tokens table holding the state
+    COLUMNS = ('curve_token_supply', 'curve_algo_reserve')
+    
+    __slots__ = ('token_supply', 'algo_reserve')
+    
     def __init__(self, token_supply: float = 0, algo_reserve: float = 0):
         self.token_supply = token_supply
         self.algo_reserve = algo_reserve
@@ -193,4 +625,12 @@ class BondingCurveState:
             token_supply=data.get('token_supply', 0),
             algo_reserve=data.get('algo_reserve', 0)
         )
-
+    
+    def to_row(self) -> Tuple[float, float]:
+        """Convert to values for the typed tokens columns, in COLUMNS order"""
+        return (self.token_supply, self.algo_reserve)
+    
+    @classmethod
+    def from_row(cls, row: Sequence[float]) -> 'BondingCurveState':
+        """Create from typed tokens column values, in COLUMNS order"""
+        return cls(token_supply=row[0], algo_reserve=row[1])
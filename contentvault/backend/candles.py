@@ -0,0 +1,72 @@
+"""
+OHLCV candle engine
+Keeps 1m/5m/1h/1d candles per token up to date from the trade hook, so charts
+read a bounded number of buckets instead of replaying raw trades
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+# Interval name -> bucket width in seconds
+INTERVALS = {'1m': 60, '5m': 300, '1h': 3600, '1d': 86400}
+
+MAX_CANDLES = 1000
+
+CANDLE_RANGE_SQL = '''
+    SELECT bucket_start, open, high, low, close, volume, volume_algo, trade_count
+    FROM candles
+    WHERE asa_id = ? AND interval = ? AND bucket_start >= ? AND bucket_start < ?
+    ORDER BY bucket_start DESC
+    LIMIT ?
+'''
+
+
+def _epoch(created_at: str) -> int:
+    """Unix seconds for a trades.created_at value (UTC, 'YYYY-MM-DD HH:MM:SS')"""
+    return int(datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc).timestamp())
+
+
+def update_candles(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """Trade hook: fold one trade into every interval's current candle"""
+    price = trade['price']
+    timestamp = _epoch(trade['created_at'])
+    conn.executemany('''
+        INSERT INTO candles
+            (asa_id, interval, bucket_start, open, high, low, close, volume, volume_algo, trade_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (asa_id, interval, bucket_start) DO UPDATE SET
+            high = MAX(high, excluded.high),
+            low = MIN(low, excluded.low),
+            close = excluded.close,
+            volume = volume + excluded.volume,
+            volume_algo = volume_algo + excluded.volume_algo,
+            trade_count = trade_count + 1
+    ''', [(trade['asa_id'], interval, timestamp - timestamp % seconds, price, price, price, price,
+           trade['amount'], trade.get('total_value') or 0)
+          for interval, seconds in INTERVALS.items()])
+
+
+def get_candles(conn: sqlite3.Connection, asa_id: int, interval: str, start: Optional[int] = None,
+                end: Optional[int] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    Candles for a token in ascending time order
+
+    `start` and `end` are unix seconds (end exclusive); when more than `limit`
+    buckets fall in the range the most recent ones are returned.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval '{interval}', use one of {', '.join(INTERVALS)}")
+    limit = max(1, min(int(limit), MAX_CANDLES))
+    rows = conn.execute(CANDLE_RANGE_SQL, (asa_id, interval, start or 0,
+                                           end if end is not None else 2 ** 62, limit)).fetchall()
+    return [{
+        "time": bucket_start,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+        "volume_algo": volume_algo,
+        "trades": trade_count
+    } for bucket_start, open_, high, low, close, volume, volume_algo, trade_count in reversed(rows)]
@@ -0,0 +1,137 @@
+"""
+Algod chain context
+Holds the backend's signing account, derived from its mnemonic once, and the
+network's suggested transaction params, cached for a few rounds and refreshed
+in the background so sending a transaction doesn't first wait on algod
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from algosdk import account, mnemonic
+from algosdk.transaction import SuggestedParams
+from algosdk.v2client import algod
+
+logger = logging.getLogger(__name__)
+
+# Average block time, used to turn elapsed seconds into rounds
+ROUND_SECONDS = 3.3
+# Cached params are refreshed once they are this many rounds old
+PARAMS_TTL_ROUNDS = 10
+# Stop handing out params this many rounds before their validity window closes
+VALIDITY_MARGIN_ROUNDS = 50
+# Length of a transaction lease
+LEASE_BYTES = 32
+
+
+def unique_lease() -> bytes:
+    """
+    A random lease for one transaction
+
+    Transactions built from the same cached params are otherwise identical
+    when their fields match (two equal buys in the same rounds), so they
+    would share a txid and algod would accept only one. A random lease keeps
+    each txid distinct without shortening its validity window.
+    """
+    return os.urandom(LEASE_BYTES)
+
+
+class ChainContext:
+    """
+    Signing key and suggested params shared by every algod interaction
+
+    `client_factory` returns the current algod client, so the context keeps
+    working after a forked worker re-creates it.
+    """
+
+    def __init__(self, client_factory: Callable[[], algod.AlgodClient], signer_mnemonic: str,
+                 ttl_rounds: int = PARAMS_TTL_ROUNDS):
+        self._client_factory = client_factory
+        self._mnemonic = signer_mnemonic
+        self.ttl_rounds = ttl_rounds
+        self._private_key: Optional[str] = None
+        self._address: Optional[str] = None
+        self._params: Optional[SuggestedParams] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def private_key(self) -> str:
+        """The signing account's private key"""
+        if self._private_key is None:
+            self._private_key = mnemonic.to_private_key(self._mnemonic)
+        return self._private_key
+
+    @property
+    def address(self) -> str:
+        """The signing account's address"""
+        if self._address is None:
+            self._address = account.address_from_private_key(self.private_key)
+        return self._address
+
+    def _rounds_since_fetch(self) -> float:
+        return (time.monotonic() - self._fetched_at) / ROUND_SECONDS
+
+    def _fresh(self) -> bool:
+        if self._params is None:
+            return False
+        age = self._rounds_since_fetch()
+        return age < self.ttl_rounds and self._params.first + age < self._params.last - VALIDITY_MARGIN_ROUNDS
+
+    def refresh(self) -> SuggestedParams:
+        """Fetch suggested params from algod and cache them"""
+        params = self._client_factory().suggested_params()
+        with self._lock:
+            self._params = params
+            self._fetched_at = time.monotonic()
+        return params
+
+    def suggested_params(self) -> SuggestedParams:
+        """
+        A private copy of the cached suggested params
+
+        Only goes to algod when the cache is empty or stale, which normally
+        means the background refresher isn't running in this process.
+        """
+        params = self._params if self._fresh() else self.refresh()
+        return copy.copy(params)
+
+    def _run(self):
+        interval = self.ttl_rounds * ROUND_SECONDS / 2
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing suggested params: {e}")
+            if self._stop.wait(interval):
+                return
+
+    def start(self):
+        """Start the refresh thread if it is not already running in this process"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='chain-context', daemon=True)
+        self._thread.start()
+        logger.info(f"⛓️ Chain context refresher started (every {self.ttl_rounds} rounds)")
+
+    @property
+    def running(self) -> bool:
+        """Whether the refresh thread is alive in this process"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Signal the refresh thread to exit"""
+        self._stop.set()
+
+    def after_fork(self):
+        """Drop the lock and thread handle inherited from the parent process"""
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
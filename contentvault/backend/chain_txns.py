@@ -0,0 +1,349 @@
+"""
+Chain transaction tracking
+Handlers sign and submit transactions and return the txid right away; a
+background confirmer polls algod for every pending transaction in batches,
+records the outcome in chain_txns and runs the handler registered for the
+transaction's kind, so no request thread waits on block confirmation
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod, indexer
+
+from database import db_connection
+from response_cache import bump_data_version
+from service_lease import ServiceLease
+
+logger = logging.getLogger(__name__)
+
+TXN_PENDING = 'pending'
+TXN_CONFIRMED = 'confirmed'
+TXN_FAILED = 'failed'
+
+# Seconds between polls while transactions are pending
+POLL_INTERVAL = 1.0
+# Seconds between checks for newly submitted transactions when none are pending
+IDLE_INTERVAL = 5.0
+# Pending transactions looked up per poll
+BATCH_SIZE = 64
+# Seconds wait_for() gives a transaction to confirm (about 6 rounds)
+CONFIRM_TIMEOUT = 20.0
+
+TXN_COLUMNS = ('txid', 'kind', 'status', 'payload', 'last_valid_round', 'confirmed_round', 'asset_id',
+               'error', 'submitted_at', 'updated_at')
+
+PENDING_TXNS_SQL = '''
+    SELECT txid, last_valid_round FROM chain_txns
+    WHERE status = 'pending' ORDER BY submitted_at LIMIT ?
+'''
+
+_txn_handlers: Dict[str, Callable[[sqlite3.Connection, Dict[str, Any]], None]] = {}
+
+
+class TxnFailed(RuntimeError):
+    """A tracked transaction was rejected or expired before confirming"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def register_txn_handler(kind: str, handler: Callable[[sqlite3.Connection, Dict[str, Any]], None]):
+    """
+    Run `handler(conn, txn)` once a transaction of `kind` confirms or fails
+
+    The handler sees the settled chain_txns row (payload decoded) and runs in
+    the same transaction as the status change, so its writes commit with it.
+    """
+    _txn_handlers[kind] = handler
+
+
+def get_txn(conn: sqlite3.Connection, txid: str) -> Optional[Dict[str, Any]]:
+    """A tracked transaction's row with its payload decoded, or None"""
+    row = conn.execute(f"SELECT {', '.join(TXN_COLUMNS)} FROM chain_txns WHERE txid = ?", (txid,)).fetchone()
+    if row is None:
+        return None
+    txn = dict(zip(TXN_COLUMNS, row))
+    txn['payload'] = json.loads(txn['payload']) if txn['payload'] else None
+    return txn
+
+
+def settle_txn(conn: sqlite3.Connection, txid: str, status: str, confirmed_round: Optional[int] = None,
+               asset_id: Optional[int] = None, error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Move a pending transaction to confirmed or failed and run its handler
+
+    Returns the settled row, or None if the transaction was already settled,
+    e.g. by another worker's confirmer.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        cursor = conn.execute('''
+            UPDATE chain_txns SET status = ?, confirmed_round = ?, asset_id = ?, error = ?, updated_at = ?
+            WHERE txid = ? AND status = 'pending'
+        ''', (status, confirmed_round, asset_id, error, _now(), txid))
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return None
+        txn = get_txn(conn, txid)
+        handler = _txn_handlers.get(txn['kind'])
+        if handler:
+            handler(conn, txn)
+        bump_data_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return txn
+
+
+class TxnConfirmer:
+    """
+    Background thread that settles pending chain transactions
+
+    `client_factory` returns the current algod client, so the confirmer keeps
+    working after a forked worker re-creates it. `indexer_factory` does the
+    same for the indexer used to settle transactions past their validity
+    window; without one they stay pending.
+
+    The thread runs in every server worker, but only the one holding the
+    txn-confirmer lease polls algod, so each pending transaction is checked
+    and settled once. Workers that don't hold it see settlements in the
+    database (wait_for re-reads the row every interval).
+    """
+
+    def __init__(self, client_factory: Callable[[], algod.AlgodClient],
+                 indexer_factory: Optional[Callable[[], indexer.IndexerClient]] = None,
+                 interval: float = POLL_INTERVAL):
+        self.client_factory = client_factory
+        self.indexer_factory = indexer_factory
+        self.interval = interval
+        self.lease = ServiceLease('txn-confirmer')
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._settled = threading.Condition()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_settle_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """
+        Call `listener(txn)` after this process's confirmer commits a settled transaction
+
+        Only the process holding the lease settles, so listeners must not be
+        the only way other workers learn of a settlement.
+        """
+        self._listeners.append(listener)
+
+    def submit(self, conn: sqlite3.Connection, signed_txn, kind: str,
+               payload: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Track a signed transaction as pending and send it to algod
+
+        Commits the caller's connection. Returns the txid without waiting for
+        confirmation; a transaction algod refuses is stored as failed and the
+        error re-raised.
+        """
+        txid = signed_txn.get_txid()
+        now = _now()
+        conn.execute('''
+            INSERT INTO chain_txns (txid, kind, status, payload, last_valid_round, submitted_at, updated_at)
+            VALUES (?, ?, 'pending', ?, ?, ?, ?)
+        ''', (txid, kind, json.dumps(payload) if payload is not None else None,
+              signed_txn.transaction.last_valid_round, now, now))
+        conn.commit()
+        try:
+            self.client_factory().send_transaction(signed_txn)
+        except Exception as e:
+            conn.execute("UPDATE chain_txns SET status = 'failed', error = ?, updated_at = ? WHERE txid = ?",
+                         (str(e), _now(), txid))
+            conn.commit()
+            raise
+        self.wake()
+        logger.info(f"📤 Submitted {kind} transaction {txid}")
+        return txid
+
+    def submit_group(self, conn: sqlite3.Connection, signed_txns: List, kind: str,
+                     payloads: List[Optional[Dict[str, Any]]]) -> List[str]:
+        """
+        Send an atomic group and track each member as its own pending transaction
+
+        Members are only recorded once algod accepts the group: a rejected
+        group is rebuilt with a new group id, which changes every txid. Commits
+        the caller's connection and returns the members' txids in order.
+        """
+        self.client_factory().send_transactions(signed_txns)
+        txids = [signed_txn.get_txid() for signed_txn in signed_txns]
+        now = _now()
+        conn.executemany('''
+            INSERT INTO chain_txns (txid, kind, status, payload, last_valid_round, submitted_at, updated_at)
+            VALUES (?, ?, 'pending', ?, ?, ?, ?)
+        ''', [(txid, kind, json.dumps(payload) if payload is not None else None,
+               signed_txn.transaction.last_valid_round, now, now)
+              for txid, signed_txn, payload in zip(txids, signed_txns, payloads)])
+        conn.commit()
+        self.wake()
+        logger.info(f"📤 Submitted group of {len(txids)} {kind} transactions")
+        return txids
+
+    def record_rejected(self, conn: sqlite3.Connection, signed_txn, kind: str, payload: Optional[Dict[str, Any]],
+                        error: str):
+        """Record a transaction algod refused as failed, so its outcome can still be looked up"""
+        now = _now()
+        conn.execute('''
+            INSERT OR REPLACE INTO chain_txns
+                (txid, kind, status, payload, last_valid_round, error, submitted_at, updated_at)
+            VALUES (?, ?, 'failed', ?, ?, ?, ?, ?)
+        ''', (signed_txn.get_txid(), kind, json.dumps(payload) if payload is not None else None,
+              signed_txn.transaction.last_valid_round, error, now, now))
+        conn.commit()
+
+    def _check(self, client: algod.AlgodClient, txid: str, last_valid_round: Optional[int],
+               last_round: Optional[int]):
+        """The (status, confirmed_round, asset_id, error) algod reports for a transaction"""
+        try:
+            info = client.pending_transaction_info(txid)
+        except AlgodHTTPError as e:
+            # Unknown to the node: either dropped from the pool or confirmed long enough ago
+            # to have left algod's cache. Only the indexer can tell once the window has passed.
+            if e.code == 404 and last_round is not None and last_valid_round and last_round > last_valid_round:
+                return self._check_indexer(txid, last_valid_round)
+            if e.code == 404:
+                return TXN_PENDING, None, None, None
+            raise
+        if info.get('confirmed-round'):
+            return TXN_CONFIRMED, info['confirmed-round'], info.get('asset-index'), None
+        if info.get('pool-error'):
+            return TXN_FAILED, None, None, info['pool-error']
+        return TXN_PENDING, None, None, None
+
+    def _check_indexer(self, txid: str, last_valid_round: int):
+        """
+        Settle a transaction past its validity window from the indexer
+
+        It is only failed once an indexer caught up past `last_valid_round`
+        has no record of it; without an indexer it stays pending.
+        """
+        if self.indexer_factory is None:
+            return TXN_PENDING, None, None, None
+        result = self.indexer_factory().search_transactions(txid=txid)
+        if result.get('transactions'):
+            found = result['transactions'][0]
+            return TXN_CONFIRMED, found['confirmed-round'], found.get('created-asset-index'), None
+        if result.get('current-round', 0) <= last_valid_round:
+            return TXN_PENDING, None, None, None
+        return TXN_FAILED, None, None, 'Transaction expired before confirming'
+
+    def poll(self) -> int:
+        """Look up one batch of pending transactions and settle those that finished"""
+        with db_connection() as conn:
+            pending = conn.execute(PENDING_TXNS_SQL, (BATCH_SIZE,)).fetchall()
+            if not pending:
+                return 0
+            client = self.client_factory()
+            last_round = client.status().get('last-round')
+            settled = 0
+            for txid, last_valid_round in pending:
+                try:
+                    status, confirmed_round, asset_id, error = self._check(client, txid, last_valid_round, last_round)
+                    if status == TXN_PENDING:
+                        continue
+                    txn = settle_txn(conn, txid, status, confirmed_round, asset_id, error)
+                    if txn is None:
+                        continue
+                    settled += 1
+                    logger.info(f"{'✅' if status == TXN_CONFIRMED else '❌'} Transaction {txid} {status}"
+                                f"{f' in round {confirmed_round}' if confirmed_round else f': {error}'}")
+                    for listener in self._listeners:
+                        listener(txn)
+                except Exception as e:
+                    logger.error(f"Error checking transaction {txid}: {e}")
+        if settled:
+            with self._settled:
+                self._settled.notify_all()
+        return settled
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            if not self.lease.held():
+                self._stop.wait(IDLE_INTERVAL)
+                continue
+            try:
+                with db_connection() as conn:
+                    has_pending = conn.execute(PENDING_TXNS_SQL, (1,)).fetchone() is not None
+                if has_pending:
+                    self.poll()
+            except Exception as e:
+                logger.error(f"Error polling pending transactions: {e}")
+                has_pending = False
+            self._wake.wait(self.interval if has_pending else IDLE_INTERVAL)
+        self.lease.release()
+
+    def wake(self):
+        """Poll now rather than at the next interval"""
+        self._wake.set()
+
+    def wait_for(self, txid: str, timeout: float = CONFIRM_TIMEOUT) -> Dict[str, Any]:
+        """
+        Block until a tracked transaction confirms and return its row
+
+        Raises TxnFailed if it fails and TimeoutError if it is still pending
+        after `timeout` seconds. Polls algod itself when the confirmer thread
+        isn't running in this process.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with db_connection() as conn:
+                txn = get_txn(conn, txid)
+            if txn is None:
+                raise LookupError(f"Unknown transaction {txid}")
+            if txn['status'] == TXN_CONFIRMED:
+                return txn
+            if txn['status'] == TXN_FAILED:
+                raise TxnFailed(txn['error'] or f"Transaction {txid} failed")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Transaction {txid} not confirmed after {timeout}s")
+            if not self.running:
+                self.poll()
+            self.wait_for_settled(min(remaining, self.interval))
+
+    def wait_for_settled(self, timeout: float):
+        """Sleep until this process's confirmer settles a transaction or `timeout` passes"""
+        with self._settled:
+            self._settled.wait(timeout)
+
+    def start(self):
+        """Start the confirmer thread if it is not already running in this process"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='txn-confirmer', daemon=True)
+        self._thread.start()
+        logger.info("📬 Transaction confirmer started")
+
+    @property
+    def running(self) -> bool:
+        """Whether the confirmer thread is alive in this process"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Signal the confirmer thread to exit"""
+        self._stop.set()
+        self._wake.set()
+
+    def after_fork(self):
+        """Drop the synchronization state and thread handle inherited from the parent process"""
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._settled = threading.Condition()
+        self.lease.after_fork()
+
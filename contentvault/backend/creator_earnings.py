@@ -0,0 +1,87 @@
+"""
+Creator earnings
+Running creator fee totals per token and per creator, with daily per-token
+buckets for earnings history, maintained by the trade hook
+"""
+
+import sqlite3
+from typing import Dict, Any, List, Optional
+
+from trader_stats import timeframe_cutoff
+
+# Every token a creator launched with its running fee total
+CREATOR_TOKENS_SQL = '''
+    SELECT asa_id, token_name, token_symbol, total_creator_fees
+    FROM tokens
+    WHERE creator = ?
+'''
+
+# History bucket name -> SQLite expression grouping creator_earnings_daily.day
+BUCKETS = {
+    'day': 'day',
+    'week': "DATE(day, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m-01', day)",
+}
+
+
+def update_creator_earnings(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """Trade hook: add the trade's creator fee to the token, creator and daily totals"""
+    creator_fee = trade.get('creator_fee') or 0
+    row = conn.execute('UPDATE tokens SET total_creator_fees = total_creator_fees + ? WHERE asa_id = ? '
+                       'RETURNING creator', (creator_fee, trade['asa_id'])).fetchone()
+    if row is None:
+        return
+    creator = row[0]
+    conn.execute('''
+        INSERT INTO creator_earnings_daily (creator, day, asa_id, fees, volume, trade_count)
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT (creator, day, asa_id) DO UPDATE SET
+            fees = fees + excluded.fees,
+            volume = volume + excluded.volume,
+            trade_count = trade_count + 1
+    ''', (creator, trade['created_at'][:10], trade['asa_id'], creator_fee, trade.get('total_value') or 0))
+    conn.execute('''
+        INSERT INTO creator_earnings (creator, total_fees, trade_count) VALUES (?, ?, 1)
+        ON CONFLICT (creator) DO UPDATE SET
+            total_fees = total_fees + excluded.total_fees,
+            trade_count = trade_count + 1
+    ''', (creator, creator_fee))
+
+
+def creator_earnings(conn: sqlite3.Connection, creator: str) -> Dict[str, Any]:
+    """A creator's total fee earnings and the per-token breakdown"""
+    earnings_by_token = [{
+        "asa_id": asa_id,
+        "token_name": token_name,
+        "token_symbol": token_symbol,
+        "earned_algo": earned or 0
+    } for asa_id, token_name, token_symbol, earned in conn.execute(CREATOR_TOKENS_SQL, (creator,))]
+    return {
+        "total_earnings": sum(token["earned_algo"] for token in earnings_by_token),
+        "earnings_by_token": earnings_by_token
+    }
+
+
+def creator_totals(conn: sqlite3.Connection, creator: str) -> Dict[str, Any]:
+    """A creator's lifetime fee total and number of trades across all their tokens"""
+    row = conn.execute('SELECT total_fees, trade_count FROM creator_earnings WHERE creator = ?', (creator,)).fetchone()
+    total_fees, trade_count = row or (0, 0)
+    return {"total_earnings": total_fees, "trade_count": trade_count}
+
+
+def earnings_history(conn: sqlite3.Connection, creator: str, bucket: str = 'day', timeframe: str = '30d',
+                     asa_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Creator fee earnings per day, week or month, optionally for one token"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unsupported bucket '{bucket}', use one of {', '.join(BUCKETS)}")
+    token_filter = 'AND asa_id = ?' if asa_id is not None else ''
+    params = (creator, timeframe_cutoff(timeframe)) + ((asa_id,) if asa_id is not None else ())
+    rows = conn.execute(f'''
+        SELECT {BUCKETS[bucket]} AS period, TOTAL(fees), TOTAL(volume), SUM(trade_count)
+        FROM creator_earnings_daily
+        WHERE creator = ? AND day >= ? {token_filter}
+        GROUP BY period
+        ORDER BY period
+    ''', params)
+    return [{"period": period, "earned_algo": fees, "volume": volume, "trade_count": trade_count}
+            for period, fees, volume, trade_count in rows]
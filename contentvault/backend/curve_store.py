@@ -0,0 +1,180 @@
+"""
+Bonding curve persistence
+Loads and saves curve parameters and state through the typed curve_* columns
+of the tokens table
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from bonding_curve import BondingCurve, BondingCurveState
+
+CURVE_COLUMNS = BondingCurve.COLUMNS + BondingCurveState.COLUMNS
+_CURVE_WIDTH = len(BondingCurve.COLUMNS)
+
+
+class CurveRecord:
+    """A token's bonding curve together with the token fields trades need"""
+    
+    __slots__ = ('asa_id', 'curve', 'state', 'current_price', 'total_supply', 'creator', 'version')
+    
+    def __init__(self, asa_id: int, curve: Optional[BondingCurve], state: Optional[BondingCurveState],
+                 current_price: float, total_supply: float, creator: Optional[str], version: int = 0):
+        self.asa_id = asa_id
+        self.curve = curve
+        self.state = state
+        self.current_price = current_price or 0
+        self.total_supply = total_supply
+        self.creator = creator
+        self.version = version
+
+
+def load_curve(conn: sqlite3.Connection, asa_id: int) -> Optional[CurveRecord]:
+    """
+    Load a token's curve from the database
+    
+    Returns None if the token does not exist. The record's curve and state are
+    None when the token has no bonding curve yet.
+    """
+    row = conn.execute(f'''
+        SELECT current_price, total_supply, creator, curve_version, {', '.join(CURVE_COLUMNS)}
+        FROM tokens WHERE asa_id = ?
+    ''', (asa_id,)).fetchone()
+    if row is None:
+        return None
+    
+    current_price, total_supply, creator, version = row[:4]
+    values = row[4:]
+    curve = state = None
+    if values[0] is not None:
+        curve = BondingCurve.from_row(values[:_CURVE_WIDTH])
+        state = BondingCurveState.from_row(values[_CURVE_WIDTH:])
+    return CurveRecord(asa_id, curve, state, current_price, total_supply, creator, version)
+
+
+def save_curve(conn: sqlite3.Connection, asa_id: int, curve: BondingCurve, state: BondingCurveState):
+    """Store a newly initialized curve and its starting state"""
+    assignments = ', '.join(f'{column} = ?' for column in CURVE_COLUMNS)
+    conn.execute(f'UPDATE tokens SET {assignments}, curve_version = curve_version + 1 WHERE asa_id = ?',
+                 curve.to_row() + state.to_row() + (asa_id,))
+
+
+def save_state(conn: sqlite3.Connection, asa_id: int, state: BondingCurveState, current_price: float,
+               expected_version: int) -> bool:
+    """
+    Store the curve state after a trade along with the token's new price
+
+    The write only applies if the row is still at `expected_version`
+    (compare-and-swap). Returns False if another writer got there first.
+    """
+    cursor = conn.execute('''
+        UPDATE tokens
+        SET curve_token_supply = ?, curve_algo_reserve = ?, current_price = ?, market_cap = ?,
+            curve_version = curve_version + 1
+        WHERE asa_id = ? AND curve_version = ?
+    ''', state.to_row() + (current_price, state.token_supply * current_price, asa_id, expected_version))
+    return cursor.rowcount == 1
+
+
+
+class CurveCache:
+    """
+    In-process LRU cache of token curves
+
+    Curve parameters never change after creation and the state only moves on
+    trades, so records are kept in memory and updated after each committed
+    trade (write-through). Trades on a token hold that token's lock around the
+    read-price-write section so they serialize. The cache is per process, so
+    a record can be stale if another process traded the token: reads check
+    the row's curve_version and reload on a mismatch, and the versioned
+    save_state rejects writes priced off a stale record.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._records: 'OrderedDict[int, CurveRecord]' = OrderedDict()
+        self._token_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def token_lock(self, asa_id: int):
+        """Serialize trades on one token within this process"""
+        asa_id = int(asa_id)
+        with self._lock:
+            lock = self._token_locks.setdefault(asa_id, threading.Lock())
+        with lock:
+            yield
+
+    def get(self, asa_id: int, connect: Callable[[], sqlite3.Connection],
+            revalidate: bool = True) -> Optional[CurveRecord]:
+        """
+        Cached record for a token, loading it on a miss
+
+        A hit is revalidated against the row's curve_version (a primary key
+        lookup) and reloaded if another process has moved the curve since.
+        Callers protected by the versioned save_state can skip that with
+        `revalidate=False`, in which case `connect` is only called on a miss.
+        Missing tokens are not cached.
+        """
+        asa_id = int(asa_id)
+        with self._lock:
+            record = self._records.get(asa_id)
+            if record is not None:
+                self._records.move_to_end(asa_id)
+        if record is not None:
+            if not revalidate:
+                return record
+            row = connect().execute('SELECT curve_version FROM tokens WHERE asa_id = ?', (asa_id,)).fetchone()
+            if row is not None and row[0] == record.version:
+                return record
+            self.invalidate(asa_id)
+            if row is None:
+                return None
+
+        record = load_curve(connect(), asa_id)
+        if record is not None:
+            self._put(record)
+        return record
+
+    def _put(self, record: CurveRecord):
+        with self._lock:
+            self._records[record.asa_id] = record
+            self._records.move_to_end(record.asa_id)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def store_curve(self, asa_id: int, curve: BondingCurve, state: BondingCurveState):
+        """Record a newly initialized curve after its row has been committed"""
+        asa_id = int(asa_id)
+        with self._lock:
+            record = self._records.get(asa_id)
+        if record is None:
+            return
+        self._put(CurveRecord(asa_id, curve, state, record.current_price, record.total_supply, record.creator,
+                              record.version + 1))
+
+    def store_state(self, asa_id: int, state: BondingCurveState, current_price: float, version: int):
+        """Record a trade's new state and curve version after it has been committed"""
+        asa_id = int(asa_id)
+        with self._lock:
+            record = self._records.get(asa_id)
+        if record is None:
+            return
+        self._put(CurveRecord(asa_id, record.curve, state, current_price, record.total_supply, record.creator,
+                              version))
+
+    def invalidate(self, asa_id: int):
+        """Drop a token so the next read reloads it from the database"""
+        with self._lock:
+            self._records.pop(int(asa_id), None)
+
+    def clear(self):
+        """Drop every cached record"""
+        with self._lock:
+            self._records.clear()
+
+
+curve_cache = CurveCache()
@@ -0,0 +1,213 @@
+"""
+SQLite connection layer for the backend
+Pooled, WAL-mode connections shared by every route handler
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+import dataclasses
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from flask import g
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv('DATABASE_PATH', 'creatorvault.db')
+
+# Connection tuning applied to every pooled connection.
+# WAL lets readers keep running while a writer commits, and NORMAL sync is
+# durable in WAL mode (only the last transaction can be lost on power failure).
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,        # negative = KiB, so ~16 MB page cache per connection
+    'mmap_size': 268435456,      # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,        # ms to wait on a locked database before SQLITE_BUSY
+}
+
+
+class ConnectionPool:
+    """
+    Pool of SQLite connections with per-thread affinity
+
+    A thread that already holds a connection gets the same one back, so nested
+    helpers share the caller's transaction. Released connections are parked in
+    an idle list and handed to the next thread instead of reopening the file.
+    """
+
+    def __init__(self, path: str = DB_PATH, max_idle: int = 8, pragmas: Optional[Dict] = None):
+        self.path = path
+        self.max_idle = max_idle
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and tune a new connection"""
+        conn = sqlite3.connect(self.path, timeout=self.pragmas.get('busy_timeout', 5000) / 1000,
+                               check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _check_fork(self):
+        """Drop connections inherited from a parent process"""
+        if self._pid != os.getpid():
+            self.after_fork()
+
+    def after_fork(self):
+        """
+        Forget every connection inherited across fork()
+
+        SQLite connections must not be used in two processes, so they are
+        dropped without closing (closing would touch the parent's handles).
+        """
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def acquire(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, taking one from the pool if needed"""
+        self._check_fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool once the outermost holder is done"""
+        if getattr(self._local, 'conn', None) is not conn:
+            conn.close()
+            return
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+
+        # Never hand an open transaction to the next request
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+pool = ConnectionPool()
+
+
+@contextmanager
+def db_connection():
+    """Pooled connection for code running outside a request (startup, workers)"""
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def get_db() -> sqlite3.Connection:
+    """Request-scoped connection stored on flask.g"""
+    if 'db' not in g:
+        g.db = pool.acquire()
+    return g.db
+
+
+def close_db(exc=None):
+    """Return the request's connection to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def init_app(app):
+    """Register the request teardown that releases pooled connections"""
+    app.teardown_appcontext(close_db)
+
+
+def _is_full_scan(detail: str) -> bool:
+    """
+    Whether an EXPLAIN QUERY PLAN detail visits every row of a table or index
+
+    Walking a whole index ("SCAN t USING [COVERING] INDEX ...") counts, since
+    it reads as many rows as the table. Rowid scans, constrained scans and
+    scans of a materialized subquery or a constant row don't.
+    """
+    if not detail.startswith('SCAN '):
+        return False
+    if detail.startswith(('SCAN CONSTANT ROW', 'SCAN (subquery')):
+        return False
+    return not ('USING INTEGER PRIMARY KEY' in detail or '(rowid' in detail or '=' in detail)
+
+
+def audit_query_plans(conn: sqlite3.Connection, queries: Dict[str, str]) -> List[str]:
+    """
+    Run EXPLAIN QUERY PLAN on each named query and log full table and index scans
+
+    Placeholders are bound to NULL since the plan does not depend on values.
+    Returns the names of queries that scan a whole table or index.
+    """
+    full_scans = []
+    for name, sql in queries.items():
+        try:
+            plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', (None,) * sql.count('?')).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not explain query '{name}': {e}")
+            continue
+
+        scans = [row[3] for row in plan if _is_full_scan(row[3])]
+        if scans:
+            full_scans.append(name)
+            logger.warning(f"⚠️ Full table scan in hot query '{name}': {'; '.join(scans)}")
+    return full_scans
+
+
+@lru_cache(maxsize=None)
+def _model_fields(model: Type) -> Tuple[str, ...]:
+    return tuple(field.name for field in dataclasses.fields(model))
+
+
+def select_models(conn: sqlite3.Connection, model: Type, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+    """
+    Run a query whose rows are built directly into `model` dataclass instances
+
+    The selected columns must match the model's leading fields in order; this
+    is checked once per query so rows can be built positionally. Iterate the
+    returned cursor to stream rows or call fetchall().
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _, row: model(*row)
+    cursor.execute(sql, params)
+
+    columns = tuple(description[0] for description in cursor.description)
+    fields = _model_fields(model)
+    if columns != fields[:len(columns)]:
+        raise ValueError(f"Query columns {columns} do not match {model.__name__} fields {fields}")
+    return cursor
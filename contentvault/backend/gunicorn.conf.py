@@ -0,0 +1,52 @@
+"""
+Gunicorn configuration for the backend
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment (see each line).
+"""
+
+import os
+import multiprocessing
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', 5001)}")
+
+# Processes, each with a pool of threads. Handlers spend much of their time
+# waiting on algod or SQLite, so threads keep a worker busy while one waits.
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 9)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Seconds an idle keep-alive connection stays open (frontends poll often)
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Long enough for algod round trips during token creation and trades
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+
+# Import the app (and run migrations) once in the master, then fork
+preload_app = True
+
+# Worker recycling is opt-in: a recycled worker drops its keep-alive
+# connections mid-poll, and the in-process caches are already bounded
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Give each worker its own connections, clients, caches and background threads"""
+    import app
+
+    app.reset_after_fork()
+    app.start_background_services()
+    server.log.info(f"Worker {worker.pid} ready")
+
+
+def worker_exit(server, worker):
+    """Hand the worker's singleton service leases over instead of letting them expire"""
+    import app
+
+    app.stop_background_services()
@@ -0,0 +1,93 @@
+"""
+JSON serialization for the Flask app
+Uses orjson when it is installed and falls back to Flask's stdlib provider,
+plus a helper to stream large JSON arrays without building them in memory
+"""
+
+import decimal
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Flask, Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Items serialized per chunk when streaming an array
+STREAM_CHUNK_SIZE = 256
+
+
+def _default(value: Any) -> Any:
+    """Types orjson doesn't handle natively"""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson
+
+    Responses are written straight from orjson's bytes. Unlike the stdlib
+    provider, keys keep their insertion order and NaN/Infinity become null.
+    """
+
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=self.OPTIONS),
+                                        mimetype='application/json')
+
+
+def init_app(app: Flask):
+    """Install the fastest available JSON provider on the app"""
+    if orjson is None:
+        logger.info("📦 orjson not installed, using the stdlib JSON provider")
+        app.json = DefaultJSONProvider(app)
+        return
+    app.json = OrjsonProvider(app)
+
+
+def stream_json_array(key: str, items: Iterable[Any], fields: Optional[Dict[str, Any]] = None,
+                      count_key: Optional[str] = 'count') -> Response:
+    """
+    Stream `{**fields, key: [items...], count_key: n}` as it is serialized
+
+    Items are pulled lazily (for example straight off a database cursor) and
+    written in chunks, so large lists never exist as one list or string.
+    The request context stays open until the last chunk is sent.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        head = dumps(fields or {})
+        yield head[:-1] + (',' if len(head) > 2 else '') + dumps(key) + ':['
+        count = 0
+        chunk = []
+        for item in items:
+            chunk.append(dumps(item))
+            count += 1
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield (',' if count > len(chunk) else '') + ','.join(chunk)
+                chunk = []
+        if chunk:
+            yield (',' if count > len(chunk) else '') + ','.join(chunk)
+        yield ']' + (f',{dumps(count_key)}:{count}' if count_key else '') + '}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,159 @@
+"""
+Token market stats maintainer
+Keeps tokens.volume_24h, price_change_24h and holders current: the trade hook
+applies each trade as it is recorded, and a background thread slides the 24h
+window forward from the 5m candles so old trades age out
+"""
+
+import sqlite3
+import threading
+import logging
+import time
+from typing import Dict, Any, Optional
+
+from database import db_connection
+from response_cache import bump_data_version
+from service_lease import ServiceLease
+
+logger = logging.getLogger(__name__)
+
+# Balances at or below this are treated as empty
+HOLDER_DUST = 1e-9
+
+WINDOW_SECONDS = 86400
+WINDOW_INTERVAL = '5m'
+WINDOW_BUCKET_SECONDS = 300
+
+# Seconds between sliding-window refreshes
+REFRESH_INTERVAL = 60
+
+
+def update_market_stats(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """Trade hook: apply one trade to the holder balance and the token's 24h figures"""
+    signed_amount = trade['amount'] if trade['trade_type'] == 'buy' else -trade['amount']
+    balance = conn.execute('''
+        INSERT INTO holders (asa_id, holder_address, balance) VALUES (?, ?, ?)
+        ON CONFLICT (asa_id, holder_address) DO UPDATE SET balance = balance + excluded.balance
+        RETURNING balance
+    ''', (trade['asa_id'], trade['trader_address'], signed_amount)).fetchone()[0]
+    holder_delta = (balance > HOLDER_DUST) - (balance - signed_amount > HOLDER_DUST)
+
+    conn.execute('''
+        UPDATE tokens
+        SET volume_24h = COALESCE(volume_24h, 0) + ?,
+            holders = COALESCE(holders, 1) + CASE WHEN creator = ? THEN 0 ELSE ? END,
+            price_change_24h = CASE WHEN price_24h_ago > 0 THEN (? - price_24h_ago) / price_24h_ago * 100
+                                    ELSE price_change_24h END
+        WHERE asa_id = ?
+    ''', (trade.get('total_value') or 0, trade['trader_address'], holder_delta, trade['price'], trade['asa_id']))
+
+
+def refresh_market_stats(conn: sqlite3.Connection, now: Optional[float] = None) -> int:
+    """
+    Recompute 24h volume and price change from the 5m candles
+
+    The window is aligned to 5-minute buckets. The reference price is the last
+    close before the window, falling back to the curve's launch price for
+    younger tokens. Tokens with nothing in or leaving the window are skipped,
+    and the data version is only bumped if a token's figures actually moved.
+    Returns the number of tokens updated.
+    """
+    now = time.time() if now is None else now
+    cutoff = int(now - WINDOW_SECONDS) // WINDOW_BUCKET_SECONDS * WINDOW_BUCKET_SECONDS
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        rows = conn.execute('''
+            SELECT asa_id, volume_24h, price_24h_ago,
+                   (
+                       SELECT TOTAL(c.volume_algo) FROM candles c
+                       WHERE c.asa_id = tokens.asa_id AND c.interval = ? AND c.bucket_start >= ?
+                   ),
+                   COALESCE((
+                       SELECT c.close FROM candles c
+                       WHERE c.asa_id = tokens.asa_id AND c.interval = ? AND c.bucket_start < ?
+                       ORDER BY c.bucket_start DESC LIMIT 1
+                   ), curve_initial_price, current_price)
+            FROM tokens
+            WHERE price_24h_ago IS NULL OR volume_24h != 0 OR price_change_24h != 0
+        ''', (WINDOW_INTERVAL, cutoff, WINDOW_INTERVAL, cutoff)).fetchall()
+        changed = [(volume, price_24h_ago, asa_id)
+                   for asa_id, old_volume, old_price_24h_ago, volume, price_24h_ago in rows
+                   if (old_volume, old_price_24h_ago) != (volume, price_24h_ago)]
+        conn.executemany('UPDATE tokens SET volume_24h = ?, price_24h_ago = ? WHERE asa_id = ?', changed)
+        repriced = conn.execute('''
+            UPDATE tokens
+            SET price_change_24h = CASE WHEN price_24h_ago > 0
+                                        THEN (current_price - price_24h_ago) / price_24h_ago * 100 ELSE 0 END
+            WHERE price_change_24h != CASE WHEN price_24h_ago > 0
+                                           THEN (current_price - price_24h_ago) / price_24h_ago * 100 ELSE 0 END
+               OR price_change_24h IS NULL
+            RETURNING asa_id
+        ''').fetchall()
+        updated = len({asa_id for _, _, asa_id in changed} | {asa_id for asa_id, in repriced})
+        if updated:
+            bump_data_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
+
+
+class MarketStatsMaintainer:
+    """
+    Background thread that refreshes the sliding 24h window every REFRESH_INTERVAL seconds
+
+    The thread runs in every server worker, but only the one holding the
+    market-stats lease refreshes; the others stand by to take over.
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL):
+        self.interval = interval
+        # Outlives a refresh interval so the holder keeps it between refreshes
+        self.lease = ServiceLease('market-stats', ttl=interval * 3)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def refresh(self):
+        """Run one refresh on a pooled connection, logging rather than raising errors"""
+        try:
+            with db_connection() as conn:
+                updated = refresh_market_stats(conn)
+            logger.debug(f"📈 Refreshed 24h market stats for {updated} tokens")
+        except Exception as e:
+            logger.error(f"Error refreshing market stats: {e}")
+
+    def _run(self):
+        while True:
+            if self.lease.held():
+                self.refresh()
+            if self._stop.wait(self.interval):
+                break
+        self.lease.release()
+
+    def start(self):
+        """Start the refresh thread if it is not already running in this process"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='market-stats', daemon=True)
+        self._thread.start()
+        logger.info(f"📈 Market stats maintainer started (every {self.interval}s)")
+
+    @property
+    def running(self) -> bool:
+        """Whether the refresh thread is alive in this process"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Signal the refresh thread to exit and give up the lease"""
+        self._stop.set()
+
+    def after_fork(self):
+        """Drop the thread handle and lease inherited from the parent process"""
+        self._thread = None
+        self._stop = threading.Event()
+        self.lease.after_fork()
+
+
+market_stats_maintainer = MarketStatsMaintainer()
@@ -0,0 +1,229 @@
+"""
+Initial schema
+Creates every table the backend had before versioned migrations, and brings
+databases created by older builds up to date by adding the columns that used
+to be probed with ALTER TABLE on each start.
+"""
+
+from migrations import add_columns
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    # Create tokens table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asa_id INTEGER UNIQUE NOT NULL,
+            creator TEXT NOT NULL,
+            token_name TEXT NOT NULL,
+            token_symbol TEXT NOT NULL,
+            total_supply INTEGER NOT NULL,
+            current_price REAL NOT NULL,
+            market_cap REAL NOT NULL,
+            volume_24h REAL DEFAULT 0,
+            holders INTEGER DEFAULT 1,
+            price_change_24h REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            youtube_channel_title TEXT,
+            youtube_subscribers INTEGER,
+            video_id TEXT,
+            video_title TEXT
+        )
+    ''')
+    add_columns(conn, 'tokens', [
+        ('bonding_curve_config', 'TEXT'),
+        ('bonding_curve_state', 'TEXT'),
+        ('liquidity_pool_config', 'TEXT'),
+        ('is_amm_migrated', 'INTEGER DEFAULT 0'),
+        ('migration_threshold', 'REAL DEFAULT 0'),
+        ('platform', 'TEXT'),
+        ('content_url', 'TEXT'),
+        ('content_id', 'TEXT'),
+        ('content_description', 'TEXT'),
+        ('content_thumbnail', 'TEXT'),
+    ])
+
+    # Create trades table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asa_id INTEGER NOT NULL,
+            trader_address TEXT NOT NULL,
+            trade_type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            price REAL NOT NULL,
+            transaction_id TEXT NOT NULL,
+            creator_fee REAL DEFAULT 0,
+            platform_fee REAL DEFAULT 0,
+            total_value REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (asa_id) REFERENCES tokens (asa_id)
+        )
+    ''')
+    add_columns(conn, 'trades', [
+        ('creator_fee', 'REAL DEFAULT 0'),
+        ('platform_fee', 'REAL DEFAULT 0'),
+        ('total_value', 'REAL DEFAULT 0'),
+        ('referral_code', 'TEXT'),
+        ('referral_earnings', 'REAL DEFAULT 0'),
+    ])
+
+    # Create referrals table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS referrals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            referrer_address TEXT NOT NULL,
+            referred_address TEXT NOT NULL UNIQUE,
+            referral_code TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            total_earnings REAL DEFAULT 0,
+            total_trades_count INTEGER DEFAULT 0,
+            total_volume REAL DEFAULT 0
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals (referrer_address)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referrals_referred ON referrals (referred_address)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referrals_code ON referrals (referral_code)')
+
+    # Create referral_earnings table for detailed tracking
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS referral_earnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            referrer_address TEXT NOT NULL,
+            referred_address TEXT NOT NULL,
+            trade_id INTEGER NOT NULL,
+            earnings REAL NOT NULL,
+            trade_value REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (trade_id) REFERENCES trades (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_referral_earnings_referrer ON referral_earnings (referrer_address)')
+
+    # Create holders table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS holders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asa_id INTEGER NOT NULL,
+            holder_address TEXT NOT NULL,
+            balance REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (asa_id) REFERENCES tokens (asa_id)
+        )
+    ''')
+
+    # Create YouTube sessions table for persistent auth
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS youtube_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_key TEXT UNIQUE NOT NULL,
+            credentials TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            channel_title TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create predictions table for prediction markets
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id TEXT UNIQUE NOT NULL,
+            creator_address TEXT NOT NULL,
+            content_url TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            metric_type TEXT NOT NULL,
+            target_value REAL NOT NULL,
+            timeframe_hours INTEGER NOT NULL,
+            end_time TIMESTAMP NOT NULL,
+            yes_pool REAL DEFAULT 0,
+            no_pool REAL DEFAULT 0,
+            status TEXT DEFAULT 'active',
+            outcome TEXT,
+            initial_value REAL,
+            final_value REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create prediction_trades table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prediction_trades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id TEXT NOT NULL,
+            trader_address TEXT NOT NULL,
+            side TEXT NOT NULL,
+            amount REAL NOT NULL,
+            odds REAL NOT NULL,
+            potential_payout REAL NOT NULL,
+            transaction_id TEXT,
+            status TEXT DEFAULT 'pending',
+            payout_amount REAL DEFAULT 0,
+            claimed INTEGER DEFAULT 0,
+            claim_txid TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (prediction_id) REFERENCES predictions (prediction_id)
+        )
+    ''')
+    add_columns(conn, 'prediction_trades', [
+        ('claimed', 'INTEGER DEFAULT 0'),
+        ('claim_txid', 'TEXT'),
+    ])
+
+    # Create copy trading profiles table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS copy_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            leader_address TEXT NOT NULL,
+            follower_address TEXT NOT NULL,
+            allocation_percent REAL NOT NULL,
+            max_single_trade_algo REAL NOT NULL,
+            copy_type TEXT DEFAULT 'proportional',
+            risk_level TEXT DEFAULT 'balanced',
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_copy_profiles_leader ON copy_profiles (leader_address)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_copy_profiles_follower ON copy_profiles (follower_address)')
+    add_columns(conn, 'copy_profiles', [
+        ('risk_level', "TEXT DEFAULT 'balanced'"),
+    ])
+
+    # Create bot strategies table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_strategies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner_address TEXT NOT NULL,
+            label TEXT NOT NULL,
+            asa_id INTEGER,
+            token_symbol TEXT,
+            metric_type TEXT NOT NULL,
+            condition TEXT NOT NULL,
+            action TEXT NOT NULL,
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bot_strategies_owner ON bot_strategies (owner_address)')
+
+    # Strategy executions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS strategy_executions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            strategy_id INTEGER NOT NULL,
+            trader_address TEXT NOT NULL,
+            asa_id INTEGER NOT NULL,
+            trade_type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            price REAL NOT NULL,
+            total_value REAL NOT NULL,
+            pnl REAL DEFAULT 0,
+            executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (strategy_id) REFERENCES bot_strategies(id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_strategy_executions_strategy ON strategy_executions (strategy_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_strategy_executions_trader ON strategy_executions (trader_address)')
@@ -0,0 +1,20 @@
+"""
+Indexes for trade, token and prediction access paths
+"""
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    # Trade history per token, newest first (get_trades, creator earnings)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_asa_created ON trades (asa_id, created_at)')
+    # Covering index for per-trader reads (P&L, analytics, portfolio) and the
+    # leaderboard GROUP BY trader_address, so none of them touch the table rows
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trades_trader_created
+        ON trades (trader_address, created_at, trade_type, total_value, asa_id, amount)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_creator ON tokens (creator)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_platform_content ON tokens (platform, content_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_created ON tokens (created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_predictions_status_end ON predictions (status, end_time)')
@@ -0,0 +1,57 @@
+"""
+Backfill bonding curves for tokens created without one
+All rows are written with a single executemany inside the migration's
+transaction instead of one UPDATE per token on every start.
+
+The curve parameters are computed here rather than with BondingCurve, so
+the migration keeps writing what it always wrote as that class changes.
+"""
+
+import json
+
+# BondingCurve defaults when this migration was written
+DEFAULT_INITIAL_PRICE = 0.001
+CURVE_STEEPNESS = 0.5
+
+
+def curve_config(total_supply, current_price):
+    """The bonding_curve_config blob for a token, or None if its supply is unusable"""
+    try:
+        initial_supply = int(total_supply)
+        initial_price = float(current_price) if current_price is not None else 0
+    except (TypeError, ValueError):
+        return None
+    if initial_supply <= 0:
+        return None  # Left for the estimate endpoint to initialize on first use
+    if initial_price <= 0:
+        initial_price = DEFAULT_INITIAL_PRICE
+    virtual_algo_reserve = initial_price * initial_supply * (1 + CURVE_STEEPNESS)
+    return {
+        'initial_price': initial_price,
+        'initial_supply': initial_supply,
+        'virtual_token_reserve': initial_supply,
+        'virtual_algo_reserve': virtual_algo_reserve,
+        'k': initial_supply * virtual_algo_reserve,
+        'curve_steepness': CURVE_STEEPNESS,
+    }
+
+
+def upgrade(conn):
+    rows = conn.execute('''
+        SELECT asa_id, total_supply, current_price
+        FROM tokens
+        WHERE bonding_curve_config IS NULL OR bonding_curve_config = ''
+    ''').fetchall()
+
+    state_json = json.dumps({'token_supply': 0, 'algo_reserve': 0})
+    updates = []
+    for asa_id, total_supply, current_price in rows:
+        config = curve_config(total_supply, current_price)
+        if config is not None:
+            updates.append((json.dumps(config), state_json, asa_id))
+
+    conn.executemany('''
+        UPDATE tokens
+        SET bonding_curve_config = ?, bonding_curve_state = ?
+        WHERE asa_id = ?
+    ''', updates)
@@ -0,0 +1,67 @@
+"""
+Typed bonding curve columns
+Moves curve parameters and state out of the bonding_curve_config and
+bonding_curve_state JSON blobs into numeric columns, so the trade path does
+no JSON work and reserves can be queried directly in SQL. The JSON columns
+are left in place but are no longer read or written.
+
+The blobs are parsed here, with the defaults BondingCurve.from_dict and
+BondingCurveState.from_dict applied when this migration was written, so
+later changes to those classes don't change what it backfills.
+"""
+
+import json
+
+from migrations import add_columns
+
+
+def parse_config(data):
+    """Curve column values (initial price through steepness) from a bonding_curve_config blob"""
+    initial_price = data.get('initial_price', 0.0001)
+    initial_supply = data.get('initial_supply', data.get('virtual_token_reserve', 1000000))
+    virtual_token_reserve = data.get('virtual_token_reserve', initial_supply)
+    virtual_algo_reserve = data.get('virtual_algo_reserve', initial_price * virtual_token_reserve)
+    k = data.get('k', virtual_token_reserve * virtual_algo_reserve)
+    return (initial_price, initial_supply, virtual_token_reserve, virtual_algo_reserve, k,
+            data.get('curve_steepness', 1.0))
+
+
+def parse_state(data):
+    """(token_supply, algo_reserve) from a bonding_curve_state blob"""
+    return data.get('token_supply', 0), data.get('algo_reserve', 0)
+
+
+def upgrade(conn):
+    add_columns(conn, 'tokens', [
+        ('curve_initial_price', 'REAL'),
+        ('curve_initial_supply', 'INTEGER'),
+        ('curve_virtual_token_reserve', 'REAL'),
+        ('curve_virtual_algo_reserve', 'REAL'),
+        ('curve_k', 'REAL'),
+        ('curve_steepness', 'REAL'),
+        ('curve_token_supply', 'REAL DEFAULT 0'),
+        ('curve_algo_reserve', 'REAL DEFAULT 0'),
+    ])
+
+    rows = conn.execute('''
+        SELECT asa_id, bonding_curve_config, bonding_curve_state
+        FROM tokens
+        WHERE bonding_curve_config IS NOT NULL AND bonding_curve_config != ''
+    ''').fetchall()
+
+    updates = []
+    for asa_id, config_json, state_json in rows:
+        try:
+            curve = parse_config(json.loads(config_json))
+            state = parse_state(json.loads(state_json) if state_json else {})
+        except (ValueError, TypeError, AttributeError):
+            continue  # Unreadable blob: the curve is re-initialized on first estimate
+        updates.append(curve + state + (asa_id,))
+
+    conn.executemany('''
+        UPDATE tokens
+        SET curve_initial_price = ?, curve_initial_supply = ?, curve_virtual_token_reserve = ?,
+            curve_virtual_algo_reserve = ?, curve_k = ?, curve_steepness = ?,
+            curve_token_supply = ?, curve_algo_reserve = ?
+        WHERE asa_id = ?
+    ''', updates)
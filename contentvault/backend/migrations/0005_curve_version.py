@@ -0,0 +1,13 @@
+"""
+Curve state version
+Adds a counter bumped on every curve write so trades can update the state
+with a compare-and-swap instead of a blind UPDATE
+"""
+
+from migrations import add_columns
+
+
+def upgrade(conn):
+    add_columns(conn, 'tokens', [
+        ('curve_version', 'INTEGER NOT NULL DEFAULT 0'),
+    ])
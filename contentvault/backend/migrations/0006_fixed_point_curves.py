@@ -0,0 +1,14 @@
+"""
+Per-token curve arithmetic mode
+'float' tokens keep the original floating point curve; 'fixed' tokens price
+in integer microAlgos and token base units with curve_decimals decimals
+"""
+
+from migrations import add_columns
+
+
+def upgrade(conn):
+    add_columns(conn, 'tokens', [
+        ('curve_mode', "TEXT NOT NULL DEFAULT 'float'"),
+        ('curve_decimals', 'INTEGER'),
+    ])
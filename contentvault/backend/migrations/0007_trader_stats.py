@@ -0,0 +1,51 @@
+"""
+Per-trader daily rollups for the leaderboard
+trader_stats holds one row per trader per UTC day, and trader_token_days
+records which tokens a trader touched on each day so distinct token counts
+stay exact across any window. Both are backfilled from existing trades.
+"""
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trader_stats (
+            trader_address TEXT NOT NULL,
+            day TEXT NOT NULL,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            buy_volume REAL NOT NULL DEFAULT 0,
+            sell_volume REAL NOT NULL DEFAULT 0,
+            first_trade_at TIMESTAMP,
+            last_trade_at TIMESTAMP,
+            PRIMARY KEY (trader_address, day)
+        )
+    ''')
+    # Leaderboard reads a day range across all traders
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trader_stats_day
+        ON trader_stats (day, trader_address, trade_count, buy_volume, sell_volume, first_trade_at, last_trade_at)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trader_token_days (
+            trader_address TEXT NOT NULL,
+            asa_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            PRIMARY KEY (trader_address, asa_id, day)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        INSERT OR REPLACE INTO trader_stats
+            (trader_address, day, trade_count, buy_volume, sell_volume, first_trade_at, last_trade_at)
+        SELECT trader_address, DATE(created_at), COUNT(*),
+               TOTAL(CASE WHEN trade_type = 'buy' THEN total_value END),
+               TOTAL(CASE WHEN trade_type = 'sell' THEN total_value END),
+               MIN(created_at), MAX(created_at)
+        FROM trades
+        GROUP BY trader_address, DATE(created_at)
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO trader_token_days (trader_address, asa_id, day)
+        SELECT DISTINCT trader_address, asa_id, DATE(created_at) FROM trades
+    ''')
@@ -0,0 +1,50 @@
+"""
+OHLCV candles per token
+One row per token, interval and bucket start (unix seconds, UTC), backfilled
+from the existing trade history.
+"""
+
+# Interval name -> bucket width in seconds, as of this migration
+INTERVALS = {'1m': 60, '5m': 300, '1h': 3600, '1d': 86400}
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS candles (
+            asa_id INTEGER NOT NULL,
+            interval TEXT NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume REAL NOT NULL DEFAULT 0,
+            volume_algo REAL NOT NULL DEFAULT 0,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (asa_id, interval, bucket_start)
+        ) WITHOUT ROWID
+    ''')
+
+    for interval, seconds in INTERVALS.items():
+        cursor.execute('''
+            INSERT OR REPLACE INTO candles
+                (asa_id, interval, bucket_start, open, high, low, close, volume, volume_algo, trade_count)
+            SELECT asa_id, ?, bucket_start, open, MAX(price), MIN(price), close,
+                   TOTAL(amount), TOTAL(total_value), COUNT(*)
+            FROM (
+                SELECT asa_id, price, amount, total_value,
+                       CAST(strftime('%s', created_at) AS INTEGER) / ? * ? AS bucket_start,
+                       FIRST_VALUE(price) OVER bucket AS open,
+                       LAST_VALUE(price) OVER bucket AS close
+                FROM trades
+                WHERE price IS NOT NULL AND created_at IS NOT NULL
+                WINDOW bucket AS (
+                    PARTITION BY asa_id, CAST(strftime('%s', created_at) AS INTEGER) / ?
+                    ORDER BY created_at, id
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                )
+            )
+            GROUP BY asa_id, bucket_start
+        ''', (interval, seconds, seconds, seconds))
@@ -0,0 +1,40 @@
+"""
+Market stats upkeep
+Adds tokens.price_24h_ago (the reference for price_change_24h), makes holders
+one row per token and address, and backfills holder balances and counts from
+net trade positions.
+"""
+
+from migrations import add_columns
+
+# Balances at or below this are treated as empty
+HOLDER_DUST = 1e-9
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    add_columns(conn, 'tokens', [('price_24h_ago', 'REAL')])
+
+    cursor.execute('''
+        DELETE FROM holders WHERE id NOT IN (
+            SELECT MAX(id) FROM holders GROUP BY asa_id, holder_address
+        )
+    ''')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_holders_token_address ON holders (asa_id, holder_address)')
+
+    cursor.execute('''
+        INSERT INTO holders (asa_id, holder_address, balance)
+        SELECT asa_id, trader_address, TOTAL(CASE WHEN trade_type = 'buy' THEN amount ELSE -amount END)
+        FROM trades
+        GROUP BY asa_id, trader_address
+        ON CONFLICT (asa_id, holder_address) DO UPDATE SET balance = excluded.balance
+    ''')
+
+    # The creator always counts as one holder
+    cursor.execute('''
+        UPDATE tokens SET holders = 1 + (
+            SELECT COUNT(*) FROM holders h
+            WHERE h.asa_id = tokens.asa_id AND h.balance > ? AND h.holder_address != tokens.creator
+        )
+    ''', (HOLDER_DUST,))
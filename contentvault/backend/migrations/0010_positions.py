@@ -0,0 +1,161 @@
+"""
+Cost-basis position ledger
+Adds positions (one row per trader and token) and position_lots (open FIFO
+buy lots), a realized_pnl column on trades, and realized P&L and sell counts
+on the trader_stats rollup. Everything is backfilled by replaying trades.
+
+The replay is a frozen copy of positions.replay_positions as it was when
+this migration was written, so later changes to the ledger code don't
+change what an old database is upgraded to.
+"""
+
+from collections import deque
+
+from migrations import add_columns
+
+# Quantities at or below this are treated as closed
+POSITION_DUST = 1e-9
+
+
+def consume_lots(lots, amount):
+    """Match a sale against (lot_id, quantity, cost) lots, oldest first; see positions.consume_lots"""
+    cost = 0.0
+    emptied = []
+    for lot_id, quantity, lot_cost in lots:
+        if amount <= POSITION_DUST:
+            break
+        if quantity <= amount + POSITION_DUST:
+            cost += lot_cost
+            amount -= quantity
+            emptied.append(lot_id)
+            continue
+        used_cost = lot_cost * amount / quantity
+        return cost + used_cost, emptied, (lot_id, quantity - amount, lot_cost - used_cost)
+    return cost, emptied, None
+
+
+def sell(quantity, avg_cost_basis, fifo_cost_basis, amount, proceeds, fifo_cost):
+    """New (quantity, fifo basis, average basis, FIFO realized, average realized) after a sale"""
+    matched = min(amount, quantity)
+    avg_cost = avg_cost_basis * matched / quantity if quantity > 0 else 0
+    quantity -= matched
+    if quantity <= POSITION_DUST:
+        return 0, 0, 0, proceeds - fifo_cost, proceeds - avg_cost
+    return (quantity, max(fifo_cost_basis - fifo_cost, 0), avg_cost_basis - avg_cost,
+            proceeds - fifo_cost, proceeds - avg_cost)
+
+
+def replay_positions(conn):
+    """Rebuild positions, lots and each trade's realized P&L from trade history"""
+    conn.execute('DELETE FROM position_lots')
+    conn.execute('DELETE FROM positions')
+
+    positions = {}
+    lots = {}
+    realized_rows = []
+    trades = conn.execute('SELECT id, trader_address, asa_id, trade_type, amount, total_value, created_at '
+                          'FROM trades ORDER BY id')
+    for trade_id, trader_address, asa_id, trade_type, amount, value, created_at in trades:
+        key = (trader_address, asa_id)
+        amount, value = amount or 0, value or 0
+        position = positions.get(key)
+        if position is None:
+            # quantity, cost_basis, avg_cost_basis, realized_pnl, realized_pnl_avg,
+            # buy_value, sell_value, buy_amount, sell_amount, trade_count, first_trade_at, last_trade_at
+            position = positions[key] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, created_at, created_at]
+            lots[key] = deque()
+        position[9] += 1
+        position[10] = min(position[10], created_at)
+        position[11] = max(position[11], created_at)
+
+        if trade_type == 'buy':
+            lots[key].append((trade_id, amount, value))
+            position[0] += amount
+            position[1] += value
+            position[2] += value
+            position[5] += value
+            position[7] += amount
+            realized_rows.append((0, trade_id))
+            continue
+
+        queue = lots[key]
+        fifo_cost, emptied, partial = consume_lots(queue, amount)
+        for _ in emptied:
+            queue.popleft()
+        if partial:
+            queue[0] = partial
+        position[0], position[1], position[2], realized, realized_avg = sell(
+            position[0], position[2], position[1], amount, value, fifo_cost)
+        if position[0] == 0:
+            queue.clear()
+        position[3] += realized
+        position[4] += realized_avg
+        position[6] += value
+        position[8] += amount
+        realized_rows.append((realized, trade_id))
+
+    conn.executemany('UPDATE trades SET realized_pnl = ? WHERE id = ?', realized_rows)
+    conn.executemany('''
+        INSERT INTO positions
+            (trader_address, asa_id, quantity, cost_basis, avg_cost_basis, realized_pnl, realized_pnl_avg,
+             buy_value, sell_value, buy_amount, sell_amount, trade_count, first_trade_at, last_trade_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (key + tuple(position) for key, position in positions.items()))
+    conn.executemany('''
+        INSERT INTO position_lots (trader_address, asa_id, trade_id, quantity, cost, created_at)
+        SELECT ?, ?, id, ?, ?, created_at FROM trades WHERE id = ?
+    ''', ((trader_address, asa_id, quantity, cost, trade_id)
+          for (trader_address, asa_id), queue in lots.items() for trade_id, quantity, cost in queue))
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    add_columns(conn, 'trades', [('realized_pnl', 'REAL DEFAULT 0')])
+    add_columns(conn, 'trader_stats', [
+        ('sell_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('realized_pnl', 'REAL NOT NULL DEFAULT 0'),
+    ])
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS positions (
+            trader_address TEXT NOT NULL,
+            asa_id INTEGER NOT NULL,
+            quantity REAL NOT NULL DEFAULT 0,
+            cost_basis REAL NOT NULL DEFAULT 0,
+            avg_cost_basis REAL NOT NULL DEFAULT 0,
+            realized_pnl REAL NOT NULL DEFAULT 0,
+            realized_pnl_avg REAL NOT NULL DEFAULT 0,
+            buy_value REAL NOT NULL DEFAULT 0,
+            sell_value REAL NOT NULL DEFAULT 0,
+            buy_amount REAL NOT NULL DEFAULT 0,
+            sell_amount REAL NOT NULL DEFAULT 0,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            first_trade_at TIMESTAMP,
+            last_trade_at TIMESTAMP,
+            PRIMARY KEY (trader_address, asa_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS position_lots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            trader_address TEXT NOT NULL,
+            asa_id INTEGER NOT NULL,
+            trade_id INTEGER,
+            quantity REAL NOT NULL,
+            cost REAL NOT NULL,
+            created_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_position_lots_position ON position_lots (trader_address, asa_id, id)')
+
+    replay_positions(conn)
+
+    cursor.execute('''
+        UPDATE trader_stats SET (sell_count, realized_pnl) = (
+            SELECT COUNT(CASE WHEN t.trade_type = 'sell' THEN 1 END), TOTAL(t.realized_pnl)
+            FROM trades t
+            WHERE t.trader_address = trader_stats.trader_address
+              AND t.created_at >= trader_stats.day AND t.created_at < DATE(trader_stats.day, '+1 day')
+        )
+    ''')
@@ -0,0 +1,54 @@
+"""
+Creator earnings rollups
+Adds a running creator fee total per token (tokens.total_creator_fees) and
+per creator (creator_earnings), plus daily per-token buckets in
+creator_earnings_daily, all backfilled from trades.
+"""
+
+from migrations import add_columns
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    add_columns(conn, 'tokens', [('total_creator_fees', 'REAL NOT NULL DEFAULT 0')])
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS creator_earnings (
+            creator TEXT PRIMARY KEY,
+            total_fees REAL NOT NULL DEFAULT 0,
+            trade_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS creator_earnings_daily (
+            creator TEXT NOT NULL,
+            day TEXT NOT NULL,
+            asa_id INTEGER NOT NULL,
+            fees REAL NOT NULL DEFAULT 0,
+            volume REAL NOT NULL DEFAULT 0,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (creator, day, asa_id)
+        ) WITHOUT ROWID
+    ''')
+    # The earnings endpoint lists a creator's tokens with their totals
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tokens_creator_fees
+        ON tokens (creator, asa_id, token_name, token_symbol, total_creator_fees)
+    ''')
+
+    cursor.execute('''
+        UPDATE tokens SET total_creator_fees = (
+            SELECT TOTAL(creator_fee) FROM trades WHERE trades.asa_id = tokens.asa_id
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO creator_earnings_daily (creator, day, asa_id, fees, volume, trade_count)
+        SELECT tk.creator, DATE(t.created_at), t.asa_id, TOTAL(t.creator_fee), TOTAL(t.total_value), COUNT(*)
+        FROM trades t
+        JOIN tokens tk ON tk.asa_id = t.asa_id
+        GROUP BY tk.creator, DATE(t.created_at), t.asa_id
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO creator_earnings (creator, total_fees, trade_count)
+        SELECT creator, TOTAL(fees), SUM(trade_count) FROM creator_earnings_daily GROUP BY creator
+    ''')
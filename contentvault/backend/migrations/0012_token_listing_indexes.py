@@ -0,0 +1,21 @@
+"""
+Indexes for the paginated /tokens listing
+One (sort key, asa_id) index per sort so keyset pages are index range
+reads, plus a platform index for the default sort. The 24h stat columns are
+made non-NULL so row-value cursor comparisons always match.
+"""
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    cursor.execute('UPDATE tokens SET volume_24h = 0 WHERE volume_24h IS NULL')
+    cursor.execute('UPDATE tokens SET price_change_24h = 0 WHERE price_change_24h IS NULL')
+
+    # Superseded by idx_tokens_created_asa
+    cursor.execute('DROP INDEX IF EXISTS idx_tokens_created')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_created_asa ON tokens (created_at, asa_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_market_cap ON tokens (current_price * total_supply, asa_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_volume ON tokens (volume_24h, asa_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_price_change ON tokens (price_change_24h, asa_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tokens_platform_created ON tokens (platform, created_at, asa_id)')
@@ -0,0 +1,14 @@
+"""
+Data version counter
+A single counter bumped on every write, used to key cached API responses.
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO data_versions (scope, version) VALUES ('api', 0)")
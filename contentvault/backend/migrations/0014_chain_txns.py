@@ -0,0 +1,26 @@
+"""
+Chain transaction tracking
+Adds chain_txns, one row per transaction the backend submits to algod, with
+the status the background confirmer moves from pending to confirmed or failed
+and the payload its confirmation handler acts on.
+"""
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chain_txns (
+            txid TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            payload TEXT,
+            last_valid_round INTEGER,
+            confirmed_round INTEGER,
+            asset_id INTEGER,
+            error TEXT,
+            submitted_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chain_txns_status ON chain_txns (status, submitted_at)')
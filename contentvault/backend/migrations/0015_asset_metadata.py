@@ -0,0 +1,19 @@
+"""
+Asset metadata cache
+Adds asset_metadata, the immutable ASA params (name, unit name, decimals,
+total, creator) read from algod, stored at token creation or on first lookup.
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS asset_metadata (
+            asa_id INTEGER PRIMARY KEY,
+            asset_name TEXT,
+            unit_name TEXT,
+            decimals INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            creator TEXT,
+            fetched_at TEXT NOT NULL
+        )
+    ''')
@@ -0,0 +1,15 @@
+"""
+Service leases
+Adds service_leases, one row per singleton background service naming the
+process currently allowed to run it and when that claim runs out.
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS service_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
@@ -0,0 +1,79 @@
+"""
+Versioned schema migrations
+Migrations are modules named NNNN_description.py exposing upgrade(conn).
+The applied version is tracked in PRAGMA user_version, so a database that is
+already current costs a single pragma read at startup.
+"""
+
+import os
+import re
+import importlib
+import logging
+import sqlite3
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+def discover_migrations() -> List[Tuple[int, str]]:
+    """List (version, module name) pairs in version order without importing them"""
+    migrations = []
+    for filename in os.listdir(os.path.dirname(__file__)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), filename[:-3]))
+    return sorted(migrations)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Version of the last migration applied to this database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def add_columns(conn: sqlite3.Connection, table: str, columns: List[Tuple[str, str]]):
+    """Add any of the (name, definition) columns the table does not have yet"""
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations, each in its own write transaction
+
+    Returns the schema version after running. Safe to call from several
+    processes at once: the version is re-checked after taking the write lock.
+    """
+    migrations = discover_migrations()
+    current = get_schema_version(conn)
+    if not migrations or current >= migrations[-1][0]:
+        return current
+
+    for version, name in migrations:
+        if version <= current:
+            continue
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another worker may have applied it while we waited for the lock
+            current = get_schema_version(conn)
+            if version <= current:
+                conn.rollback()
+                continue
+
+            module = importlib.import_module(f'{__name__}.{name}')
+            module.upgrade(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"❌ Migration {name} failed, schema left at version {current}")
+            raise
+
+        current = version
+        logger.info(f"✅ Applied migration {name}")
+
+    return current
@@ -0,0 +1,162 @@
+"""
+Row models for hot read paths
+Slotted dataclasses built straight from SQLite rows, so endpoints that walk
+thousands of trades don't allocate a dict per row
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+
+@dataclass(slots=True)
+class Trade:
+    """A row of a token's trade history"""
+    trade_type: str
+    amount: float
+    price: float
+    created_at: str
+    transaction_id: str
+    trader_address: str
+
+    SELECT = 'trade_type, amount, price, created_at, transaction_id, trader_address'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the /api/trades response shape"""
+        return {
+            'type': self.trade_type,
+            'amount': self.amount,
+            'price': self.price,
+            'timestamp': self.created_at,
+            'transaction_id': self.transaction_id,
+            'trader_address': self.trader_address
+        }
+
+
+@dataclass(slots=True)
+class TraderTrade:
+    """A trader's trade joined with the traded token's details"""
+    trade_type: str
+    amount: float
+    price: float
+    total_value: Optional[float]
+    created_at: str
+    transaction_id: str
+    asa_id: int
+    token_name: Optional[str]
+    token_symbol: Optional[str]
+    current_price: Optional[float] = None
+    market_cap: Optional[float] = None
+
+    SELECT = '''t.trade_type, t.amount, t.price, t.total_value, t.created_at, t.transaction_id, t.asa_id,
+                tk.token_name, tk.token_symbol'''
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the trader trade history response shape"""
+        return {
+            "trade_type": self.trade_type,
+            "amount": self.amount,
+            "price": self.price,
+            "total_value": self.total_value,
+            "created_at": self.created_at,
+            "transaction_id": self.transaction_id,
+            "asa_id": self.asa_id,
+            "token_name": self.token_name,
+            "token_symbol": self.token_symbol,
+        }
+
+
+@dataclass(slots=True)
+class TokenSummary:
+    """The token columns listed by /tokens"""
+    asa_id: int
+    creator: str
+    token_name: str
+    token_symbol: str
+    total_supply: float
+    current_price: float
+    volume_24h: Optional[float]
+    holders: Optional[int]
+    price_change_24h: Optional[float]
+    created_at: str
+    youtube_channel_title: Optional[str]
+    youtube_subscribers: Optional[int]
+    video_id: Optional[str]
+    video_title: Optional[str]
+    platform: Optional[str]
+    content_url: Optional[str]
+    content_id: Optional[str]
+    content_description: Optional[str]
+    content_thumbnail: Optional[str]
+
+    SELECT = '''asa_id, creator, token_name, token_symbol, total_supply, current_price, volume_24h, holders,
+                price_change_24h, created_at, youtube_channel_title, youtube_subscribers, video_id, video_title,
+                platform, content_url, content_id, content_description, content_thumbnail'''
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the /tokens response shape"""
+        current_price = float(self.current_price or 0)
+        total_supply = float(self.total_supply or 0)
+        return {
+            "asa_id": self.asa_id,
+            "creator": self.creator,
+            "creator_address": self.creator,
+            "token_name": self.token_name,
+            "token_symbol": self.token_symbol,
+            "total_supply": total_supply,
+            "current_price": current_price,
+            # Always calculate real market cap: current_price * total_supply (real-time, not stored value)
+            "market_cap": current_price * total_supply,
+            "volume_24h": self.volume_24h,
+            "holders": self.holders,
+            "price_change_24h": self.price_change_24h,
+            "created_at": self.created_at,
+            "youtube_channel_title": self.youtube_channel_title,
+            "youtube_subscribers": self.youtube_subscribers,
+            "video_id": self.video_id,
+            "video_title": self.video_title,
+            "platform": self.platform,
+            "content_url": self.content_url,
+            "content_id": self.content_id,
+            "content_description": self.content_description,
+            "content_thumbnail": self.content_thumbnail
+        }
+
+
+@dataclass(slots=True)
+class TokenActivity:
+    """One trader's position and lifetime activity in one token"""
+    asa_id: int
+    token_name: Optional[str]
+    token_symbol: Optional[str]
+    current_price: Optional[float]
+    market_cap: Optional[float]
+    trade_count: int
+    buy_value: float
+    sell_value: float
+    duration_min: Optional[float]
+    quantity: float
+    cost_basis: float
+    avg_cost_basis: float
+    realized_pnl: float
+
+    @property
+    def pnl(self) -> float:
+        """Realized FIFO P&L on the tokens sold"""
+        return self.realized_pnl
+
+    @property
+    def cost_of_sold(self) -> float:
+        """FIFO cost of the tokens sold so far"""
+        return self.sell_value - self.realized_pnl
+
+    @property
+    def unit_cost(self) -> float:
+        """FIFO cost per token still held"""
+        return self.cost_basis / self.quantity if self.quantity > 0 else 0
+
+    @property
+    def unrealized_pnl(self) -> float:
+        """Mark-to-market gain on the tokens still held"""
+        if self.quantity <= 0 or not self.current_price:
+            return 0
+        return self.quantity * self.current_price - self.cost_basis
@@ -0,0 +1,204 @@
+"""
+Cost-basis position ledger
+Tracks each trader's quantity, FIFO and average cost basis and realized P&L
+per token, updated by the trade hook, so portfolio and P&L reads scale with
+open positions rather than with trade history
+"""
+
+import sqlite3
+from collections import deque
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Quantities at or below this are treated as closed
+POSITION_DUST = 1e-9
+
+# A trader's open positions with the token details needed to value them
+PORTFOLIO_SQL = '''
+    SELECT p.asa_id, tk.token_name, tk.token_symbol, tk.current_price, p.quantity, p.cost_basis,
+           p.avg_cost_basis, p.realized_pnl
+    FROM positions p
+    LEFT JOIN tokens tk ON tk.asa_id = p.asa_id
+    WHERE p.trader_address = ? AND p.quantity > ?
+'''
+
+POSITION_UPSERT_SQL = '''
+    INSERT INTO positions
+        (trader_address, asa_id, quantity, cost_basis, avg_cost_basis, realized_pnl, realized_pnl_avg,
+         buy_value, sell_value, buy_amount, sell_amount, trade_count, first_trade_at, last_trade_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+    ON CONFLICT (trader_address, asa_id) DO UPDATE SET
+        quantity = excluded.quantity,
+        cost_basis = excluded.cost_basis,
+        avg_cost_basis = excluded.avg_cost_basis,
+        realized_pnl = realized_pnl + excluded.realized_pnl,
+        realized_pnl_avg = realized_pnl_avg + excluded.realized_pnl_avg,
+        buy_value = buy_value + excluded.buy_value,
+        sell_value = sell_value + excluded.sell_value,
+        buy_amount = buy_amount + excluded.buy_amount,
+        sell_amount = sell_amount + excluded.sell_amount,
+        trade_count = trade_count + 1,
+        first_trade_at = MIN(first_trade_at, excluded.first_trade_at),
+        last_trade_at = MAX(last_trade_at, excluded.last_trade_at)
+'''
+
+
+def consume_lots(lots: Iterable[Tuple[int, float, float]], amount: float
+                 ) -> Tuple[float, List[int], Optional[Tuple[int, float, float]]]:
+    """
+    Match a sale of `amount` against (lot_id, quantity, cost) lots, oldest first
+
+    Returns the FIFO cost of the tokens matched, the ids of lots used up and
+    the (lot_id, quantity, cost) left in a partially used lot, if any.
+    """
+    cost = 0.0
+    emptied = []
+    for lot_id, quantity, lot_cost in lots:
+        if amount <= POSITION_DUST:
+            break
+        if quantity <= amount + POSITION_DUST:
+            cost += lot_cost
+            amount -= quantity
+            emptied.append(lot_id)
+            continue
+        used_cost = lot_cost * amount / quantity
+        return cost + used_cost, emptied, (lot_id, quantity - amount, lot_cost - used_cost)
+    return cost, emptied, None
+
+
+def _sell(quantity: float, avg_cost_basis: float, fifo_cost_basis: float, amount: float, proceeds: float,
+          fifo_cost: float) -> Tuple[float, float, float, float, float]:
+    """New (quantity, fifo basis, average basis, FIFO realized, average realized) after a sale"""
+    matched = min(amount, quantity)
+    avg_cost = avg_cost_basis * matched / quantity if quantity > 0 else 0
+    quantity -= matched
+    if quantity <= POSITION_DUST:
+        # Tokens sold beyond the tracked position have no cost basis
+        return 0, 0, 0, proceeds - fifo_cost, proceeds - avg_cost
+    return (quantity, max(fifo_cost_basis - fifo_cost, 0), avg_cost_basis - avg_cost,
+            proceeds - fifo_cost, proceeds - avg_cost)
+
+
+def update_position(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """
+    Trade hook: apply a trade to the trader's position
+
+    Sets trade['realized_pnl'] (FIFO) for hooks that run after this one and
+    stores it on the trade row.
+    """
+    trader_address, asa_id = trade['trader_address'], trade['asa_id']
+    amount, value = trade['amount'], trade.get('total_value') or 0
+    row = conn.execute('SELECT quantity, cost_basis, avg_cost_basis FROM positions '
+                       'WHERE trader_address = ? AND asa_id = ?', (trader_address, asa_id)).fetchone()
+    quantity, cost_basis, avg_cost_basis = row or (0, 0, 0)
+
+    if trade['trade_type'] == 'buy':
+        conn.execute('''
+            INSERT INTO position_lots (trader_address, asa_id, trade_id, quantity, cost, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (trader_address, asa_id, trade.get('id'), amount, value, trade['created_at']))
+        conn.execute(POSITION_UPSERT_SQL, (trader_address, asa_id, quantity + amount, cost_basis + value,
+                                           avg_cost_basis + value, 0, 0, value, 0, amount, 0,
+                                           trade['created_at'], trade['created_at']))
+        trade['realized_pnl'] = 0
+        return
+
+    lots = conn.execute('SELECT id, quantity, cost FROM position_lots WHERE trader_address = ? AND asa_id = ? '
+                        'ORDER BY id', (trader_address, asa_id))
+    fifo_cost, emptied, partial = consume_lots(lots, amount)
+    lots.close()
+
+    quantity, cost_basis, avg_cost_basis, realized, realized_avg = _sell(
+        quantity, avg_cost_basis, cost_basis, amount, value, fifo_cost)
+    if quantity == 0:
+        conn.execute('DELETE FROM position_lots WHERE trader_address = ? AND asa_id = ?', (trader_address, asa_id))
+    else:
+        conn.executemany('DELETE FROM position_lots WHERE id = ?', [(lot_id,) for lot_id in emptied])
+        if partial:
+            conn.execute('UPDATE position_lots SET quantity = ?, cost = ? WHERE id = ?',
+                         partial[1:] + partial[:1])
+    conn.execute(POSITION_UPSERT_SQL, (trader_address, asa_id, quantity, cost_basis, avg_cost_basis,
+                                       realized, realized_avg, 0, value, 0, amount,
+                                       trade['created_at'], trade['created_at']))
+    conn.execute('UPDATE trades SET realized_pnl = ? WHERE id = ?', (realized, trade.get('id')))
+    trade['realized_pnl'] = realized
+
+
+def replay_positions(conn: sqlite3.Connection) -> int:
+    """
+    Rebuild positions, lots and each trade's realized P&L from trade history
+
+    Runs in the caller's transaction. Trades are replayed in id order in
+    memory and written back in bulk. Returns the number of positions.
+    """
+    conn.execute('DELETE FROM position_lots')
+    conn.execute('DELETE FROM positions')
+
+    positions: Dict[Tuple[str, int], list] = {}
+    lots: Dict[Tuple[str, int], deque] = {}
+    realized_rows = []
+    trades = conn.execute('SELECT id, trader_address, asa_id, trade_type, amount, total_value, created_at '
+                          'FROM trades ORDER BY id')
+    for trade_id, trader_address, asa_id, trade_type, amount, value, created_at in trades:
+        key = (trader_address, asa_id)
+        amount, value = amount or 0, value or 0
+        position = positions.get(key)
+        if position is None:
+            # quantity, cost_basis, avg_cost_basis, realized_pnl, realized_pnl_avg,
+            # buy_value, sell_value, buy_amount, sell_amount, trade_count, first_trade_at, last_trade_at
+            position = positions[key] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, created_at, created_at]
+            lots[key] = deque()
+        position[9] += 1
+        position[10] = min(position[10], created_at)
+        position[11] = max(position[11], created_at)
+
+        if trade_type == 'buy':
+            lots[key].append((trade_id, amount, value))
+            position[0] += amount
+            position[1] += value
+            position[2] += value
+            position[5] += value
+            position[7] += amount
+            realized_rows.append((0, trade_id))
+            continue
+
+        queue = lots[key]
+        fifo_cost, emptied, partial = consume_lots(queue, amount)
+        for _ in emptied:
+            queue.popleft()
+        if partial:
+            queue[0] = partial
+        position[0], position[1], position[2], realized, realized_avg = _sell(
+            position[0], position[2], position[1], amount, value, fifo_cost)
+        if position[0] == 0:
+            queue.clear()
+        position[3] += realized
+        position[4] += realized_avg
+        position[6] += value
+        position[8] += amount
+        realized_rows.append((realized, trade_id))
+
+    conn.executemany('UPDATE trades SET realized_pnl = ? WHERE id = ?', realized_rows)
+    conn.executemany('''
+        INSERT INTO positions
+            (trader_address, asa_id, quantity, cost_basis, avg_cost_basis, realized_pnl, realized_pnl_avg,
+             buy_value, sell_value, buy_amount, sell_amount, trade_count, first_trade_at, last_trade_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (key + tuple(position) for key, position in positions.items()))
+    conn.executemany('''
+        INSERT INTO position_lots (trader_address, asa_id, trade_id, quantity, cost, created_at)
+        SELECT ?, ?, id, ?, ?, created_at FROM trades WHERE id = ?
+    ''', ((trader_address, asa_id, quantity, cost, trade_id)
+          for (trader_address, asa_id), queue in lots.items() for trade_id, quantity, cost in queue))
+    return len(positions)
+
+
+def rebuild_positions(conn: sqlite3.Connection) -> int:
+    """Replay the whole trade history into the position ledger in one transaction"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        count = replay_positions(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return count
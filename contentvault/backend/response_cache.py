@@ -0,0 +1,157 @@
+"""
+Response cache for polled read endpoints
+Caches serialized JSON bodies per URL, keyed by a data version counter that
+every write bumps, and answers If-None-Match with 304 using strong ETags of
+the cached bytes
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from flask import Response, make_response, request
+
+from database import get_db
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_SCOPE = 'api'
+
+# Seconds a cached body is served for, bounding staleness from changes that
+# don't bump the version (time-based windows, direct database edits)
+DEFAULT_TTL = 5
+
+
+def current_data_version(conn: sqlite3.Connection) -> int:
+    """The data version all cached responses are keyed on"""
+    row = conn.execute('SELECT version FROM data_versions WHERE scope = ?', (DATA_VERSION_SCOPE,)).fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(conn: sqlite3.Connection):
+    """Invalidate cached responses; runs in the caller's transaction"""
+    conn.execute('''
+        INSERT INTO data_versions (scope, version) VALUES (?, 1)
+        ON CONFLICT (scope) DO UPDATE SET version = version + 1
+    ''', (DATA_VERSION_SCOPE,))
+
+
+class CachedResponse:
+    """A serialized response body with its ETag"""
+
+    __slots__ = ('version', 'expires_at', 'etag', 'body')
+
+    def __init__(self, version: int, expires_at: float, body: bytes):
+        self.version = version
+        self.expires_at = expires_at
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.body = body
+
+
+class ResponseCache:
+    """In-process LRU of response bodies, valid for one data version and a short TTL"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> Optional[CachedResponse]:
+        """The cached response for `key` if it is still current"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: str, version: int, body: bytes, ttl: float) -> CachedResponse:
+        """Cache a body and return its entry"""
+        entry = CachedResponse(version, time.monotonic() + ttl, body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def _conditional(entry: CachedResponse) -> Response:
+    """200 with the cached body, or 304 if the client already has it"""
+    if request.if_none_match.contains(entry.etag):
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def cached_response(ttl: float = DEFAULT_TTL):
+    """
+    Serve a GET view from the response cache
+
+    Only 200 JSON responses are cached; errors pass straight through. The
+    cache key is the full path with query string.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path
+            version = current_data_version(get_db())
+            entry = response_cache.get(key, version)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or not response.is_json:
+                    return response
+                entry = response_cache.store(key, version, response.get_data(), ttl)
+            return _conditional(entry)
+        return wrapper
+    return decorator
+
+
+def bump_on_trade(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """Trade hook: invalidate cached responses in the trade's own transaction"""
+    bump_data_version(conn)
+
+
+def bumps_data_version(view):
+    """
+    Bump the data version after a successful (2xx) write request
+
+    For mutating routes whose writes aren't already covered by a trade hook.
+    Read-only methods and error responses leave the version alone.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not 200 <= response.status_code < 300:
+            return response
+        try:
+            conn = get_db()
+            # Anything left uncommitted by the handler is rolled back when the
+            # connection is released anyway; do it now so the bump commits alone
+            if conn.in_transaction:
+                conn.rollback()
+            bump_data_version(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error bumping data version: {e}")
+        return response
+    return wrapper
@@ -0,0 +1,99 @@
+"""
+Singleton service leases
+Every server worker starts the same background threads; a lease in the
+service_leases table lets exactly one process at a time do the work of a
+service that must not run concurrently, and hands it to another worker if
+the holder dies
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import time
+from typing import Optional
+
+from database import db_connection
+
+logger = logging.getLogger(__name__)
+
+# Seconds a lease lasts without being renewed
+LEASE_TTL = 30.0
+
+
+def acquire_lease(conn: sqlite3.Connection, name: str, holder: str, ttl: float = LEASE_TTL,
+                  now: Optional[float] = None) -> bool:
+    """Take or renew the lease on `name` for `holder` if it is free, expired or already theirs"""
+    now = time.time() if now is None else now
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('''
+            INSERT INTO service_leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE service_leases.holder = excluded.holder OR service_leases.expires_at < ?
+            RETURNING holder
+        ''', (name, holder, now + ttl, now)).fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return row is not None
+
+
+def release_lease(conn: sqlite3.Connection, name: str, holder: str):
+    """Give up the lease on `name` if `holder` has it"""
+    conn.execute('DELETE FROM service_leases WHERE name = ? AND holder = ?', (name, holder))
+    conn.commit()
+
+
+class ServiceLease:
+    """
+    This process's claim on a singleton service
+
+    held() is cheap to call on every loop iteration: the lease is only
+    renewed in the database once half its TTL has passed.
+    """
+
+    def __init__(self, name: str, ttl: float = LEASE_TTL):
+        self.name = name
+        self.ttl = ttl
+        self._renew_at = 0.0
+        self._held = False
+
+    @property
+    def holder(self) -> str:
+        # Read per call so a forked worker claims under its own pid
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def held(self) -> bool:
+        """Whether this process holds the lease, taking or renewing it as needed"""
+        now = time.time()
+        if self._held and now < self._renew_at:
+            return True
+        try:
+            with db_connection() as conn:
+                held = acquire_lease(conn, self.name, self.holder, self.ttl, now)
+        except sqlite3.Error as e:
+            logger.error(f"Error renewing {self.name} lease: {e}")
+            held = False
+        if held != self._held:
+            logger.info(f"🔑 {'Took' if held else 'Lost'} the {self.name} lease ({self.holder})")
+        self._held = held
+        self._renew_at = now + self.ttl / 2
+        return held
+
+    def release(self):
+        """Give the lease up so another worker can take it straight away"""
+        if not self._held:
+            return
+        self._held = False
+        try:
+            with db_connection() as conn:
+                release_lease(conn, self.name, self.holder)
+        except sqlite3.Error as e:
+            logger.error(f"Error releasing {self.name} lease: {e}")
+
+    def after_fork(self):
+        """Forget a claim inherited from the parent process; it belongs to the parent's pid"""
+        self._held = False
+        self._renew_at = 0.0
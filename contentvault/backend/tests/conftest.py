@@ -0,0 +1,138 @@
+"""
+Shared fixtures for the backend tests
+Each test gets its own migrated SQLite file behind the shared connection
+pool, with the in-process caches emptied around it. Run from the backend
+directory with `python -m pytest -q`.
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Nothing should touch the real database, even before the db fixture runs
+os.environ.setdefault('DATABASE_PATH', os.path.join(tempfile.mkdtemp(), 'creatorvault.db'))
+
+import pytest
+from algosdk import transaction
+from algosdk.error import AlgodHTTPError
+
+import app as backend_app  # registers the trade hooks and txn handlers
+from asset_metadata import asset_metadata_cache
+from bonding_curve import BondingCurve, BondingCurveState, FixedPointBondingCurve
+from curve_store import curve_cache, save_curve
+from database import db_connection, pool
+from migrations import run_migrations
+from response_cache import response_cache
+
+CREATOR = 'CREATOR'
+GENESIS_HASH = 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI='
+
+
+def clear_caches():
+    curve_cache.clear()
+    response_cache.clear()
+    asset_metadata_cache.clear()
+    backend_app.account_cache.clear()
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A connection to a freshly migrated database, shared with code under test on this thread"""
+    pool.close_all()
+    pool.path = str(tmp_path / 'test.db')
+    pool.after_fork()  # forget connections to the previous test's file
+    clear_caches()
+    with db_connection() as conn:
+        run_migrations(conn)
+        yield conn
+    pool.close_all()
+    clear_caches()
+
+
+@pytest.fixture
+def client(db):
+    """Flask test client against the test database"""
+    return backend_app.app.test_client()
+
+
+@pytest.fixture
+def make_token(db):
+    """Insert a token with an initialized bonding curve and commit it"""
+    def make(asa_id, creator=CREATOR, total_supply=1000000, initial_price=0.001, fixed=False,
+             created_at='2024-01-01 00:00:00'):
+        db.execute('''
+            INSERT INTO tokens (asa_id, creator, token_name, token_symbol, total_supply, current_price,
+                                market_cap, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (asa_id, creator, f'Token {asa_id}', f'T{asa_id}', total_supply, initial_price,
+              initial_price * total_supply, created_at))
+        curve_class = FixedPointBondingCurve if fixed else BondingCurve
+        curve = curve_class(initial_price=initial_price, initial_supply=total_supply)
+        save_curve(db, asa_id, curve, BondingCurveState(token_supply=0, algo_reserve=0))
+        db.commit()
+        return curve
+    return make
+
+
+class FakeAlgod:
+    """
+    Just enough of AlgodClient for the chain services
+
+    `pending` maps txid to the pending_transaction_info response (unknown
+    txids 404), and `reject`, if set, is called with each submission and
+    returns an error message to raise instead of accepting it.
+    """
+
+    def __init__(self, last_round=1000):
+        self.last_round = last_round
+        self.pending = {}
+        self.sent = []
+        self.reject = None
+
+    def status(self):
+        return {'last-round': self.last_round}
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(0, self.last_round, self.last_round + 1000, GENESIS_HASH,
+                                           'testnet-v1.0', min_fee=1000)
+
+    def pending_transaction_info(self, txid):
+        if txid not in self.pending:
+            raise AlgodHTTPError('transaction not found', 404)
+        return self.pending[txid]
+
+    def send_transactions(self, signed_txns):
+        error = self.reject and self.reject(signed_txns)
+        if error:
+            raise AlgodHTTPError(error, 400)
+        self.sent.append(list(signed_txns))
+        return signed_txns[0].get_txid()
+
+    def send_transaction(self, signed_txn):
+        return self.send_transactions([signed_txn])
+
+
+class FakeIndexer:
+    """search_transactions over a fixed set of confirmed transactions"""
+
+    def __init__(self, current_round=1000):
+        self.current_round = current_round
+        self.confirmed = {}
+
+    def search_transactions(self, txid):
+        found = [self.confirmed[txid]] if txid in self.confirmed else []
+        return {'current-round': self.current_round, 'transactions': found}
+
+
+@pytest.fixture
+def algod():
+    return FakeAlgod()
+
+
+@pytest.fixture
+def chain(algod):
+    """A chain context signing with the backend's creator key against the fake algod"""
+    from chain_context import ChainContext
+    return ChainContext(lambda: algod, backend_app.CREATOR_MNEMONIC)
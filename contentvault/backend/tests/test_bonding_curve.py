@@ -0,0 +1,132 @@
+"""Bonding curve pricing: inverses, batch quotes and fixed-point rounding"""
+
+import math
+from fractions import Fraction
+
+import pytest
+
+import bonding_curve
+from bonding_curve import BondingCurve, FixedPointBondingCurve
+
+
+def on_curve(tokens_bought):
+    """The (supply, algo reserve) state after buying `tokens_bought` from launch"""
+    result = BondingCurve(initial_price=0.001, initial_supply=1000000).calculate_buy_price(0, 0, tokens_bought)
+    return result['new_supply'], result['new_algo_reserve']
+
+
+# (supply, algo reserve) states to price from
+STATES = [(0, 0), on_curve(25000), on_curve(400000)]
+
+
+@pytest.fixture
+def curve():
+    return BondingCurve(initial_price=0.001, initial_supply=1000000)
+
+
+@pytest.fixture
+def fixed_curve():
+    return FixedPointBondingCurve(initial_price=0.001, initial_supply=1000000)
+
+
+@pytest.mark.parametrize('supply, reserve', STATES)
+@pytest.mark.parametrize('tokens', [1, 137.5, 20000])
+def test_tokens_for_algo_inverts_buy_price(curve, supply, reserve, tokens):
+    cost = curve.calculate_buy_price(supply, reserve, tokens)['algo_cost']
+    assert curve.calculate_tokens_for_algo(supply, reserve, cost)['token_amount'] == pytest.approx(tokens)
+
+
+@pytest.mark.parametrize('supply, reserve', STATES[1:])
+@pytest.mark.parametrize('tokens', [1, 137.5, 20000])
+def test_tokens_to_sell_for_algo_inverts_sell_price(curve, supply, reserve, tokens):
+    proceeds = curve.calculate_sell_price(supply, reserve, tokens)['algo_received']
+    assert curve.calculate_tokens_to_sell_for_algo(supply, reserve, proceeds)['token_amount'] == pytest.approx(tokens)
+
+
+def test_budget_is_capped_by_slippage(curve):
+    quote = curve.max_tokens_for_budget(0, 0, 1000, max_slippage=0.01)
+    assert quote['limited_by'] == 'slippage'
+    assert quote['new_price'] == pytest.approx(curve.get_current_price(0, 0) * 1.01)
+
+
+@pytest.mark.parametrize('side', ['buy', 'sell'])
+def test_quote_many_matches_single_quotes(curve, side):
+    supply, reserve = STATES[1]
+    amounts = [1, 50, 5000, 30000]
+    quotes = curve.quote_many(supply, reserve, amounts, side)
+    calculate = curve.calculate_buy_price if side == 'buy' else curve.calculate_sell_price
+    for amount, algo, new_price in zip(amounts, quotes['algo'], quotes['new_price']):
+        if side == 'sell' and amount > supply:
+            assert algo is None
+            continue
+        result = calculate(supply, reserve, amount)
+        assert algo == pytest.approx(result['algo_cost' if side == 'buy' else 'algo_received'])
+        assert new_price == pytest.approx(result['new_price'])
+
+
+@pytest.mark.parametrize('side', ['buy', 'sell'])
+def test_quote_many_without_numpy_matches(curve, side, monkeypatch):
+    if bonding_curve.np is None:
+        pytest.skip('NumPy not installed; only the Python path exists')
+    supply, reserve = STATES[1]
+    amounts = [0, 1, 50, 5000, 30000, 2000000]
+    vectorized = curve.quote_many(supply, reserve, amounts, side)
+    monkeypatch.setattr(bonding_curve, 'np', None)
+    python = curve.quote_many(supply, reserve, amounts, side)
+    for key in vectorized:
+        assert [v is None for v in python[key]] == [v is None for v in vectorized[key]]
+        assert [v for v in python[key] if v is not None] == pytest.approx(
+            [v for v in vectorized[key] if v is not None])
+
+
+def test_fixed_point_quote_many_matches_trades(fixed_curve):
+    quotes = fixed_curve.quote_many(0, 0, [1, 250.5, 9000], 'buy')
+    for amount, algo in zip([1, 250.5, 9000], quotes['algo']):
+        assert algo == fixed_curve.calculate_buy_price(0, 0, amount)['algo_cost']
+
+
+@pytest.mark.parametrize('tokens', [1, 3.333333, 12345.678901])
+def test_fixed_point_rounds_in_the_pools_favour(curve, fixed_curve, tokens):
+    supply, reserve = STATES[1]
+    buy = fixed_curve.calculate_buy_price(supply, reserve, tokens)
+    sell = fixed_curve.calculate_sell_price(supply, reserve, tokens)
+    assert isinstance(buy['microalgos'], int) and isinstance(sell['microalgos'], int)
+    # Buyers pay at least, and sellers receive at most, the exact curve amount
+    assert buy['microalgos'] >= curve.calculate_buy_price(supply, reserve, tokens)['algo_cost'] * 1e6 - 1e-6
+    assert sell['microalgos'] <= curve.calculate_sell_price(supply, reserve, tokens)['algo_received'] * 1e6 + 1e-6
+
+
+def test_fixed_point_round_trip_never_pays_out_more(fixed_curve):
+    supply, reserve = 0, 0.0
+    paid = received = 0
+    for _ in range(50):
+        buy = fixed_curve.calculate_buy_price(supply, reserve, 3.141593)
+        supply, reserve = buy['new_supply'], buy['new_algo_reserve']
+        paid += buy['microalgos']
+        sell = fixed_curve.calculate_sell_price(supply, reserve, 3.141593)
+        supply, reserve = sell['new_supply'], sell['new_algo_reserve']
+        received += sell['microalgos']
+    assert received <= paid
+    assert supply == 0
+    assert reserve * 1e6 == pytest.approx(paid - received)
+
+
+def test_fixed_point_budget_rounds_tokens_down(fixed_curve):
+    quote = fixed_curve.calculate_tokens_for_algo(0, 0, 1.0)
+    assert quote['microalgos'] == 1000000
+    # The tokens received never cost more than the budget
+    assert fixed_curve.calculate_buy_price(0, 0, quote['token_amount'])['microalgos'] <= 1000000
+
+
+@pytest.mark.parametrize('max_slippage', [0.01, 0.0427, 0.1972, 0.5])
+def test_fixed_point_slippage_cap_is_exact(max_slippage):
+    curve = FixedPointBondingCurve(initial_price=0.001, initial_supply=1000000000)
+    bought = curve.calculate_buy_price(0, 0, 123456789.123456)
+    supply, reserve = bought['new_supply'], bought['new_algo_reserve']
+    quote = curve.max_tokens_for_budget(supply, reserve, 10 ** 9, max_slippage=max_slippage)
+
+    # Smallest token reserve that keeps the price within (1 + s) of the current one, exactly
+    token_reserve, algo_reserve = curve._reserves(supply, reserve)
+    bound = Fraction(curve.k_units * token_reserve) / (algo_reserve * Fraction(str(1 + max_slippage)))
+    assert quote['limited_by'] == 'slippage'
+    assert quote['token_units'] == token_reserve - math.isqrt(math.floor(bound)) - 1
@@ -0,0 +1,152 @@
+"""Asset-metadata and account caches"""
+
+import threading
+import time
+
+import pytest
+
+from account_cache import AccountCache
+from asset_metadata import AssetMetadata, AssetMetadataCache
+
+
+def asset_info(asa_id):
+    return {'index': asa_id, 'params': {'name': f'Token {asa_id}', 'unit-name': f'T{asa_id}', 'decimals': 0,
+                                        'total': 1000000, 'creator': 'CREATOR'}}
+
+
+class CountingFetch:
+    """asset_info stand-in recording what it was asked for; `missing` ids raise"""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+
+    def __call__(self, asa_id):
+        self.calls.append(asa_id)
+        if asa_id in self.missing:
+            raise Exception('asset does not exist')
+        return asset_info(asa_id)
+
+
+def test_metadata_is_fetched_once_then_served_from_table(db):
+    fetch = CountingFetch(missing={3})
+    cache = AssetMetadataCache()
+
+    found = cache.get_many(db, [1, 2, 3, 1], fetch)
+    assert sorted(found) == [1, 2]
+    assert found[1].unit_name == 'T1'
+    assert fetch.calls == [1, 2, 3]
+
+    # A fresh process reads what was backfilled; the unknown asset is retried
+    assert sorted(AssetMetadataCache().get_many(db, [1, 2, 3], fetch)) == [1, 2]
+    assert fetch.calls == [1, 2, 3, 3]
+
+
+def test_metadata_cache_serves_from_memory_and_evicts_lru(db):
+    fetch = CountingFetch()
+    cache = AssetMetadataCache(max_entries=2)
+    cache.get_many(db, [1, 2], fetch)
+    db.execute('DELETE FROM asset_metadata')
+    cache.get(db, 1, fetch)  # 1 is now the most recent
+    cache.store(db, AssetMetadata.from_asset_info(asset_info(3)))
+
+    assert fetch.calls == [1, 2]
+    assert cache.get(db, 1, fetch).asa_id == 1
+    cache.get(db, 2, fetch)
+    assert fetch.calls == [1, 2, 2]
+
+
+class FakeAccounts:
+    """account_info stand-in that blocks until released and counts calls"""
+
+    def __init__(self, round=100):
+        self.round = round
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def account_info(self, address):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {'address': address, 'round': self.round, 'amount': self.calls}
+
+
+@pytest.fixture
+def accounts():
+    return FakeAccounts()
+
+
+def test_concurrent_lookups_share_one_call(accounts):
+    cache = AccountCache(lambda: accounts)
+    accounts.release.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('A'))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    accounts.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert accounts.calls == 1
+    assert len(results) == 5 and all(result is results[0] for result in results)
+
+
+def test_failed_lookup_raises_and_is_not_cached(accounts):
+    cache = AccountCache(lambda: accounts)
+    accounts.error = Exception('algod down')
+    with pytest.raises(Exception, match='algod down'):
+        cache.get('A')
+
+    accounts.error = None
+    assert cache.get('A')['amount'] == 2
+
+
+def test_entries_expire_after_ttl(accounts, monkeypatch):
+    import account_cache
+    now = [1000.0]
+    monkeypatch.setattr(account_cache.time, 'monotonic', lambda: now[0])
+    cache = AccountCache(lambda: accounts, ttl_rounds=1)
+
+    cache.get('A')
+    now[0] += cache.ttl - 0.1
+    cache.get('A')
+    assert accounts.calls == 1
+    now[0] += 0.2
+    cache.get('A')
+    assert accounts.calls == 2
+
+
+def test_invalidate_keeps_state_read_after_the_confirmed_round(accounts):
+    cache = AccountCache(lambda: accounts)
+    cache.get('A')
+
+    cache.invalidate('A', confirmed_round=100)
+    cache.get('A')
+    assert accounts.calls == 1
+
+    cache.invalidate('A', confirmed_round=101)
+    cache.get('A')
+    assert accounts.calls == 2
+
+    cache.invalidate('A')
+    cache.get('A')
+    assert accounts.calls == 3
+
+
+@pytest.mark.parametrize('confirmed_round, cached', [(None, False), (101, False), (100, True)])
+def test_invalidation_during_a_lookup_rejects_older_responses(accounts, confirmed_round, cached):
+    cache = AccountCache(lambda: accounts)
+    accounts.release.clear()
+    lookup = threading.Thread(target=cache.get, args=('A',))
+    lookup.start()
+    time.sleep(0.05)
+    cache.invalidate('A', confirmed_round=confirmed_round)
+    accounts.release.set()
+    lookup.join()
+
+    cache.get('A')
+    assert accounts.calls == (1 if cached else 2)
@@ -0,0 +1,123 @@
+"""Txn confirmer state transitions"""
+
+import pytest
+from algosdk import transaction
+
+from chain_context import unique_lease
+from chain_txns import (TXN_CONFIRMED, TXN_FAILED, TXN_PENDING, TxnConfirmer, TxnFailed, get_txn,
+                        register_txn_handler, settle_txn)
+from conftest import FakeIndexer
+
+KIND = 'test_payment'
+
+
+@pytest.fixture
+def handled():
+    """Rows the KIND handler was called with"""
+    calls = []
+    register_txn_handler(KIND, lambda conn, txn: calls.append(txn))
+    return calls
+
+
+@pytest.fixture
+def indexer():
+    return FakeIndexer()
+
+
+@pytest.fixture
+def confirmer(algod, indexer):
+    return TxnConfirmer(lambda: algod, lambda: indexer)
+
+
+def submit(db, chain, confirmer):
+    """Submit a payment valid until round 2000 and return its txid"""
+    params = chain.suggested_params()
+    txn = transaction.PaymentTxn(chain.address, params, chain.address, 1, lease=unique_lease())
+    return confirmer.submit(db, txn.sign(chain.private_key), KIND, {'receiver': chain.address})
+
+
+def test_confirmation_settles_once_and_runs_handler(db, chain, algod, confirmer, handled):
+    settled = []
+    confirmer.add_settle_listener(settled.append)
+    txid = submit(db, chain, confirmer)
+    assert get_txn(db, txid)['status'] == TXN_PENDING
+    assert get_txn(db, txid)['last_valid_round'] == 2000
+
+    algod.pending[txid] = {'confirmed-round': 1003}
+    assert confirmer.poll() == 1
+
+    txn = get_txn(db, txid)
+    assert (txn['status'], txn['confirmed_round']) == (TXN_CONFIRMED, 1003)
+    assert [call['txid'] for call in handled] == [txid]
+    assert [call['txid'] for call in settled] == [txid]
+    assert settle_txn(db, txid, TXN_FAILED, error='late') is None
+    assert get_txn(db, txid)['status'] == TXN_CONFIRMED
+    assert confirmer.wait_for(txid)['confirmed_round'] == 1003
+
+
+def test_pool_error_fails_the_transaction(db, chain, algod, confirmer, handled):
+    txid = submit(db, chain, confirmer)
+    algod.pending[txid] = {'pool-error': 'overspend'}
+    confirmer.poll()
+
+    assert get_txn(db, txid)['status'] == TXN_FAILED
+    assert handled[0]['error'] == 'overspend'
+    with pytest.raises(TxnFailed):
+        confirmer.wait_for(txid)
+
+
+def test_unknown_within_validity_window_stays_pending(db, chain, algod, confirmer, handled):
+    txid = submit(db, chain, confirmer)
+    assert confirmer.poll() == 0
+    assert get_txn(db, txid)['status'] == TXN_PENDING
+    assert handled == []
+
+
+def test_expired_transaction_is_looked_up_in_the_indexer(db, chain, algod, indexer, confirmer):
+    confirmed_txid = submit(db, chain, confirmer)
+    dropped_txid = submit(db, chain, confirmer)
+    algod.last_round = 2500
+    indexer.confirmed[confirmed_txid] = {'confirmed-round': 1990}
+
+    # Indexer still behind the validity window: nothing can be concluded yet
+    indexer.current_round = 1999
+    confirmer.poll()
+    assert get_txn(db, confirmed_txid)['status'] == TXN_CONFIRMED
+    assert get_txn(db, dropped_txid)['status'] == TXN_PENDING
+
+    indexer.current_round = 2400
+    confirmer.poll()
+    assert get_txn(db, confirmed_txid)['confirmed_round'] == 1990
+    assert get_txn(db, dropped_txid)['status'] == TXN_FAILED
+
+
+def test_expired_transaction_without_indexer_stays_pending(db, chain, algod):
+    confirmer = TxnConfirmer(lambda: algod)
+    txid = submit(db, chain, confirmer)
+    algod.last_round = 2500
+    confirmer.poll()
+    assert get_txn(db, txid)['status'] == TXN_PENDING
+
+
+def test_refused_submission_is_recorded_as_failed(db, chain, algod, confirmer):
+    algod.reject = lambda signed_txns: 'fee too small'
+    with pytest.raises(Exception, match='fee too small'):
+        submit(db, chain, confirmer)
+
+    status, error = db.execute('SELECT status, error FROM chain_txns').fetchone()
+    assert status == TXN_FAILED and 'fee too small' in error
+
+
+def test_confirmed_trade_records_its_value_and_fees(db, chain, algod, confirmer, make_token):
+    make_token(1)
+    params = chain.suggested_params()
+    txn = transaction.AssetTransferTxn(chain.address, params, chain.address, 50, 1, lease=unique_lease())
+    txid = confirmer.submit(db, txn.sign(chain.private_key), 'trade', {
+        'asa_id': 1, 'trader_address': 'TRADER', 'trade_type': 'buy', 'amount': 50.0, 'price': 0.01})
+    algod.pending[txid] = {'confirmed-round': 1003}
+    confirmer.poll()
+
+    row = db.execute('SELECT transaction_id, total_value, creator_fee, platform_fee FROM trades').fetchone()
+    assert row[0] == txid
+    assert list(row[1:]) == pytest.approx([0.5, 0.025, 0.01])
+    assert db.execute('SELECT volume FROM creator_earnings_daily').fetchone()[0] == pytest.approx(0.5)
@@ -0,0 +1,102 @@
+"""Connection pool and schema migrations"""
+
+import sqlite3
+import threading
+
+import app as backend_app
+from database import ConnectionPool, audit_query_plans
+from migrations import discover_migrations, get_schema_version, run_migrations
+
+LATEST_VERSION = discover_migrations()[-1][0]
+
+
+def test_pool_reuses_the_threads_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    outer = pool.acquire()
+    inner = pool.acquire()
+    assert inner is outer
+    pool.release(inner)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.acquire()))
+    thread.start()
+    thread.join()
+    assert other[0] is not outer
+
+    pool.release(outer)
+    assert pool.acquire() is outer
+
+
+def test_pool_applies_pragmas(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    conn = pool.acquire()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+
+def test_release_rolls_back_an_open_transaction(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_after_fork_forgets_inherited_connections(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    conn = pool.acquire()
+    pool.release(conn)
+    pool.after_fork()
+    assert pool.acquire() is not conn
+
+
+def test_fresh_database_is_migrated_to_latest(db):
+    assert get_schema_version(db) == LATEST_VERSION
+    tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'tokens', 'trades', 'positions', 'trader_stats', 'candles', 'chain_txns', 'service_leases'} <= tables
+
+
+def test_run_migrations_is_a_no_op_when_current(db):
+    assert run_migrations(db) == LATEST_VERSION
+
+
+def test_upgrade_from_version_zero_with_legacy_rows(tmp_path):
+    """A pre-migrations database, with rows the old schema allowed, upgrades cleanly"""
+    conn = sqlite3.connect(str(tmp_path / 'legacy.db'))
+    conn.execute('''
+        CREATE TABLE tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, asa_id INTEGER UNIQUE, creator TEXT, token_name TEXT,
+            token_symbol TEXT, total_supply INTEGER, current_price REAL, market_cap REAL,
+            volume_24h REAL DEFAULT 0, holders INTEGER DEFAULT 1, price_change_24h REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, youtube_channel_title TEXT,
+            youtube_subscribers INTEGER, video_id TEXT, video_title TEXT
+        )
+    ''')
+    conn.executemany('INSERT INTO tokens (asa_id, creator, token_name, token_symbol, total_supply, current_price) '
+                     "VALUES (?, 'c', 'n', 's', ?, ?)",
+                     [(1, 1000000, 0.002), (2, None, 0.01), (3, 500, None)])
+    conn.commit()
+    assert get_schema_version(conn) == 0
+
+    assert run_migrations(conn) == LATEST_VERSION
+    curves = dict(conn.execute('SELECT asa_id, curve_initial_price FROM tokens').fetchall())
+    assert curves == {1: 0.002, 2: None, 3: 0.001}
+    assert conn.execute('SELECT curve_version FROM tokens WHERE asa_id = 1').fetchone()[0] == 0
+
+
+def test_hot_queries_avoid_full_scans(db):
+    assert audit_query_plans(db, backend_app.HOT_QUERIES) == []
+
+
+def test_audit_flags_whole_index_scans(db):
+    assert audit_query_plans(db, {
+        'table': 'SELECT * FROM trades WHERE total_value > ?',
+        'covering_index': 'SELECT trader_address FROM trader_stats',
+        'rowid': 'SELECT * FROM trades WHERE id > ?',
+        'search': 'SELECT * FROM trades WHERE asa_id = ?',
+    }) == ['table', 'covering_index']
@@ -0,0 +1,40 @@
+"""Sliding 24h market stats"""
+
+import pytest
+
+from candles import _epoch
+from market_stats import refresh_market_stats
+from response_cache import current_data_version
+from trade_engine import record_trade
+
+TRADED_AT = '2024-03-01 10:00:00'
+
+
+@pytest.fixture
+def traded(db, make_token):
+    make_token(1)
+    make_token(2)
+    record_trade(db, {
+        'asa_id': 1, 'trader_address': 'ALICE', 'trade_type': 'buy', 'amount': 100, 'price': 0.002,
+        'transaction_id': '', 'creator_fee': 0.01, 'platform_fee': 0.004, 'total_value': 0.2,
+        'created_at': TRADED_AT,
+    })
+    db.commit()
+    return db
+
+
+def test_refresh_bumps_the_data_version_only_when_figures_move(traded):
+    now = _epoch(TRADED_AT) + 600
+    refresh_market_stats(traded, now)
+    version = current_data_version(traded)
+
+    assert refresh_market_stats(traded, now) == 0
+    assert refresh_market_stats(traded, now + 3600) == 0
+    assert current_data_version(traded) == version
+
+    # The trade leaves the window
+    assert refresh_market_stats(traded, now + 86400) == 1
+    assert current_data_version(traded) == version + 1
+    volume, price_24h_ago = traded.execute('SELECT volume_24h, price_24h_ago FROM tokens WHERE asa_id = 1').fetchone()
+    assert volume == 0
+    assert price_24h_ago == pytest.approx(0.002)
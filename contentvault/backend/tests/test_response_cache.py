@@ -0,0 +1,45 @@
+"""Cached read responses: ETags, 304s and data-version invalidation"""
+
+from response_cache import current_data_version
+
+
+def test_unchanged_data_answers_304(client, make_token):
+    make_token(1)
+    first = client.get('/tokens')
+    assert first.status_code == 200 and first.headers['ETag']
+
+    again = client.get('/tokens', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+def test_trade_invalidates_cached_responses(client, make_token, db):
+    make_token(1)
+    etag = client.get('/api/token/1').headers['ETag']
+    version = current_data_version(db)
+
+    bought = client.post('/api/bonding-curve/buy', json={'asa_id': 1, 'token_amount': 100, 'trader_address': 'T1'})
+    assert bought.status_code == 200
+    assert current_data_version(db) == version + 1
+
+    fresh = client.get('/api/token/1', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+
+
+def test_read_only_and_failed_posts_keep_the_version(client, make_token, db):
+    make_token(1)
+    version = current_data_version(db)
+
+    assert client.post('/api/bonding-curve/estimate', json={'asa_id': 1, 'token_amount': 10}).status_code == 200
+    assert client.post('/api/bonding-curve/buy', json={'asa_id': 1}).status_code == 400
+    assert client.post('/api/bonding-curve/buy', json={'asa_id': 99, 'token_amount': 10,
+                                                       'trader_address': 'T1'}).status_code == 404
+    assert current_data_version(db) == version
+
+
+def test_errors_are_not_cached(client, make_token):
+    make_token(1)
+    assert client.get('/tokens?sort=nonsense').status_code == 400
+    assert 'ETag' not in client.get('/tokens?sort=nonsense').headers
@@ -0,0 +1,74 @@
+"""Keyset pagination of the token listing"""
+
+import pytest
+
+from token_listing import SORTS, decode_cursor, encode_cursor, list_tokens
+
+# (asa_id, created_at, price, volume_24h); ties on every sort key exercise the asa_id tiebreak
+TOKENS = [
+    (11, '2024-01-01 00:00:00', 0.001, 5.0),
+    (12, '2024-01-02 00:00:00', 0.002, 0.0),
+    (13, '2024-01-02 00:00:00', 0.001, 5.0),
+    (14, '2024-01-03 00:00:00', 0.004, 1.5),
+    (15, '2024-01-03 00:00:00', 0.002, 0.0),
+    (16, '2024-01-03 00:00:00', 0.003, 9.0),
+    (17, '2024-01-05 00:00:00', 0.001, 0.0),
+]
+
+
+@pytest.fixture
+def catalogue(db, make_token):
+    for asa_id, created_at, price, volume in TOKENS:
+        make_token(asa_id, initial_price=price, created_at=created_at)
+        db.execute('UPDATE tokens SET volume_24h = ?, platform = ? WHERE asa_id = ?',
+                   (volume, 'youtube' if asa_id % 2 else 'twitter', asa_id))
+    db.commit()
+    return db
+
+
+def walk(conn, limit, **kwargs):
+    """Every page's asa_ids, following cursors to the end"""
+    pages, cursor = [], None
+    while True:
+        tokens, cursor = list_tokens(conn, limit=limit, cursor=cursor, **kwargs)
+        pages.append([token['asa_id'] for token in tokens])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('sort', list(SORTS))
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('limit', [1, 2, 3, 7])
+def test_pages_cover_the_listing_exactly_once(catalogue, sort, order, limit):
+    everything = [token['asa_id'] for token in list_tokens(catalogue, sort=sort, order=order, limit=None)[0]]
+    pages = walk(catalogue, limit, sort=sort, order=order)
+
+    assert [asa_id for page in pages for asa_id in page] == everything
+    assert all(len(page) == limit for page in pages[:-1])
+    assert len(everything) == len(TOKENS)
+
+
+def test_projected_pages_follow_the_same_cursors(catalogue):
+    full = walk(catalogue, 2, sort='market_cap')
+    projected = walk(catalogue, 2, sort='market_cap', fields=['asa_id', 'token_symbol'])
+    assert projected == full
+
+
+def test_filtered_pages(catalogue):
+    pages = walk(catalogue, 2, sort='volume_24h', platform='YouTube')
+    assert sorted(asa_id for page in pages for asa_id in page) == [11, 13, 15, 17]
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor('2024-01-03 00:00:00', 16)) == ('2024-01-03 00:00:00', 16)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_tokens_endpoint_returns_next_cursor(client, catalogue):
+    first = client.get('/tokens?limit=4').get_json()
+    second = client.get(f"/tokens?limit=4&cursor={first['next_cursor']}").get_json()
+
+    assert first['count'] == 4 and second['count'] == 3
+    assert second['next_cursor'] is None
+    assert client.get('/tokens?limit=4&cursor=bogus').status_code == 400
@@ -0,0 +1,93 @@
+"""Trade execution: compare-and-swap retries, the curve cache and buyer transfers"""
+
+from concurrent.futures import Future
+
+import pytest
+
+import app as backend_app
+import trade_engine
+from asset_metadata import AssetMetadata, asset_metadata_cache
+from bonding_curve import BondingCurveState
+from curve_store import curve_cache, load_curve, save_state
+from trade_engine import TradeConflict, execute_trade
+
+
+def trade_elsewhere(db, asa_id, tokens):
+    """Buy on the curve as another process would, behind this process's cache"""
+    record = load_curve(db, asa_id)
+    result = record.curve.calculate_buy_price(record.state.token_supply, record.state.algo_reserve, tokens)
+    state = BondingCurveState(token_supply=result['new_supply'], algo_reserve=result['new_algo_reserve'])
+    assert save_state(db, asa_id, state, result['new_price'], record.version)
+    db.commit()
+    return state
+
+
+def test_stale_cache_is_retried_against_the_moved_curve(db, make_token, monkeypatch):
+    curve = make_token(1)
+    curve_cache.get(1, lambda: db)
+    moved = trade_elsewhere(db, 1, 1000)
+
+    attempts = []
+    def counting_save_state(*args):
+        attempts.append(args)
+        return save_state(*args)
+    monkeypatch.setattr(trade_engine, 'save_state', counting_save_state)
+
+    trade = execute_trade(db, 1, 'buy', 'TRADER', 100)
+
+    assert len(attempts) == 2
+    expected = curve.calculate_buy_price(moved.token_supply, moved.algo_reserve, 100)
+    assert trade['total_value'] == pytest.approx(expected['algo_cost'])
+    record = load_curve(db, 1)
+    assert record.state.token_supply == pytest.approx(1100)
+    assert record.version == curve_cache.get(1, lambda: db).version
+    assert db.execute('SELECT COUNT(*) FROM trades').fetchone()[0] == 1
+
+
+def test_gives_up_when_the_curve_keeps_moving(db, make_token, monkeypatch):
+    make_token(1)
+    monkeypatch.setattr(trade_engine, 'save_state', lambda *args: False)
+
+    with pytest.raises(TradeConflict):
+        execute_trade(db, 1, 'buy', 'TRADER', 100)
+    assert db.execute('SELECT COUNT(*) FROM trades').fetchone()[0] == 0
+
+
+def test_cache_reloads_a_curve_moved_by_another_process(db, make_token):
+    make_token(1)
+    cached = curve_cache.get(1, lambda: db)
+    trade_elsewhere(db, 1, 500)
+
+    assert curve_cache.get(1, lambda: db, revalidate=False) is cached
+    fresh = curve_cache.get(1, lambda: db)
+    assert fresh.version == cached.version + 1
+    assert fresh.state.token_supply == pytest.approx(500)
+
+
+def test_fractional_buys_are_priced_as_requested(db, make_token):
+    curve = make_token(1)
+    trade = execute_trade(db, 1, 'buy', 'TRADER', 0.5)
+    assert trade['amount'] == 0.5
+    assert trade['total_value'] == pytest.approx(curve.calculate_buy_price(0, 0, 0.5)['algo_cost'])
+
+    budget = execute_trade(db, 1, 'buy', 'TRADER', None, algo_amount=0.0001)
+    assert 0 < budget['amount'] < 1
+    assert budget['total_value'] == pytest.approx(0.0001)
+
+
+def test_buyer_is_sent_the_tokens_in_base_units(client, db, make_token, monkeypatch):
+    creator = backend_app.chain_context.address
+    make_token(1, creator=creator)
+    asset_metadata_cache.store(db, AssetMetadata(1, 'Token 1', 'T1', 6, 10 ** 12, creator))
+    sent = []
+
+    def enqueue(asa_id, receiver, amount):
+        sent.append((asa_id, receiver, amount))
+        future = Future()
+        future.set_result('TXID')
+        return future
+    monkeypatch.setattr(backend_app.transfer_batcher, 'enqueue', enqueue)
+
+    response = client.post('/api/bonding-curve/buy', json={'asa_id': 1, 'token_amount': 2.5, 'trader_address': 'T1'})
+    assert response.get_json()['token_transfer_txid'] == 'TXID'
+    assert sent == [(1, 'T1', 2500000)]
@@ -0,0 +1,73 @@
+"""Grouped creator transfers: fee pooling, partial rejection and retries"""
+
+import pytest
+from algosdk import account
+
+from chain_txns import TXN_FAILED, TXN_PENDING, TxnConfirmer
+from transfer_batcher import PendingTransfer, TransferBatcher
+
+BUYERS = [account.generate_account()[1] for _ in range(3)]
+
+
+@pytest.fixture
+def batcher(db, chain, algod):
+    return TransferBatcher(chain, TxnConfirmer(lambda: algod))
+
+
+def transfers(count):
+    return [PendingTransfer(7, receiver, 10) for receiver in BUYERS[:count]]
+
+
+def statuses(db):
+    return dict(db.execute('SELECT txid, status FROM chain_txns'))
+
+
+def test_group_is_sent_once_with_pooled_fee(db, algod, batcher):
+    batch = transfers(3)
+    batcher.submit(batch)
+
+    [group] = algod.sent
+    assert [signed.transaction.fee for signed in group] == [3000, 0, 0]
+    assert len({signed.transaction.group for signed in group}) == 1
+    txids = [transfer.future.result() for transfer in batch]
+    assert txids == [signed.get_txid() for signed in group]
+    assert statuses(db) == {txid: TXN_PENDING for txid in txids}
+
+
+def test_identical_transfers_get_distinct_txids(algod, batcher):
+    batch = [PendingTransfer(7, BUYERS[0], 10) for _ in range(3)]
+    batcher.submit(batch)
+    assert len({transfer.future.result() for transfer in batch}) == 3
+
+
+def test_named_member_fails_alone_and_the_rest_are_regrouped(db, algod, batcher):
+    rejected = []
+
+    def reject_second(signed_txns):
+        if len(signed_txns) == 3:
+            rejected.append(signed_txns[1].get_txid())
+            return f'transaction {rejected[0]}: asset 7 missing from receiver'
+
+    algod.reject = reject_second
+    batch = transfers(3)
+    batcher.submit(batch)
+
+    with pytest.raises(Exception, match='missing from receiver'):
+        batch[1].future.result()
+    [group] = algod.sent
+    assert [signed.transaction.receiver for signed in group] == [batch[0].receiver, batch[2].receiver]
+    assert [signed.transaction.fee for signed in group] == [2000, 0]
+
+    rows = statuses(db)
+    assert rows[rejected[0]] == TXN_FAILED
+    assert rows[batch[0].future.result()] == rows[batch[2].future.result()] == TXN_PENDING
+
+
+def test_unattributed_rejection_retries_individually(db, algod, batcher):
+    algod.reject = lambda signed_txns: 'group rejected' if len(signed_txns) > 1 else None
+    batch = transfers(2)
+    batcher.submit(batch)
+
+    assert [len(group) for group in algod.sent] == [1, 1]
+    assert all(group[0].transaction.group is None for group in algod.sent)
+    assert [transfer.future.result() for transfer in batch] == [group[0].get_txid() for group in algod.sent]
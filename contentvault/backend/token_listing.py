@@ -0,0 +1,150 @@
+"""
+Token catalogue listing
+Keyset-paginated, filterable and projectable token listing for /tokens. Each
+sort walks an index on (sort key, asa_id), so a page costs the same no matter
+how deep into the catalogue it is
+"""
+
+import base64
+import json
+import sqlite3
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from database import select_models
+from models import TokenSummary
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sort name -> indexed SQL expression
+SORTS = {
+    'created_at': 'created_at',
+    'market_cap': 'current_price * total_supply',
+    'volume_24h': 'volume_24h',
+    'price_change_24h': 'price_change_24h',
+}
+
+# Response field -> SQL expression, matching TokenSummary.to_dict()
+FIELDS = {
+    'asa_id': 'asa_id',
+    'creator': 'creator',
+    'creator_address': 'creator',
+    'token_name': 'token_name',
+    'token_symbol': 'token_symbol',
+    'total_supply': 'total_supply',
+    'current_price': 'current_price',
+    'market_cap': 'current_price * total_supply',
+    'volume_24h': 'volume_24h',
+    'holders': 'holders',
+    'price_change_24h': 'price_change_24h',
+    'created_at': 'created_at',
+    'youtube_channel_title': 'youtube_channel_title',
+    'youtube_subscribers': 'youtube_subscribers',
+    'video_id': 'video_id',
+    'video_title': 'video_title',
+    'platform': 'platform',
+    'content_url': 'content_url',
+    'content_id': 'content_id',
+    'content_description': 'content_description',
+    'content_thumbnail': 'content_thumbnail',
+}
+
+
+def encode_cursor(sort_value, asa_id: int) -> str:
+    """Opaque cursor pointing just past a token in the current sort order"""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, asa_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        sort_value, asa_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_value, int(asa_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a comma-separated fields= projection; None means every field"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def listing_sql(columns: str, sort: str = 'created_at', descending: bool = True, after_cursor: bool = False,
+                platform: bool = False, creator: bool = False, min_market_cap: bool = False,
+                limited: bool = True) -> str:
+    """Build the listing query; each flag adds its placeholder(s) in the order given"""
+    expression = SORTS[sort]
+    conditions = []
+    if platform:
+        conditions.append('platform = ?')
+    if creator:
+        conditions.append('creator = ?')
+    if min_market_cap:
+        conditions.append(f"{SORTS['market_cap']} >= ?")
+    if after_cursor:
+        conditions.append(f"({expression}, asa_id) {'<' if descending else '>'} (?, ?)")
+    direction = 'DESC' if descending else 'ASC'
+    return f'''
+        SELECT {columns} FROM tokens
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        ORDER BY {expression} {direction}, asa_id {direction}
+        {'LIMIT ?' if limited else ''}
+    '''
+
+
+def list_tokens(conn: sqlite3.Connection, sort: str = 'created_at', order: str = 'desc',
+                limit: Optional[int] = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                fields: Optional[Sequence[str]] = None, platform: Optional[str] = None,
+                creator: Optional[str] = None, min_market_cap: Optional[float] = None
+                ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of tokens and the cursor for the next page (None on the last page)
+
+    `limit=None` lists every matching token in one response. Raises
+    ValueError for an unknown sort, order or field, or a malformed cursor.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unsupported sort '{sort}', use one of {', '.join(SORTS)}")
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    params: List[Any] = []
+    if platform:
+        params.append(platform.lower())
+    if creator:
+        params.append(creator)
+    if min_market_cap is not None:
+        params.append(min_market_cap)
+    if cursor:
+        params.extend(decode_cursor(cursor))
+    if limit is not None:
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        # One extra row tells us whether another page follows
+        params.append(limit + 1)
+
+    flags = dict(sort=sort, descending=order == 'desc', after_cursor=bool(cursor), platform=bool(platform),
+                 creator=bool(creator), min_market_cap=min_market_cap is not None, limited=limit is not None)
+    if fields is None:
+        rows = select_models(conn, TokenSummary, listing_sql(TokenSummary.SELECT, **flags), params).fetchall()
+        tokens = [row.to_dict() for row in rows]
+    else:
+        columns = ', '.join(f'{FIELDS[name]} AS {name}' for name in fields)
+        rows = conn.execute(listing_sql(f'{columns}, {SORTS[sort]}, asa_id', **flags), params).fetchall()
+        tokens = [dict(zip(fields, row)) for row in rows]
+
+    next_cursor = None
+    if limit is not None and len(tokens) > limit:
+        tokens = tokens[:limit]
+        last = rows[limit - 1]
+        if fields is None:
+            sort_value = last.current_price * last.total_supply if sort == 'market_cap' else getattr(last, sort)
+            next_cursor = encode_cursor(sort_value, last.asa_id)
+        else:
+            next_cursor = encode_cursor(last[-2], last[-1])
+    return tokens, next_cursor
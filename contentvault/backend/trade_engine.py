@@ -0,0 +1,187 @@
+"""
+Bonding curve trade execution
+Prices, records and commits buys and sells in a single short transaction so
+concurrent trades on a token never price off the same curve state
+"""
+
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, List, Optional
+
+from bonding_curve import BondingCurveState
+from curve_store import curve_cache, save_state
+
+logger = logging.getLogger(__name__)
+
+# Trading fees
+CREATOR_FEE_RATE = 0.05  # 5%
+PLATFORM_FEE_RATE = 0.02  # 2%
+REFERRAL_FEE_RATE = 0.0001  # 0.01%
+
+# Attempts before giving up on a token that keeps changing under us
+MAX_TRADE_ATTEMPTS = 5
+
+MICROALGOS_PER_ALGO = 1000000
+
+_trade_hooks: List[Callable[[sqlite3.Connection, Dict[str, Any]], None]] = []
+
+
+class TokenNotFound(LookupError):
+    """The traded token does not exist"""
+
+
+class TradeConflict(RuntimeError):
+    """The curve kept changing between pricing and writing"""
+
+
+def register_trade_hook(hook: Callable[[sqlite3.Connection, Dict[str, Any]], None]):
+    """
+    Run `hook(conn, trade)` for every recorded trade
+
+    Hooks run inside the trade's transaction, so anything they write commits
+    or rolls back together with the trade.
+    """
+    _trade_hooks.append(hook)
+
+
+def record_trade(conn: sqlite3.Connection, trade: Dict[str, Any]) -> int:
+    """Insert a trade row, run the trade hooks and return the trade id"""
+    trade.setdefault('created_at', datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+    cursor = conn.execute('''
+        INSERT INTO trades (asa_id, trader_address, trade_type, amount, price, transaction_id,
+                            creator_fee, platform_fee, total_value, referral_code, referral_earnings, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (trade['asa_id'], trade['trader_address'], trade['trade_type'], trade['amount'], trade['price'],
+          trade['transaction_id'], trade.get('creator_fee', 0), trade.get('platform_fee', 0),
+          trade.get('total_value', 0), trade.get('referral_code'), trade.get('referral_earnings', 0),
+          trade['created_at']))
+    trade['id'] = cursor.lastrowid
+
+    for hook in _trade_hooks:
+        hook(conn, trade)
+    return trade['id']
+
+
+def _fee(total_value: float, rate: float, microalgos: Optional[int]) -> float:
+    """Fee on a trade; fixed-point trades round down to whole microAlgos"""
+    if microalgos is None:
+        return total_value * rate
+    return microalgos * round(rate * 10000) // 10000 / MICROALGOS_PER_ALGO
+
+
+def _apply_referral(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """Credit the trader's referrer, if any, with their share of the trade"""
+    row = conn.execute('SELECT referrer_address, referral_code FROM referrals WHERE referred_address = ?',
+                       (trade['trader_address'],)).fetchone()
+    if not row:
+        return None
+    referrer_address, trade['referral_code'] = row
+    trade['referral_earnings'] = _fee(trade['total_value'], REFERRAL_FEE_RATE, trade['microalgos'])
+    conn.execute('''
+        UPDATE referrals
+        SET total_earnings = total_earnings + ?,
+            total_trades_count = total_trades_count + 1,
+            total_volume = total_volume + ?
+        WHERE referred_address = ?
+    ''', (trade['referral_earnings'], trade['total_value'], trade['trader_address']))
+    return referrer_address
+
+
+def _write_trade(conn: sqlite3.Connection, record, trade_type: str, trader_address: str,
+                 token_amount: Optional[float], transaction_id: str, algo_amount: Optional[float],
+                 max_slippage: Optional[float]) -> Dict[str, Any]:
+    """Price the trade off `record` and write it; returns None on a version conflict"""
+    curve, state = record.curve, record.state
+    if algo_amount is not None:
+        # Size the buy from the ALGO budget against the state we are about to write over
+        token_amount = curve.max_tokens_for_budget(state.token_supply, state.algo_reserve, algo_amount,
+                                                   max_slippage)['token_amount']
+    if trade_type == 'buy':
+        result = curve.calculate_buy_price(state.token_supply, state.algo_reserve, token_amount)
+        total_value = result['algo_cost']
+    else:
+        result = curve.calculate_sell_price(state.token_supply, state.algo_reserve, token_amount)
+        total_value = result['algo_received']
+    new_state = BondingCurveState(token_supply=result['new_supply'], algo_reserve=result['new_algo_reserve'])
+
+    if not save_state(conn, record.asa_id, new_state, result['new_price'], record.version):
+        return None
+
+    trade = {
+        'asa_id': record.asa_id,
+        'trader_address': trader_address,
+        'trade_type': trade_type,
+        'amount': token_amount,
+        'price': result['new_price'],
+        'transaction_id': transaction_id,
+        'creator_fee': _fee(total_value, CREATOR_FEE_RATE, result.get('microalgos')),
+        'platform_fee': _fee(total_value, PLATFORM_FEE_RATE, result.get('microalgos')),
+        'total_value': total_value,
+        'microalgos': result.get('microalgos'),
+        'referral_code': None,
+        'referral_earnings': 0,
+    }
+    referrer_address = _apply_referral(conn, trade)
+    trade_id = record_trade(conn, trade)
+    if referrer_address and trade['referral_earnings'] > 0:
+        conn.execute('''
+            INSERT INTO referral_earnings (referrer_address, referred_address, trade_id, earnings, trade_value)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (referrer_address, trader_address, trade_id, trade['referral_earnings'], total_value))
+
+    trade['result'] = result
+    trade['new_state'] = new_state
+    return trade
+
+
+def execute_trade(conn: sqlite3.Connection, asa_id: int, trade_type: str, trader_address: str,
+                  token_amount: Optional[float], transaction_id: str = '', algo_amount: Optional[float] = None,
+                  max_slippage: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Execute a bonding curve buy or sell
+
+    The curve is priced from the cache and written with a versioned
+    compare-and-swap inside a BEGIN IMMEDIATE transaction, together with the
+    trade row, referral credit and trade hooks. If another process moved the
+    curve first, the cached record is dropped and the trade is re-priced.
+    Nothing in here talks to the network; on-chain transfers happen after
+    this returns.
+
+    A buy can pass `algo_amount` instead of `token_amount` to spend that much
+    ALGO, optionally capped by `max_slippage` (fraction of the current price).
+
+    Returns the recorded trade, plus the curve `result`, `new_state`,
+    `previous_price` and token `creator`. Raises TokenNotFound for an
+    unknown token and ValueError for an uninitialized curve or a trade the
+    curve cannot fill.
+    """
+    asa_id = int(asa_id)
+    with curve_cache.token_lock(asa_id):
+        for attempt in range(MAX_TRADE_ATTEMPTS):
+            record = curve_cache.get(asa_id, lambda: conn, revalidate=False)
+            if record is None:
+                raise TokenNotFound("Token not found")
+            if record.curve is None:
+                raise ValueError("Bonding curve not initialized")
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                trade = _write_trade(conn, record, trade_type, trader_address, token_amount, transaction_id,
+                                     algo_amount, max_slippage)
+                if trade is None:
+                    conn.rollback()
+                    curve_cache.invalidate(asa_id)
+                    logger.info(f"🔁 Curve for token {asa_id} changed during {trade_type}, retrying")
+                    continue
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            curve_cache.store_state(asa_id, trade['new_state'], trade['price'], record.version + 1)
+            trade['previous_price'] = record.current_price
+            trade['creator'] = record.creator
+            return trade
+
+    raise TradeConflict(f"Token {asa_id} is trading too fast, please retry")
@@ -0,0 +1,115 @@
+"""
+Trader analytics engine
+Computes a trader's win rate, 7-day metrics, P&L distribution, holding
+durations and cost basis from their positions and daily rollups, so the work
+scales with tokens and days traded rather than with trades
+"""
+
+import sqlite3
+from typing import Dict, Any, Tuple
+
+from database import select_models
+from models import TokenActivity
+from trader_stats import timeframe_cutoff
+
+# Platform fee used for the 7-day fee estimate
+PLATFORM_FEE_RATE = 0.02
+
+# One row per token the trader holds or has traded, from the position ledger
+TOKEN_ACTIVITY_SQL = '''
+    SELECT
+        p.asa_id,
+        tk.token_name,
+        tk.token_symbol,
+        tk.current_price,
+        tk.market_cap,
+        p.trade_count,
+        p.buy_value,
+        p.sell_value,
+        (julianday(p.last_trade_at) - julianday(p.first_trade_at)) * 1440 AS duration_min,
+        p.quantity,
+        p.cost_basis,
+        p.avg_cost_basis,
+        p.realized_pnl
+    FROM positions p
+    LEFT JOIN tokens tk ON tk.asa_id = p.asa_id
+    WHERE p.trader_address = ?
+'''
+
+# The trader's daily rollup rows for the last 7 days
+WEEK_TOTALS_SQL = '''
+    SELECT COALESCE(SUM(trade_count), 0), TOTAL(buy_volume), TOTAL(sell_volume),
+           COALESCE(SUM(sell_count), 0), TOTAL(realized_pnl),
+           (SELECT COUNT(DISTINCT asa_id) FROM trader_token_days WHERE trader_address = ? AND day >= ?)
+    FROM trader_stats
+    WHERE trader_address = ? AND day >= ?
+'''
+
+
+def _pnl_bucket(roi_pct: float) -> str:
+    if roi_pct > 500:
+        return 'gt_500'
+    if roi_pct >= 200:
+        return '200_500'
+    if roi_pct > 0:
+        return '0_200'
+    if roi_pct >= -50:
+        return 'neg_50_0'
+    return 'lt_neg_50'
+
+
+def compute_trader_analytics(conn: sqlite3.Connection, address: str) -> Tuple[Dict[str, Any], Dict[int, TokenActivity]]:
+    """
+    Aggregate a trader's history
+
+    Returns the analytics summary (everything except holdings) and the
+    per-token positions keyed by asa_id, which carry the cost basis needed
+    to value holdings. P&L is realized FIFO P&L; 7-day figures cover the
+    last 7 whole UTC days.
+    """
+    tokens: Dict[int, TokenActivity] = {}
+    pnl_distribution = {'gt_500': 0, '200_500': 0, '0_200': 0, 'neg_50_0': 0, 'lt_neg_50': 0}
+    total_pnl = total_cost_of_sold = 0.0
+    winning_tokens = 0
+    duration_sum = 0.0
+    duration_count = 0
+
+    for token in select_models(conn, TokenActivity, TOKEN_ACTIVITY_SQL, (address,)):
+        tokens[token.asa_id] = token
+        total_pnl += token.pnl
+        total_cost_of_sold += token.cost_of_sold
+        if token.pnl > 0:
+            winning_tokens += 1
+        if token.cost_of_sold > 0:
+            pnl_distribution[_pnl_bucket(token.pnl / token.cost_of_sold * 100)] += 1
+
+        # Time between first and last trade, for tokens traded more than once
+        if token.trade_count >= 2 and token.duration_min is not None:
+            duration_sum += token.duration_min
+            duration_count += 1
+
+    cutoff = timeframe_cutoff('7d')
+    trades_7d, buys_7d, sells_7d, sell_count_7d, realized_pnl_7d, tokens_traded_7d = conn.execute(
+        WEEK_TOTALS_SQL, (address, cutoff, address, cutoff)).fetchone()
+    cost_of_sold_7d = sells_7d - realized_pnl_7d
+    total_tokens_traded = len(tokens)
+
+    summary = {
+        "realized_pnl_7d": realized_pnl_7d,
+        "realized_pnl_7d_pct": (realized_pnl_7d / cost_of_sold_7d * 100) if cost_of_sold_7d > 0 else 0,
+        "win_rate": (winning_tokens / total_tokens_traded * 100) if total_tokens_traded > 0 else 0,
+        "total_pnl": total_pnl,
+        "total_pnl_pct": (total_pnl / total_cost_of_sold * 100) if total_cost_of_sold > 0 else 0,
+        "trades_7d": trades_7d,
+        "tokens_traded_7d": tokens_traded_7d,
+        "avg_duration_min": duration_sum / duration_count if duration_count else 0,
+        "total_cost_7d": buys_7d,
+        "avg_cost": buys_7d / trades_7d if trades_7d > 0 else 0,
+        "avg_sold": sells_7d / sell_count_7d if sell_count_7d > 0 else 0,
+        "avg_realized_profits": realized_pnl_7d / sell_count_7d if sell_count_7d > 0 else 0,
+        "fees_7d": (buys_7d + sells_7d) * PLATFORM_FEE_RATE,  # 2% platform fee estimate
+        "volume_7d": buys_7d + sells_7d,
+        "total_tokens_traded": total_tokens_traded,
+        "pnl_distribution": pnl_distribution
+    }
+    return summary, tokens
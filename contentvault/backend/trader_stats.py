@@ -0,0 +1,136 @@
+"""
+Trader leaderboard rollups
+Keeps trader_stats (per trader per UTC day) and trader_token_days in step
+with the trades table, so the leaderboard reads pre-aggregated rows instead
+of grouping every trade on each request
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+# Leaderboard windows in days; None means all history
+TIMEFRAME_DAYS = {'7d': 7, '30d': 30, '90d': 90, 'all': None}
+
+# The unary + on the GROUP BY keeps SQLite on the day index instead of walking
+# every trader's full history in primary-key order to avoid a sort
+LEADERBOARD_SQL = '''
+    SELECT
+        s.trader_address,
+        SUM(s.trade_count) AS trade_count,
+        TOTAL(s.buy_volume) AS buy_volume,
+        TOTAL(s.sell_volume) AS sell_volume,
+        TOTAL(s.realized_pnl) AS realized_pnl,
+        (SELECT COUNT(DISTINCT d.asa_id) FROM trader_token_days d
+         WHERE d.trader_address = s.trader_address AND d.day >= ?) AS distinct_tokens,
+        MIN(s.first_trade_at) AS first_trade_at,
+        MAX(s.last_trade_at) AS last_trade_at
+    FROM trader_stats s
+    WHERE s.day >= ?
+    GROUP BY +s.trader_address
+    ORDER BY sell_volume DESC
+    LIMIT ?
+'''
+
+TRADER_PNL_SQL = '''
+    SELECT day, sell_volume - buy_volume AS pnl, realized_pnl
+    FROM trader_stats
+    WHERE trader_address = ? AND day >= ?
+    ORDER BY day
+'''
+
+
+def timeframe_cutoff(timeframe: str, default: str = '30d') -> str:
+    """First UTC day included in a leaderboard timeframe, as YYYY-MM-DD"""
+    days = TIMEFRAME_DAYS.get(timeframe, TIMEFRAME_DAYS[default])
+    if days is None:
+        return '0000-00-00'
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def update_trader_stats(conn: sqlite3.Connection, trade: Dict[str, Any]):
+    """Trade hook: fold one trade into its trader's daily rollup; runs after update_position"""
+    day = trade['created_at'][:10]
+    total_value = trade.get('total_value') or 0
+    is_buy = trade['trade_type'] == 'buy'
+    conn.execute('''
+        INSERT INTO trader_stats
+            (trader_address, day, trade_count, buy_volume, sell_volume, sell_count, realized_pnl,
+             first_trade_at, last_trade_at)
+        VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (trader_address, day) DO UPDATE SET
+            trade_count = trade_count + 1,
+            buy_volume = buy_volume + excluded.buy_volume,
+            sell_volume = sell_volume + excluded.sell_volume,
+            sell_count = sell_count + excluded.sell_count,
+            realized_pnl = realized_pnl + excluded.realized_pnl,
+            first_trade_at = MIN(first_trade_at, excluded.first_trade_at),
+            last_trade_at = MAX(last_trade_at, excluded.last_trade_at)
+    ''', (trade['trader_address'], day, total_value if is_buy else 0, 0 if is_buy else total_value,
+          0 if is_buy else 1, trade.get('realized_pnl') or 0, trade['created_at'], trade['created_at']))
+    conn.execute('INSERT OR IGNORE INTO trader_token_days (trader_address, asa_id, day) VALUES (?, ?, ?)',
+                 (trade['trader_address'], trade['asa_id'], day))
+
+
+def rebuild_trader_stats(conn: sqlite3.Connection) -> int:
+    """
+    Recompute both rollup tables from the full trade history
+
+    Realized P&L comes from trades.realized_pnl, so rebuild positions first
+    if that may be stale. Returns the number of daily rows.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('DELETE FROM trader_stats')
+        conn.execute('DELETE FROM trader_token_days')
+        conn.execute('''
+            INSERT INTO trader_stats
+                (trader_address, day, trade_count, buy_volume, sell_volume, sell_count, realized_pnl,
+                 first_trade_at, last_trade_at)
+            SELECT trader_address, DATE(created_at), COUNT(*),
+                   TOTAL(CASE WHEN trade_type = 'buy' THEN total_value END),
+                   TOTAL(CASE WHEN trade_type = 'sell' THEN total_value END),
+                   COUNT(CASE WHEN trade_type = 'sell' THEN 1 END), TOTAL(realized_pnl),
+                   MIN(created_at), MAX(created_at)
+            FROM trades
+            GROUP BY trader_address, DATE(created_at)
+        ''')
+        conn.execute('''
+            INSERT INTO trader_token_days (trader_address, asa_id, day)
+            SELECT DISTINCT trader_address, asa_id, DATE(created_at) FROM trades
+        ''')
+        rows = conn.execute('SELECT COUNT(*) FROM trader_stats').fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rows
+
+
+def leaderboard(conn: sqlite3.Connection, timeframe: str, limit: int) -> List[Dict[str, Any]]:
+    """Top traders by sell volume over a timeframe"""
+    cutoff = timeframe_cutoff(timeframe)
+    traders = []
+    for row in conn.execute(LEADERBOARD_SQL, (cutoff, cutoff, limit)):
+        (trader_address, trade_count, buy_volume, sell_volume, realized_pnl, distinct_tokens,
+         first_trade_at, last_trade_at) = row
+        net_pnl = sell_volume - buy_volume
+        traders.append({
+            "trader_address": trader_address,
+            "trade_count": trade_count,
+            "buy_volume": buy_volume,
+            "sell_volume": sell_volume,
+            "net_pnl": net_pnl,
+            "roi_pct": (net_pnl / buy_volume * 100) if buy_volume > 0 else 0,
+            "realized_pnl": realized_pnl,
+            "distinct_tokens": distinct_tokens,
+            "first_trade_at": first_trade_at,
+            "last_trade_at": last_trade_at
+        })
+    return traders
+
+
+def daily_pnl(conn: sqlite3.Connection, address: str, timeframe: str) -> List[Dict[str, Any]]:
+    """A trader's per-day cash-flow and realized P&L over a timeframe"""
+    return [{"day": day, "pnl": pnl or 0, "realized_pnl": realized_pnl or 0}
+            for day, pnl, realized_pnl in conn.execute(TRADER_PNL_SQL, (address, timeframe_cutoff(timeframe)))]
@@ -0,0 +1,199 @@
+"""
+Creator token transfer batching
+Collects creator-to-buyer asset transfers for a short window and submits them
+as atomic groups of up to 16 with the group's fees pooled on its first
+member, so a burst of bonding-curve buys costs one algod submission per group
+rather than one per trade
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from algosdk import constants, transaction
+
+from chain_context import ChainContext, unique_lease
+from chain_txns import TxnConfirmer
+from database import db_connection
+
+logger = logging.getLogger(__name__)
+
+# Largest atomic group algod accepts
+MAX_GROUP_SIZE = 16
+# Seconds a transfer waits for others to share its group
+BATCH_WINDOW = 0.25
+# Rough encoded size of a signed asset transfer, for per-byte fees under congestion
+ASSET_TRANSFER_BYTES = 250
+
+
+class PendingTransfer:
+    """A queued transfer and the future its txid is delivered on"""
+
+    __slots__ = ('asa_id', 'receiver', 'amount', 'future')
+
+    def __init__(self, asa_id: int, receiver: str, amount: int):
+        self.asa_id = asa_id
+        self.receiver = receiver
+        self.amount = amount
+        self.future: Future = Future()
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        return {'asa_id': self.asa_id, 'receiver': self.receiver, 'amount': self.amount}
+
+
+def transfer_fee(sp: transaction.SuggestedParams) -> int:
+    """Fee one asset transfer pays under the suggested params"""
+    if sp.flat_fee:
+        return max(sp.fee, sp.min_fee or constants.MIN_TXN_FEE)
+    return max(sp.fee * ASSET_TRANSFER_BYTES, sp.min_fee or constants.MIN_TXN_FEE)
+
+
+def build_transfer_group(sp: transaction.SuggestedParams, sender: str, private_key: str,
+                         transfers: List[Any]) -> List[transaction.SignedTransaction]:
+    """
+    Sign `transfers` (objects with asa_id, receiver and amount) as one atomic group
+
+    The first member pays the whole group's fee and the rest pay nothing. A
+    single transfer is sent on its own, without a group id. Each member gets
+    its own lease, so equal transfers in one group still have distinct txids.
+    """
+    fee = transfer_fee(sp)
+    txns = []
+    for position, transfer in enumerate(transfers):
+        params = transaction.SuggestedParams(fee * len(transfers) if position == 0 else 0, sp.first, sp.last,
+                                             sp.gh, sp.gen, flat_fee=True, min_fee=sp.min_fee)
+        txns.append(transaction.AssetTransferTxn(sender=sender, sp=params, receiver=transfer.receiver,
+                                                 amt=transfer.amount, index=transfer.asa_id,
+                                                 lease=unique_lease()))
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    return [txn.sign(private_key) for txn in txns]
+
+
+def rejected_member(error: Exception, signed_txns: List[transaction.SignedTransaction]) -> Optional[int]:
+    """Index of the group member algod named in its rejection, if any"""
+    message = str(error)
+    for position, signed_txn in enumerate(signed_txns):
+        if signed_txn.get_txid() in message:
+            return position
+    return None
+
+
+class TransferBatcher:
+    """Background thread that groups queued creator transfers and submits them"""
+
+    def __init__(self, chain: ChainContext, confirmer: TxnConfirmer, window: float = BATCH_WINDOW,
+                 max_group: int = MAX_GROUP_SIZE):
+        self.chain = chain
+        self.confirmer = confirmer
+        self.window = window
+        self.max_group = max_group
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def enqueue(self, asa_id: int, receiver: str, amount: int) -> Future:
+        """
+        Queue a transfer from the creator wallet; the future resolves to its txid
+
+        The future raises if algod rejects the transfer. Without the batching
+        thread (scripts, the CLI) the transfer is submitted immediately.
+        """
+        transfer = PendingTransfer(int(asa_id), receiver, int(amount))
+        if self.running:
+            self._queue.put(transfer)
+        else:
+            self.submit([transfer])
+        return transfer.future
+
+    def submit(self, transfers: List[PendingTransfer]):
+        """
+        Submit transfers as one atomic group, resolving each transfer's future
+
+        A member algod names in a rejection is failed on its own and the rest
+        regrouped and resubmitted; if the culprit can't be told apart, each
+        transfer is retried individually.
+        """
+        with db_connection() as conn:
+            self._submit(conn, list(transfers))
+
+    def _submit(self, conn, pending: List[PendingTransfer]):
+        while pending:
+            signed_txns = build_transfer_group(self.chain.suggested_params(), self.chain.address,
+                                               self.chain.private_key, pending)
+            try:
+                txids = self.confirmer.submit_group(conn, signed_txns, 'token_transfer',
+                                                    [transfer.payload for transfer in pending])
+            except Exception as e:
+                position = 0 if len(pending) == 1 else rejected_member(e, signed_txns)
+                if position is None:
+                    logger.warning(f"⚠️ Transfer group of {len(pending)} rejected ({e}), retrying individually")
+                    for transfer in pending:
+                        self._submit(conn, [transfer])
+                    return
+                transfer = pending.pop(position)
+                logger.error(f"❌ Transfer of ASA {transfer.asa_id} to {transfer.receiver} rejected: {e}")
+                self.confirmer.record_rejected(conn, signed_txns[position], 'token_transfer',
+                                               transfer.payload, str(e))
+                transfer.future.set_exception(e)
+                continue
+            for transfer, txid in zip(pending, txids):
+                transfer.future.set_result(txid)
+            return
+
+    def _collect(self) -> List[PendingTransfer]:
+        """Wait for a transfer, then gather more until the window closes or the group is full"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_group:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            batch = [transfer for transfer in batch if transfer is not None]
+            if not batch:
+                continue
+            try:
+                self.submit(batch)
+            except Exception as e:
+                logger.error(f"Error submitting transfer batch: {e}")
+                for transfer in batch:
+                    if not transfer.future.done():
+                        transfer.future.set_exception(e)
+
+    def start(self):
+        """Start the batching thread if it is not already running in this process"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='transfer-batcher', daemon=True)
+        self._thread.start()
+        logger.info(f"📦 Transfer batcher started (groups of up to {self.max_group}, {self.window}s window)")
+
+    @property
+    def running(self) -> bool:
+        """Whether the batching thread is alive in this process"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Signal the batching thread to exit once it has submitted what it holds"""
+        self._stop.set()
+        self._queue.put(None)
+
+    def after_fork(self):
+        """Drop the queue and thread handle inherited from the parent process"""
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
@@ -0,0 +1,34 @@
+"""
+Production entry point for the backend
+Serve `wsgi:app` with gunicorn (see gunicorn.conf.py), or run this file to
+serve it with waitress where gunicorn is unavailable (e.g. Windows)
+"""
+
+import os
+import logging
+
+from app import app, init_db, start_background_services
+
+logger = logging.getLogger(__name__)
+
+# Migrate once at import; with preload_app this runs in gunicorn's master
+# before any worker is forked
+init_db()
+
+application = app
+
+
+def serve_waitress():
+    """Serve with waitress: one process, a pool of request threads"""
+    from waitress import serve
+
+    host = os.getenv('HOST', '0.0.0.0')
+    port = int(os.getenv('PORT', 5001))
+    threads = int(os.getenv('WAITRESS_THREADS', 16))
+    start_background_services()
+    logger.info(f"🚀 Serving with waitress on http://{host}:{port} ({threads} threads)")
+    serve(app, host=host, port=port, threads=threads, connection_limit=1000, channel_timeout=60)
+
+
+if __name__ == '__main__':
+    serve_waitress()
@@ -106,39 +106,9 @@ const Dashboard: React.FC = () => {
           .slice(0, 10)
         setTrendingTokens(trending)
         
-        // Fetch real analytics for each token
-        const tokensWithAnalytics = await Promise.all(
-          allTokens.map(async (token: Token) => {
-            try {
-              // Fetch trade history for volume calculation
-              const tradesResponse = await fetch(`http://localhost:5001/api/trades/${token.asa_id}?timeframe=24h&limit=100`)
-              if (tradesResponse.ok) {
-                const tradesData = await tradesResponse.json()
-                if (tradesData.success && tradesData.trades) {
-                  // Calculate real 24h volume
-                  const volume24h = tradesData.trades.reduce((sum: number, trade: any) => {
-                    return sum + (trade.amount * trade.price)
-                  }, 0)
-                  
-                  return {
-                    ...token,
-                    volume_24h: volume24h || token.volume_24h || 0,
-                    trade_count_24h: tradesData.trades.length
-                  }
-                }
-              }
-            } catch (error) {
-              console.warn(`Failed to fetch analytics for token ${token.asa_id}:`, error)
-            }
-            return token
-          })
-        )
-        
-        setTokens(tokensWithAnalytics)
-        
         // Calculate portfolio & holdings if wallet connected
         if (isConnected && address) {
-          calculatePortfolio(tokensWithAnalytics)
+          calculatePortfolio(allTokens)
 
           try {
             const portfolioRes = await fetch(`${API_BASE_URL}/api/portfolio/${address}`)
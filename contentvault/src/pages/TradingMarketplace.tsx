@@ -204,21 +204,22 @@ const TradingMarketplace: React.FC = () => {
   // Fetch real trade history for charts
   const fetchTradeHistory = async (asaId: number) => {
     try {
-      const trades = await TradingService.getTradeHistory(asaId, '24h', 200)
+      // Last 24h of 5-minute candles for the chart, latest trades for the list
+      const [candles, trades] = await Promise.all([
+        TradingService.getCandles(asaId, '5m', 288),
+        TradingService.getTradeHistory(asaId, '24h', 20)
+      ])
       
-      // Convert trades to chart data
-      const chartDataPoints: ChartDataPoint[] = trades.map((trade: any) => {
-        const date = new Date(trade.timestamp)
+      // Convert candles to chart data (already sorted oldest first)
+      const chartDataPoints: ChartDataPoint[] = candles.map((candle: any) => {
+        const date = new Date(candle.time * 1000)
         return {
           time: `${date.getHours()}:${date.getMinutes().toString().padStart(2, '0')}`,
-          price: trade.price,
-          timestamp: new Date(trade.timestamp).getTime()
+          price: candle.close,
+          timestamp: date.getTime()
         }
       })
       
-      // Sort by timestamp
-      chartDataPoints.sort((a, b) => a.timestamp - b.timestamp)
-      
       // If no trades, create initial point from current price
       if (chartDataPoints.length === 0 && tokenData) {
         chartDataPoints.push({
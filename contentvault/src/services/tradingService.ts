@@ -212,6 +212,29 @@ export class TradingService {
     }
   }
 
+  /**
+   * Get OHLCV candles for a token, oldest first
+   */
+  static async getCandles(
+    asaId: number,
+    interval: '1m' | '5m' | '1h' | '1d' = '5m',
+    limit: number = 288
+  ): Promise<any[]> {
+    try {
+      const response = await fetch(
+        `${BACKEND_URL}/api/candles/${asaId}?interval=${interval}&limit=${limit}`
+      )
+      const result = await response.json()
+      if (result.success) {
+        return result.candles || []
+      }
+      return []
+    } catch (error) {
+      console.error('Error fetching candles:', error)
+      return []
+    }
+  }
+
   /**
    * Get token details including bonding curve state
    */
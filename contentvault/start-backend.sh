@@ -23,11 +23,23 @@ echo "📦 Installing Python dependencies..."
 pip3 install -r requirements.txt
 
 # Start the Python backend
-echo "🐍 Starting Python Flask backend on http://localhost:8000"
+echo "🐍 Starting Python Flask backend on http://localhost:5001"
 echo "📡 Algorand Testnet: https://testnet-api.algonode.cloud"
 echo "🔑 Using mnemonic for creator account"
 echo ""
 echo "Press Ctrl+C to stop the backend"
 echo ""
 
-python3 app.py
+# DEV=1 runs the single-process debug server with auto-reload
+if [ "$DEV" = "1" ]; then
+    exec python3 app.py
+fi
+
+# Multi-worker production server; waitress where gunicorn is unavailable
+if python3 -c "import gunicorn" &> /dev/null; then
+    echo "🦄 Serving with gunicorn (workers: ${WEB_CONCURRENCY:-auto})"
+    exec python3 -m gunicorn -c gunicorn.conf.py wsgi:app
+else
+    echo "🍸 gunicorn not available, serving with waitress"
+    exec python3 wsgi.py
+fi
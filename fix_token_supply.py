@@ -25,7 +25,38 @@ assets = account_info.get('assets', [])
 
 print(f"Found {len(assets)} assets")
 
-# Transfer tokens for each asset
+# Atomic groups hold at most 16 transactions
+MAX_GROUP_SIZE = 16
+
+def send_transfers(transfers):
+    """Send (asset_id, amount) transfers as one atomic group; the first one pays the pooled fee"""
+    sp = algod_client.suggested_params()
+    fee = max(sp.min_fee, sp.fee * 250)
+    txns = []
+    for position, (asset_id, amount) in enumerate(transfers):
+        params = transaction.SuggestedParams(fee * len(transfers) if position == 0 else 0, sp.first, sp.last,
+                                             sp.gh, sp.gen, flat_fee=True, min_fee=sp.min_fee)
+        txns.append(transaction.AssetTransferTxn(
+            sender=creator_address,  # Reserve address
+            sp=params,
+            receiver=creator_address,  # Creator account
+            amt=amount,
+            index=asset_id
+        ))
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    signed = [txn.sign(private_key) for txn in txns]
+    algod_client.send_transactions(signed)
+    print(f"Transfer group of {len(signed)} sent: {signed[0].get_txid()}")
+    return signed[0].get_txid()
+
+def wait_for_group(txid):
+    """Group members confirm together, so waiting on one is enough"""
+    results = transaction.wait_for_confirmation(algod_client, txid, 4)
+    print(f"Transfer group confirmed in round: {results['confirmed-round']}")
+
+# Work out the transfer each asset needs
+transfers = []
 for asset in assets:
     asset_id = asset['asset-id']
     current_amount = asset['amount']
@@ -48,29 +79,31 @@ for asset in assets:
         amount_to_transfer = total_supply - current_amount
         
         if amount_to_transfer > 0:
-            print(f"Transferring {amount_to_transfer} micro-units ({amount_to_transfer/1000000} tokens)")
-            
-            # Create transfer transaction
-            sp = algod_client.suggested_params()
-            transfer_txn = transaction.AssetTransferTxn(
-                sender=creator_address,  # Reserve address
-                sp=sp,
-                receiver=creator_address,  # Creator account
-                amt=amount_to_transfer,
-                index=asset_id
-            )
-            
-            signed_transfer = transfer_txn.sign(private_key)
-            transfer_txid = algod_client.send_transaction(signed_transfer)
-            print(f"Transfer transaction sent: {transfer_txid}")
-            
-            # Wait for confirmation
-            transfer_results = transaction.wait_for_confirmation(algod_client, transfer_txid, 4)
-            print(f"Transfer confirmed in round: {transfer_results['confirmed-round']}")
+            print(f"Queueing transfer of {amount_to_transfer} micro-units ({amount_to_transfer/1000000} tokens)")
+            transfers.append((asset_id, amount_to_transfer))
         else:
             print("No transfer needed - creator already has full supply")
             
     except Exception as e:
         print(f"Error processing asset {asset_id}: {e}")
 
+# Send them in atomic groups, falling back to one at a time for a group that is rejected
+for start in range(0, len(transfers), MAX_GROUP_SIZE):
+    group = transfers[start:start + MAX_GROUP_SIZE]
+    try:
+        txids = [send_transfers(group)]
+    except Exception as e:
+        print(f"Error sending transfer group: {e}")
+        txids = []
+        for transfer in group if len(group) > 1 else []:
+            try:
+                txids.append(send_transfers([transfer]))
+            except Exception as e:
+                print(f"Error processing asset {transfer[0]}: {e}")
+    for txid in txids:
+        try:
+            wait_for_group(txid)
+        except Exception as e:
+            print(f"Error confirming transfer {txid}: {e}")
+
 print("\n✅ Token supply fix completed!")